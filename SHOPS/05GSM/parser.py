@@ -48,6 +48,7 @@ ERRORS_LOG = f"{DATA_DIR}/errors.json"
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from db_wrapper import get_db  # Автоматически маппит таблицы на новые имена
+from crawl_engine import CrawlTask, crawl
 
 
 class Parser05GSM:
@@ -351,6 +352,84 @@ class Parser05GSM:
 
             self.products.extend(page_products)
 
+    # === Конкурентный обход (crawl_engine) ===
+
+    def _parse_cards(self, soup: BeautifulSoup, category_slug: str, category_name: str) -> List[Dict]:
+        cards = soup.find_all('div', class_='catalog-block__item') or \
+                soup.find_all('div', class_=re.compile(r'product-item|catalog-item'))
+        products = []
+        for card in cards:
+            product = self.parse_product_card(card, category_slug, category_name)
+            if product:
+                products.append(product)
+        return products
+
+    def _handle_page(self, task: CrawlTask, soup: BeautifulSoup) -> List[CrawlTask]:
+        """
+        Обработчик CrawlEngine.
+        category: подкатегории → новые category-задачи, иначе товары 1-й страницы + page-задачи.
+        page: товары со страницы пагинации.
+        """
+        indent = "  " * task.depth
+
+        if task.kind == "page":
+            products = self._parse_cards(soup, task.data["slug"], task.data["name"])
+            self.products.extend(products)
+            print(f"{indent}    {task.data['slug']} стр. {task.data['page']}: +{len(products)} товаров")
+            return []
+
+        category_slug = task.data["slug"]
+        cat_slug, cat_name = self.extract_breadcrumbs(soup)
+        if not cat_name:
+            h1 = soup.find('h1')
+            cat_name = h1.get_text(strip=True) if h1 else category_slug
+            cat_slug = category_slug
+        self.categories[cat_slug] = cat_name
+
+        subcategories = self.get_subcategories(soup)
+        if subcategories:
+            print(f"{indent}[{task.depth}] {category_slug}: подкатегорий {len(subcategories)}")
+            return [
+                CrawlTask(f"{BASE_URL}/catalog/{sub['slug']}/", kind="category",
+                          depth=task.depth + 1, data={"slug": sub['slug']})
+                for sub in subcategories
+            ]
+
+        products = self._parse_cards(soup, cat_slug, cat_name)
+        self.products.extend(products)
+        total_pages = self.get_total_pages(soup)
+        print(f"{indent}[{task.depth}] {category_slug}: стр. 1/{total_pages}, +{len(products)} товаров")
+        return [
+            CrawlTask(f"{task.url}?PAGEN_1={page}", kind="page", depth=task.depth,
+                      data={"slug": cat_slug, "name": cat_name, "page": page})
+            for page in range(2, total_pages + 1)
+        ]
+
+    def parse_all_concurrent(self, concurrency: int = 4, root_categories: List[str] = None):
+        """Парсит корневые категории через crawl_engine: страницы грузятся параллельно"""
+        roots = root_categories or ROOT_CATEGORIES
+        print(f"\n{'='*60}")
+        print(f"Парсинг 05GSM.ru (async, {concurrency} потоков на домен)")
+        print(f"Дата: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Корневые категории: {', '.join(roots)}")
+        print(f"{'='*60}\n")
+
+        engine = crawl(
+            [CrawlTask(f"{BASE_URL}/catalog/{slug}/", kind="category", data={"slug": slug}) for slug in roots],
+            self._handle_page,
+            concurrency=concurrency, delay=REQUEST_DELAY, timeout=REQUEST_TIMEOUT,
+            retries=MAX_RETRIES, headers=dict(self.session.headers),
+            parser='lxml', encoding='utf-8',
+        )
+        self.errors.extend(engine.errors)
+
+        print(f"\n{'='*60}")
+        print(f"ИТОГО: {len(self.products)} товаров")
+        print(f"Категорий: {len(self.categories)}")
+        print(f"Ошибок: {len(self.errors)}")
+        print(f"HTTP: {engine.stats}")
+        print(f"{'='*60}")
+
     def parse_all(self):
         """Парсит все корневые категории"""
         print(f"\n{'='*60}")
@@ -640,6 +719,8 @@ def main():
                            help='Использовать старую схему БД (staging)')
     arg_parser.add_argument('--full', action='store_true',
                            help='Полный парсинг (UPSERT и так полный для этого парсера)')
+    arg_parser.add_argument('--concurrency', type=int, default=0,
+                           help='Параллельная загрузка страниц через crawl_engine (N запросов на домен)')
     args = arg_parser.parse_args()
 
     # Только обработка staging (старая схема)
@@ -651,7 +732,10 @@ def main():
     # Парсинг
     parser = Parser05GSM()
 
-    if args.category:
+    if args.concurrency > 0:
+        roots = [args.category] if args.category else None
+        parser.parse_all_concurrent(concurrency=args.concurrency, root_categories=roots)
+    elif args.category:
         # Парсим одну категорию
         parser.crawl_category(args.category)
     else:
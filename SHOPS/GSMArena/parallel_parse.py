@@ -1,122 +1,511 @@
 #!/usr/bin/env python3
 """
 Параллельный парсинг GSMArena
-Каждый бренд на своём прокси
+Каждая полоса (lane) — на своём прокси, всё в одном процессе (asyncio)
+
+- полосы берут задачи из общей очереди: makers → страницы брендов → страницы моделей
+- у каждой полосы свой httpx.AsyncClient через свой прокси, арендованный у proxy-service
+  (proxy_client.py: локальный буфер + пакетные отчёты success/failure/ban);
+  на 429/ошибке прокси полоса берёт следующий, задача возвращается в очередь
+- общий планировщик: пауза между запросами полосы (DELAY_MIN..DELAY_MAX),
+  на 429 — общая пауза и рост задержек у всех полос, на успехах задержки снижаются
+- запись в БД через общий пул соединений (psycopg2 ThreadedConnectionPool, в потоке),
+  пачками multi-row UPSERT; вместе со строкой сохраняется хэш страницы модели
+- --incremental: скачиваются только модели, которым пора на перепроверку,
+  страницы с неизменным хэшем не разбираются и не пишутся
+- прогресс печатается каждые --progress секунд
 """
-import subprocess
-import sys
-import time
+import asyncio
 import os
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
 
-# Бренды для допарсинга
-BRANDS = ['vivo', 'realme', 'oneplus', 'google', 'nokia', 'motorola', 'tecno', 'poco']
+import httpx
 
+import parser as gsm
+from proxy_client import LEASE_WAIT, PROXY_SERVICE_URL, ProxyLeaseClient, proxy_label, proxy_url
 
-def parse_brand_with_proxy(args):
-    """Запустить парсинг бренда на конкретном прокси"""
-    brand, proxy = args
-    print(f"[{brand}] Starting on proxy {proxy}...")
-
-    # Создаём файл с ОДНИМ прокси
-    brand_proxy_file = f"proxy_{brand}.txt"
-    with open(brand_proxy_file, 'w') as f:
-        f.write(f"{proxy}\n")
-
-    cmd = [
-        sys.executable, '-c',
-        f'''
-import sys
-sys.path.insert(0, ".")
-import parser
-parser.PROXIES_FILE = "{brand_proxy_file}"
-parser.DELAY_MIN = 2.0
-parser.DELAY_MAX = 4.0
-p = parser.GSMArenaParser(use_db=True, use_proxy=True)
-p.resume_mode = True
 try:
-    p.parse_brand("{brand}")
-finally:
-    p.close()
-'''
-    ]
-
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=7200,  # 2 hours max
-            cwd=os.path.dirname(os.path.abspath(__file__))
-        )
+    from psycopg2.pool import ThreadedConnectionPool
+except ImportError:
+    ThreadedConnectionPool = None
+
+# Бренды для допарсинга
+BRANDS = ['vivo', 'realme', 'oneplus', 'google', 'nokia', 'motorola', 'tecno', 'poco']
 
-        output = result.stdout + result.stderr
+DELAY_MIN = 2.0
+DELAY_MAX = 4.0
+PAUSE_ON_429 = 15.0       # Общая пауза всех полос после 429, сек
+SLOWDOWN_MAX = 8.0        # Максимальный множитель задержек
+JOB_ATTEMPTS = 5          # Попыток на одну страницу (с разными прокси)
+DB_POOL_SIZE = 4
+PROGRESS_INTERVAL = 15
+
+
+class PageGone(Exception):
+    """HTTP 4xx кроме 429 (404, 410, ...): страницы нет, повтор через другой прокси не поможет."""
+
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+@dataclass
+class Job:
+    kind: str                       # makers | brand | model
+    url: str
+    brand: Optional[str] = None     # код бренда
+    page: int = 1
+    model: Dict = field(default_factory=dict)
+    attempts: int = 0
+
+
+@dataclass
+class BrandState:
+    code: str
+    name: str = ""
+    url: str = ""
+    listing_done: bool = False
+    found: int = 0
+    pending: int = 0
+    parsed: int = 0
+    skipped: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    existing: Optional[set] = None  # Уже спарсенные модели (resume)
+    page_states: Dict[str, Dict] = field(default_factory=dict)  # model_url -> хэш/статус (incremental)
+    results: List[Dict] = field(default_factory=list)
+
+
+class Scheduler:
+    """
+    Общий для всех полос темп запросов.
+    Каждая полоса ждёт DELAY_MIN..DELAY_MAX * slowdown после своего прошлого запроса;
+    429 на любой полосе ставит общую паузу и удваивает slowdown.
+    """
+
+    def __init__(self, delay_min: float = DELAY_MIN, delay_max: float = DELAY_MAX):
+        self.delay_min = delay_min
+        self.delay_max = delay_max
+        self.slowdown = 1.0
+        self.pause_until = 0.0
+        self.requests = 0
+        self.hits_429 = 0
+
+    async def wait(self, lane: "Lane"):
+        while True:
+            now = time.monotonic()
+            wait = max(self.pause_until, lane.next_at) - now
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        lane.next_at = time.monotonic() + random.uniform(self.delay_min, self.delay_max) * self.slowdown
+        self.requests += 1
+
+    def on_success(self):
+        self.slowdown = max(1.0, self.slowdown * 0.98)
+
+    def on_429(self):
+        self.hits_429 += 1
+        self.slowdown = min(SLOWDOWN_MAX, self.slowdown * 2)
+        self.pause_until = max(self.pause_until, time.monotonic() + PAUSE_ON_429)
+
+
+class DBWriter:
+    """
+    Общий пул соединений; запросы выполняются в рабочем потоке, не блокируя полосы.
+    Строки и отметки проверки копятся в буфере и пишутся пачкой (gsm.write_batch).
+    """
+
+    def __init__(self, size: int = DB_POOL_SIZE):
+        self.pool = ThreadedConnectionPool(1, size, **gsm.DB_CONFIG)
+        self.rows: List[Dict] = []
+        self.checks: List[tuple] = []
+        self.saved = 0
+        conn = self.pool.getconn()
+        try:
+            gsm.check_page_state_table(conn)
+        finally:
+            self.pool.putconn(conn)
 
-        # Логируем ключевые строки
-        for line in output.split('\n'):
-            if any(x in line for x in ['models parsed', 'Resume mode', 'Error', '429']):
-                print(f"[{brand}] {line}")
+    def _write(self, rows: List[Dict], checks: List[tuple]) -> int:
+        conn = self.pool.getconn()
+        try:
+            gsm.write_batch(conn, rows, checks)
+            return len(rows)
+        except Exception as e:
+            print(f"Database error: {e}")
+            return 0
+        finally:
+            self.pool.putconn(conn)
+
+    def _page_states(self, brand_name: str) -> Dict[str, Dict]:
+        conn = self.pool.getconn()
+        try:
+            return gsm.load_page_states(conn, brand_name)
+        finally:
+            self.pool.putconn(conn)
 
-        # Удаляем временный файл
+    def _existing_models(self, brand_name: str) -> set:
+        conn = self.pool.getconn()
         try:
-            os.remove(brand_proxy_file)
-        except:
-            pass
-
-        success = 'models parsed' in output and 'Error' not in output
-        return brand, proxy, success, output
-
-    except subprocess.TimeoutExpired:
-        print(f"[{brand}] Timeout on {proxy}")
-        return brand, proxy, False, "Timeout"
-    except Exception as e:
-        print(f"[{brand}] Error: {e}")
-        return brand, proxy, False, str(e)
-
-
-def test_proxy(proxy, timeout=10):
-    """Быстрая проверка прокси"""
-    import requests
-    try:
-        response = requests.get(
-            "https://www.gsmarena.com/",
-            proxies={"http": f"http://{proxy}", "https": f"http://{proxy}"},
-            timeout=timeout,
-            headers={'User-Agent': 'Mozilla/5.0'}
+            with conn.cursor() as cur:
+                cur.execute("SELECT model_name FROM zip_gsmarena_raw WHERE brand = %s", (brand_name,))
+                return {row[0] for row in cur.fetchall()}
+        finally:
+            conn.rollback()
+            self.pool.putconn(conn)
+
+    async def add(self, row: Optional[Dict], check: tuple):
+        """Поставить строку (None — страница не изменилась) и отметку проверки в буфер."""
+        if row is not None:
+            self.rows.append(row)
+        self.checks.append(check)
+        if len(self.rows) >= gsm.BATCH_SIZE or len(self.checks) >= gsm.BATCH_SIZE * 4:
+            await self.flush()
+
+    async def flush(self):
+        if not self.rows and not self.checks:
+            return
+        rows, checks = self.rows, self.checks
+        self.rows, self.checks = [], []
+        self.saved += await asyncio.to_thread(self._write, rows, checks)
+
+    async def page_states(self, brand_name: str) -> Dict[str, Dict]:
+        return await asyncio.to_thread(self._page_states, brand_name)
+
+    async def existing_models(self, brand_name: str) -> set:
+        return await asyncio.to_thread(self._existing_models, brand_name)
+
+    def close(self):
+        self.pool.closeall()
+
+
+class Lane:
+    """Полоса: свой прокси + свой клиент, последовательные запросы."""
+
+    def __init__(self, idx: int, engine: "ParallelEngine"):
+        self.idx = idx
+        self.engine = engine
+        self.proxy: Optional[Dict] = None
+        self.client: Optional[httpx.AsyncClient] = None
+        self.next_at = 0.0
+        self.current = ""
+        self.done = 0
+
+    async def _bind(self) -> bool:
+        """Взять следующий прокси и открыть клиент через него."""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        if self.engine.proxies is None:
+            self.proxy = None
+        else:
+            self.proxy = await self.engine.proxies.alease()
+            if self.proxy is None:
+                return False
+        if self.engine.transport is not None:
+            transport = {"transport": self.engine.transport}
+        else:
+            transport = {"proxy": proxy_url(self.proxy) if self.proxy else None}
+        self.client = httpx.AsyncClient(
+            headers=self.engine.headers,
+            cookies=self.engine.cookies,
+            timeout=30,
+            follow_redirects=True,
+            **transport,
         )
-        return response.status_code == 200
-    except:
-        return False
-
-
-def find_working_proxies(proxies, count=10, timeout=10):
-    """Найти работающие прокси"""
-    print(f"Testing {len(proxies)} proxies to find {count} working ones...")
-    working = []
-
-    for i, proxy in enumerate(proxies):
-        if len(working) >= count:
-            break
-        if test_proxy(proxy, timeout):
-            working.append(proxy)
-            print(f"  [{len(working)}/{count}] {proxy} - OK")
+        return True
+
+    async def _report(self, outcome: str, response_time: Optional[float] = None):
+        if self.proxy and self.engine.proxies is not None:
+            await self.engine.proxies.areport(self.proxy, outcome, response_time)
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """
+        HTML страницы или None (прокси при этом заменён, задачу нужно повторить).
+        4xx кроме 429 — PageGone: ответ окончательный.
+        """
+        await self.engine.scheduler.wait(self)
+        started = time.monotonic()
+        try:
+            response = await self.client.get(url)
+        except httpx.HTTPError as e:
+            print(f"[lane {self.idx}] {type(e).__name__} via {proxy_label(self.proxy)}: {url}")
+            await self._report("failure")
+            await self._bind_or_stop()
+            return None
+
+        if response.status_code == 429:
+            print(f"[lane {self.idx}] 429 Too Many Requests via {proxy_label(self.proxy)}: {url}")
+            self.engine.scheduler.on_429()
+            await self._report("ban")
+            await self._bind_or_stop()
+            return None
+        if 400 <= response.status_code < 500:
+            raise PageGone(response.status_code)
+        if response.status_code >= 400:
+            print(f"[lane {self.idx}] HTTP {response.status_code}: {url}")
+            return None
+
+        self.engine.scheduler.on_success()
+        await self._report("success", round(time.monotonic() - started, 3))
+        return response.text
+
+    async def _bind_or_stop(self):
+        if not await self._bind():
+            print(f"[lane {self.idx}] No proxy from proxy-service for {LEASE_WAIT:.0f}s, lane stopped")
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+class ParallelEngine:
+    def __init__(self, brands: List[str], proxies: Optional[ProxyLeaseClient], lanes: int,
+                 use_db: bool = True, resume: bool = True, max_models: Optional[int] = None,
+                 save_json: bool = True, incremental: bool = False,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        # Экземпляр парсера — только для разбора HTML, cookies и заголовков (без БД и прокси)
+        self.parser = gsm.GSMArenaParser(use_db=False, use_proxy=False)
+        self.headers = dict(self.parser.session.headers)
+        self.cookies = {c.name: c.value for c in self.parser.session.cookies}
+        self.transport = transport
+
+        self.proxies = proxies
+        self.lane_count = lanes
+        self.scheduler = Scheduler()
+        self.db = DBWriter() if use_db and ThreadedConnectionPool else None
+        self.incremental = incremental and self.db is not None
+        self.resume = resume and self.db is not None and not self.incremental
+        self.max_models = max_models
+        self.save_json = save_json
+
+        self.brands: Dict[str, BrandState] = {b.lower(): BrandState(code=b.lower()) for b in brands}
+        self.lanes: List[Lane] = []
+        self.queue: Optional[asyncio.Queue] = None
+        self.failed_jobs: List[Job] = []
+        self.alive = 0
+        self.started = time.time()
+
+    # ── обработчики задач ──
+
+    async def _handle_makers(self, html: str):
+        found = {b['code'].lower(): b for b in self.parser.parse_brands(html)}
+        for code, state in self.brands.items():
+            brand = found.get(code)
+            if not brand:
+                print(f"Brand '{code}' not found")
+                state.listing_done = True
+                continue
+            state.name, state.url = brand['name'], brand['url']
+            self.queue.put_nowait(Job('brand', brand['url'], brand=code))
+
+    async def _handle_brand_page(self, job: Job, html: str):
+        state = self.brands[job.brand]
+        models, has_next = self.parser.parse_models_page(html, state.name, job.page)
+        print(f"[{state.code}] Page {job.page}: {len(models)} models")
+
+        if self.resume and models:
+            if state.existing is None:
+                state.existing = await self.db.existing_models(state.name)
+            fresh = [m for m in models if m['name'] not in state.existing]
+            state.skipped += len(models) - len(fresh)
+            models = fresh
+
+        if self.incremental and models:
+            if not state.page_states:
+                state.page_states = await self.db.page_states(state.name)
+            now = datetime.now()
+            due = [m for m in models if gsm.is_check_due(state.page_states.get(m['url']), now)]
+            state.skipped += len(models) - len(due)
+            models = due
+
+        for model in models:
+            if self.max_models and state.found >= self.max_models:
+                has_next = False
+                break
+            state.found += 1
+            state.pending += 1
+            self.queue.put_nowait(Job('model', model['url'], brand=job.brand, model=model))
+
+        next_url = gsm.GSMArenaParser.brand_page_url(state.url, job.page + 1) if has_next else None
+        if next_url:
+            self.queue.put_nowait(Job('brand', next_url, brand=job.brand, page=job.page + 1))
         else:
-            if (i + 1) % 20 == 0:
-                print(f"  Tested {i+1}...")
+            state.listing_done = True
+            self._maybe_finish(state)
+
+    async def _handle_model(self, job: Job, html: str):
+        state = self.brands[job.brand]
+        page_hash = gsm.page_fingerprint(html)
+        known = state.page_states.get(job.url)
+        if self.incremental and known and known['page_hash'] == page_hash:
+            state.unchanged += 1
+            await self.db.add(None, (job.url, state.name, job.model['name'], page_hash,
+                                     known['release_status'], known['release_year']))
+            self._model_done(state)
+            return
+
+        specs = self.parser.parse_model_specs(html, job.url, job.model['name'])
+        specs['brand'] = state.name
+        state.parsed += 1
+        if self.save_json:
+            state.results.append(specs)
+        if self.db:
+            row = self.parser.specs_to_db_row(specs, state.name, job.model.get('gsmarena_id'))
+            await self.db.add(row, (job.url, state.name, job.model['name'], page_hash,
+                                    row['release_status'], row['release_year']))
+        self._model_done(state)
+
+    def _model_done(self, state: BrandState):
+        state.pending -= 1
+        self._maybe_finish(state)
+
+    def _maybe_finish(self, state: BrandState):
+        if not state.listing_done or state.pending:
+            return
+        if self.save_json and state.results:
+            self.parser._save_json(state.results, state.code)
+            state.results = []
+        skipped = "not due" if self.incremental else "resume"
+        print(f"\nCompleted {state.name or state.code}: {state.parsed} models parsed, "
+              f"{state.unchanged} unchanged, {state.skipped} skipped ({skipped}), {state.failed} failed")
+
+    def _give_up(self, job: Job):
+        self.failed_jobs.append(job)
+        print(f"Failed after {job.attempts} attempts: {job.url}")
+        if job.kind == 'model':
+            state = self.brands[job.brand]
+            state.failed += 1
+            self._model_done(state)
+        elif job.kind == 'brand':
+            state = self.brands[job.brand]
+            state.listing_done = True
+            self._maybe_finish(state)
+        else:
+            for state in self.brands.values():
+                state.listing_done = True
 
-    return working
+    # ── полосы ──
+
+    async def _lane_loop(self, lane: Lane):
+        # Полоса работает, пока у неё есть прокси
+        while lane.client is not None:
+            job = await self.queue.get()
+            try:
+                lane.current = job.url
+                job.attempts += 1
+                html = await lane.fetch(job.url)
+                if html is None:
+                    if job.attempts < JOB_ATTEMPTS:
+                        self.queue.put_nowait(job)
+                    else:
+                        self._give_up(job)
+                    continue
+
+                if job.kind == 'makers':
+                    await self._handle_makers(html)
+                elif job.kind == 'brand':
+                    await self._handle_brand_page(job, html)
+                else:
+                    await self._handle_model(job, html)
+                lane.done += 1
+            except PageGone as e:
+                print(f"[lane {lane.idx}] {e}, not retried: {job.url}")
+                self._give_up(job)
+            except Exception as e:
+                print(f"[lane {lane.idx}] Error on {job.url}: {e}")
+                self._give_up(job)
+            finally:
+                lane.current = ""
+                self.queue.task_done()
+
+        self.alive -= 1
+        if self.alive == 0:
+            # Последняя полоса осталась без прокси — оставшиеся задачи не выполнить
+            while not self.queue.empty():
+                self._give_up(self.queue.get_nowait())
+                self.queue.task_done()
+
+    async def _progress_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.print_progress()
+
+    def print_progress(self):
+        elapsed = time.time() - self.started
+        found = sum(s.found for s in self.brands.values())
+        parsed = sum(s.parsed for s in self.brands.values())
+        rate = parsed / elapsed * 60 if elapsed else 0
+        busy = sum(1 for lane in self.lanes if lane.current)
+        if self.proxies is not None:
+            st = self.proxies.stats
+            proxies = f", proxies leased {st['leased']} (bans {st['ban']}, failures {st['failure']})"
+        else:
+            proxies = ""
+        print(f"[progress] {elapsed/60:.1f} min | models {parsed}/{found} ({rate:.1f}/min) | "
+              f"lanes busy {busy}/{len(self.lanes)} | queue {self.queue.qsize()} | "
+              f"429: {self.scheduler.hits_429}, slowdown x{self.scheduler.slowdown:.1f}{proxies}")
+        for state in self.brands.values():
+            if state.found or state.parsed:
+                print(f"    {state.code:<10} {state.parsed}/{state.found}"
+                      f"{' listing...' if not state.listing_done else ''}")
+
+    async def run(self, progress_interval: float = PROGRESS_INTERVAL):
+        self.queue = asyncio.Queue()
+        self.queue.put_nowait(Job('makers', f"{gsm.BASE_URL}/makers.php3"))
+        self.lanes = [Lane(i + 1, self) for i in range(self.lane_count)]
+        for lane in self.lanes:
+            if not await lane._bind():
+                break
+            print(f"  lane {lane.idx} -> {proxy_label(lane.proxy)}")
+
+        workers = [asyncio.create_task(self._lane_loop(lane)) for lane in self.lanes if lane.client]
+        self.alive = len(workers)
+        if not workers:
+            print("Error: no proxies available")
+            return
+        progress = asyncio.create_task(self._progress_loop(progress_interval))
+        try:
+            await self.queue.join()
+        finally:
+            for task in workers + [progress]:
+                task.cancel()
+            await asyncio.gather(*workers, progress, return_exceptions=True)
+            for lane in self.lanes:
+                await lane.close()
+            if self.proxies is not None:
+                await self.proxies.aclose()
+            if self.db:
+                await self.db.flush()
+                print(f"Saved to DB: {self.db.saved} rows")
+                self.db.close()
+        self.print_progress()
 
 
 def main():
     import argparse
     ap = argparse.ArgumentParser(description='Parallel GSMArena Parser')
     ap.add_argument('--brands', '-b', nargs='+', default=BRANDS, help='Brands to parse')
-    ap.add_argument('--test-proxies', '-t', action='store_true', help='Test proxies first')
-    ap.add_argument('--proxy-timeout', type=int, default=10, help='Proxy test timeout')
+    ap.add_argument('--lanes', '-n', type=int, default=None, help='Parallel lanes (default: one per brand)')
+    ap.add_argument('--proxy-service', default=PROXY_SERVICE_URL, help='proxy-service URL')
+    ap.add_argument('--no-proxy', action='store_true', help='Direct connection (single lane)')
+    ap.add_argument('--no-db', action='store_true', help='Disable database saving')
+    ap.add_argument('--no-resume', action='store_true', help='Re-parse models already in DB')
+    ap.add_argument('--incremental', '-i', action='store_true',
+                    help='Re-check only models that are due, skip unchanged pages (page hash)')
+    ap.add_argument('--max', '-m', type=int, help='Max models per brand')
+    ap.add_argument('--progress', type=float, default=PROGRESS_INTERVAL, help='Progress interval, sec')
     args = ap.parse_args()
 
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
     brands = args.brands
-    num_brands = len(brands)
+    lanes = args.lanes or len(brands)
 
     print(f"=" * 60)
     print(f"Parallel GSMArena Parser")
@@ -124,65 +513,30 @@ def main():
     print(f"Brands: {', '.join(brands)}")
     print()
 
-    # Загружаем прокси
-    if not os.path.exists('proxies.txt'):
-        print("Error: proxies.txt not found! Run proxy_generator.py first.")
-        sys.exit(1)
-
-    with open('proxies.txt', 'r') as f:
-        all_proxies = [line.strip() for line in f if line.strip()]
-
-    print(f"Total proxies available: {len(all_proxies)}")
-
-    # Опционально тестируем прокси
-    if args.test_proxies:
-        working_proxies = find_working_proxies(all_proxies, count=num_brands, timeout=args.proxy_timeout)
-        if len(working_proxies) < num_brands:
-            print(f"\nWarning: Only found {len(working_proxies)} working proxies, need {num_brands}")
-            brands = brands[:len(working_proxies)]
+    proxies = None
+    if args.no_proxy:
+        lanes = 1
     else:
-        # Берём первые N прокси без теста
-        working_proxies = all_proxies[:num_brands * 5]  # Берём с запасом
-
-    # Распределяем прокси по брендам
-    tasks = []
-    for i, brand in enumerate(brands):
-        proxy_idx = i % len(working_proxies)
-        tasks.append((brand, working_proxies[proxy_idx]))
-
-    print(f"\nStarting {len(tasks)} parallel parsers:")
-    for brand, proxy in tasks:
-        print(f"  {brand} -> {proxy}")
-    print()
-
-    start_time = time.time()
-    results = []
+        # Прокси арендуются у proxy-service (проверка и учёт банов — на стороне сервиса)
+        proxies = ProxyLeaseClient(base_url=args.proxy_service)
 
-    # Запускаем параллельно
-    with ProcessPoolExecutor(max_workers=len(tasks)) as executor:
-        futures = {
-            executor.submit(parse_brand_with_proxy, task): task[0]
-            for task in tasks
-        }
-
-        for future in as_completed(futures):
-            brand = futures[future]
-            try:
-                result = future.result()
-                results.append(result)
-                print(f"[{brand}] Finished")
-            except Exception as e:
-                print(f"[{brand}] Exception: {e}")
+    print(f"\nStarting {lanes} lanes:")
+    engine = ParallelEngine(brands, proxies, lanes, use_db=not args.no_db,
+                            resume=not args.no_resume, max_models=args.max,
+                            incremental=args.incremental)
+    asyncio.run(engine.run(progress_interval=args.progress))
 
     # Итоги
-    elapsed = time.time() - start_time
+    elapsed = time.time() - engine.started
     print()
     print(f"=" * 60)
     print(f"COMPLETED in {elapsed/60:.1f} minutes")
     print(f"=" * 60)
 
-    success = sum(1 for _, _, ok, _ in results if ok)
+    success = sum(1 for s in engine.brands.values() if s.listing_done and s.name and not s.failed)
     print(f"Success: {success}/{len(brands)}")
+    if engine.failed_jobs:
+        print(f"Failed pages: {len(engine.failed_jobs)}")
 
 
 if __name__ == '__main__':
@@ -16,7 +16,8 @@ import re
 import os
 import sys
 import argparse
-from datetime import datetime
+import hashlib
+from datetime import datetime, timedelta
 
 # Fix encoding for Windows
 if sys.platform == 'win32':
@@ -25,7 +26,7 @@ if sys.platform == 'win32':
 
 try:
     import psycopg2
-    from psycopg2.extras import Json
+    from psycopg2.extras import Json, execute_values
     HAS_PSYCOPG2 = True
 except ImportError:
     HAS_PSYCOPG2 = False
@@ -39,7 +40,6 @@ BASE_URL = "https://www.gsmarena.com"
 DELAY_MIN = 1.5
 DELAY_MAX = 3.0
 OUTPUT_DIR = "output"
-PROXIES_FILE = "proxies.txt"
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -51,6 +51,7 @@ HEADERS = {
 # Database config (Supabase)
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from db_config import get_db_config
+from proxy_client import LEASE_WAIT, ProxyLeaseClient, proxy_label, proxy_url
 DB_CONFIG = get_db_config()
 
 # Target brands
@@ -62,6 +63,99 @@ TARGET_BRANDS = [
 ]
 
 
+# Upsert query (zip_gsmarena_raw)
+_UPSERT_INSERT = """
+INSERT INTO zip_gsmarena_raw (
+    brand, model_name, model_url, image_url, gsmarena_id,
+    announced, release_status, release_year,
+    dimensions, weight, weight_grams, build, sim, ip_rating,
+    display_type, display_size, display_size_inches, display_resolution, display_protection, refresh_rate,
+    os, chipset, cpu, gpu,
+    ram, storage, card_slot,
+    main_camera_mp, main_camera_setup, main_camera_features, main_camera_video,
+    selfie_camera_mp, selfie_camera_setup, selfie_camera_video,
+    battery_capacity, battery_capacity_mah, battery_type, charging_wired, charging_wireless,
+    network_technology, network_2g, network_3g, network_4g, network_5g,
+    wlan, bluetooth, nfc, gps, usb, radio,
+    loudspeaker, audio_jack, sensors,
+    colors, models_list, price, price_eur,
+    eu_energy_class, eu_battery_endurance, eu_repairability,
+    specs_json, parsed_at, updated_at
+)"""
+
+# Шаблон строки: для execute_values в пакетном режиме
+UPSERT_ROW_TEMPLATE = """(
+    %(brand)s, %(model_name)s, %(model_url)s, %(image_url)s, %(gsmarena_id)s,
+    %(announced)s, %(release_status)s, %(release_year)s,
+    %(dimensions)s, %(weight)s, %(weight_grams)s, %(build)s, %(sim)s, %(ip_rating)s,
+    %(display_type)s, %(display_size)s, %(display_size_inches)s, %(display_resolution)s, %(display_protection)s, %(refresh_rate)s,
+    %(os)s, %(chipset)s, %(cpu)s, %(gpu)s,
+    %(ram)s, %(storage)s, %(card_slot)s,
+    %(main_camera_mp)s, %(main_camera_setup)s, %(main_camera_features)s, %(main_camera_video)s,
+    %(selfie_camera_mp)s, %(selfie_camera_setup)s, %(selfie_camera_video)s,
+    %(battery_capacity)s, %(battery_capacity_mah)s, %(battery_type)s, %(charging_wired)s, %(charging_wireless)s,
+    %(network_technology)s, %(network_2g)s, %(network_3g)s, %(network_4g)s, %(network_5g)s,
+    %(wlan)s, %(bluetooth)s, %(nfc)s, %(gps)s, %(usb)s, %(radio)s,
+    %(loudspeaker)s, %(audio_jack)s, %(sensors)s,
+    %(colors)s, %(models_list)s, %(price)s, %(price_eur)s,
+    %(eu_energy_class)s, %(eu_battery_endurance)s, %(eu_repairability)s,
+    %(specs_json)s, NOW(), NOW()
+)"""
+
+_UPSERT_CONFLICT = """
+ON CONFLICT (brand, model_name) DO UPDATE SET
+    model_url = EXCLUDED.model_url,
+    image_url = EXCLUDED.image_url,
+    announced = EXCLUDED.announced,
+    release_status = EXCLUDED.release_status,
+    release_year = EXCLUDED.release_year,
+    dimensions = EXCLUDED.dimensions,
+    weight = EXCLUDED.weight,
+    weight_grams = EXCLUDED.weight_grams,
+    display_type = EXCLUDED.display_type,
+    display_size = EXCLUDED.display_size,
+    display_size_inches = EXCLUDED.display_size_inches,
+    chipset = EXCLUDED.chipset,
+    battery_capacity_mah = EXCLUDED.battery_capacity_mah,
+    colors = EXCLUDED.colors,
+    price = EXCLUDED.price,
+    price_eur = EXCLUDED.price_eur,
+    specs_json = EXCLUDED.specs_json,
+    updated_at = NOW()
+"""
+
+UPSERT_SQL = _UPSERT_INSERT + " VALUES " + UPSERT_ROW_TEMPLATE + _UPSERT_CONFLICT
+UPSERT_BATCH_SQL = _UPSERT_INSERT + " VALUES %s" + _UPSERT_CONFLICT
+
+# Incremental mode: хэш страницы модели + когда проверяли
+PAGE_STATE_MIGRATION = "sql/migrations/026_gsmarena_page_state.sql"
+
+PAGE_STATE_UPSERT_SQL = """
+    INSERT INTO zip_gsmarena_page_state
+        (model_url, brand, model_name, page_hash, release_status, release_year, checked_at, changed_at)
+    VALUES %s
+    ON CONFLICT (model_url) DO UPDATE SET
+        brand = EXCLUDED.brand,
+        model_name = EXCLUDED.model_name,
+        page_hash = EXCLUDED.page_hash,
+        release_status = EXCLUDED.release_status,
+        release_year = EXCLUDED.release_year,
+        checked_at = NOW(),
+        changed_at = CASE
+            WHEN zip_gsmarena_page_state.page_hash IS DISTINCT FROM EXCLUDED.page_hash THEN NOW()
+            ELSE zip_gsmarena_page_state.changed_at
+        END
+"""
+PAGE_STATE_TEMPLATE = "(%s, %s, %s, %s, %s, %s, NOW(), NOW())"
+
+# Как часто перепроверять страницу модели (дней)
+RECHECK_DAYS_UPCOMING = 1   # Rumored / Coming soon / без статуса
+RECHECK_DAYS_RECENT = 7     # Вышли в этом или прошлом году
+RECHECK_DAYS_OLD = 30       # Всё остальное (Discontinued, Cancelled, старые)
+BATCH_SIZE = 50             # Строк в одном multi-row UPSERT
+
+
+
 # ============================================================================
 # Helper functions
 # ============================================================================
@@ -123,6 +217,89 @@ def extract_camera_mp(text):
     return match.group(1) + " MP" if match else None
 
 
+def page_fingerprint(html):
+    """
+    SHA1 таблиц характеристик и главного фото (без DOM — регулярками).
+    Счётчики просмотров, реклама и комментарии на хэш не влияют.
+    """
+    parts = re.findall(r'<table cellspacing="0".*?</table>', html, re.S)
+    photo = re.search(r'<div class="specs-photo-main">.*?</div>', html, re.S)
+    if photo:
+        parts.append(photo.group())
+    content = '\n'.join(parts) if parts else html
+    return hashlib.sha1(content.encode('utf-8', errors='replace')).hexdigest()
+
+
+def recheck_days(release_status, release_year):
+    """Интервал перепроверки: анонсированные и слухи — часто, старые модели — редко"""
+    status = (release_status or '').lower()
+    if not status or 'coming soon' in status or 'rumored' in status:
+        return RECHECK_DAYS_UPCOMING
+    if release_year and release_year >= datetime.now().year - 1 and 'discontinued' not in status:
+        return RECHECK_DAYS_RECENT
+    return RECHECK_DAYS_OLD
+
+
+def is_check_due(state, now=None):
+    """Пора ли скачивать страницу модели (state — запись zip_gsmarena_page_state или None)"""
+    if not state:
+        return True
+    now = now or datetime.now()
+    return now - state['checked_at'] >= timedelta(days=recheck_days(state['release_status'], state['release_year']))
+
+
+def check_page_state_table(conn):
+    """Таблица создаётся миграцией, здесь — только проверка наличия"""
+    cur = conn.cursor()
+    cur.execute("SELECT to_regclass('zip_gsmarena_page_state')")
+    exists = cur.fetchone()[0] is not None
+    cur.close()
+    conn.commit()
+    if not exists:
+        raise RuntimeError(f"zip_gsmarena_page_state not found: apply {PAGE_STATE_MIGRATION}")
+
+
+def load_page_states(conn, brand_name):
+    """model_url -> {page_hash, release_status, release_year, checked_at}"""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT model_url, page_hash, release_status, release_year, checked_at
+        FROM zip_gsmarena_page_state WHERE brand = %s
+    """, (brand_name,))
+    states = {
+        url: {'page_hash': h, 'release_status': status, 'release_year': year, 'checked_at': checked}
+        for url, h, status, year, checked in cur.fetchall()
+    }
+    cur.close()
+    conn.commit()
+    return states
+
+
+def write_batch(conn, rows, checks):
+    """
+    Один коммит: multi-row UPSERT изменившихся моделей + отметки проверки.
+    rows — строки specs_to_db_row, checks — (model_url, brand, model_name, page_hash, status, year).
+    """
+    cur = conn.cursor()
+    try:
+        if rows:
+            # В одном INSERT ... ON CONFLICT ключ не должен повторяться
+            unique = {(r['brand'], r['model_name']): r for r in rows}
+            execute_values(cur, UPSERT_BATCH_SQL,
+                           [{**r, 'specs_json': Json(r['specs_json'])} for r in unique.values()],
+                           template=UPSERT_ROW_TEMPLATE, page_size=BATCH_SIZE)
+        if checks:
+            unique_checks = {c[0]: c for c in checks}
+            execute_values(cur, PAGE_STATE_UPSERT_SQL, list(unique_checks.values()),
+                           template=PAGE_STATE_TEMPLATE, page_size=BATCH_SIZE * 4)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
 # ============================================================================
 # Parser Class
 # ============================================================================
@@ -134,9 +311,11 @@ class GSMArenaParser:
         self.use_db = use_db and HAS_PSYCOPG2
         self.conn = None
         self.use_proxy = use_proxy
+        self.proxy_client = None
         self.current_proxy = None
         self.proxy_switch_count = 0
         self.resume_mode = False
+        self.incremental = False
         os.makedirs(OUTPUT_DIR, exist_ok=True)
 
         # Load cookies if available
@@ -150,103 +329,16 @@ class GSMArenaParser:
             self._connect_db()
 
     def _load_proxies(self):
-        """Load working proxies from database"""
-        if not HAS_PSYCOPG2:
-            print("Warning: psycopg2 not installed, proxy from DB disabled")
-            self.use_proxy = False
-            return
-
-        try:
-            conn = psycopg2.connect(**DB_CONFIG)
-            cur = conn.cursor()
-            cur.execute("""
-                SELECT COUNT(*) FROM zip_proxies WHERE status = 'working'
-            """)
-            count = cur.fetchone()[0]
-            conn.close()
-
-            if count > 0:
-                print(f"[PROXY] Found {count} working proxies in database")
-                self.current_proxy = None
-                self.proxy_switch_count = 0
-            else:
-                print("[PROXY] No working proxies in database! Run proxy_checker.py first")
-                self.use_proxy = False
-        except Exception as e:
-            print(f"[PROXY] Error connecting to proxy DB: {e}")
-            self.use_proxy = False
-
-    def _get_working_proxy_from_db(self):
-        """Get one working proxy from database and mark it as 'used'"""
-        try:
-            conn = psycopg2.connect(**DB_CONFIG)
-            conn.autocommit = True
-            cur = conn.cursor()
-
-            # Get working proxy NOT banned for gsmarena, prefer least recently used
-            cur.execute("""
-                UPDATE zip_proxies
-                SET status = 'used', last_used_at = NOW()
-                WHERE proxy = (
-                    SELECT proxy FROM zip_proxies
-                    WHERE status = 'working'
-                      AND NOT ('gsmarena' = ANY(banned_sites))
-                    ORDER BY last_used_at NULLS FIRST, success_count DESC
-                    LIMIT 1
-                    FOR UPDATE SKIP LOCKED
-                )
-                RETURNING proxy
-            """)
-
-            row = cur.fetchone()
-            conn.close()
-
-            if row:
-                return row[0]
-            return None
-        except Exception as e:
-            print(f"[PROXY] Error getting proxy from DB: {e}")
-            return None
+        """Lease proxies from proxy-service (checking and scoring is done there)"""
+        self.proxy_client = ProxyLeaseClient()
+        print(f"[PROXY] Leasing proxies from proxy-service: {self.proxy_client.base_url}")
 
-    def _return_proxy_to_pool(self, proxy, success=True, banned=False):
-        """Return proxy to pool after use"""
-        if not proxy:
-            return
-        try:
-            conn = psycopg2.connect(**DB_CONFIG)
-            conn.autocommit = True
-            cur = conn.cursor()
-
-            if success:
-                # Return to working pool
-                cur.execute("""
-                    UPDATE zip_proxies
-                    SET status = 'working', success_count = success_count + 1
-                    WHERE proxy = %s
-                """, (proxy,))
-            elif banned:
-                # Banned by this site (429) - add to banned_sites, but keep working for others
-                cur.execute("""
-                    UPDATE zip_proxies
-                    SET banned_sites = array_append(banned_sites, %s),
-                        status = CASE
-                            WHEN array_length(array_append(banned_sites, %s), 1) >= 5 THEN 'banned'
-                            ELSE 'working'
-                        END
-                    WHERE proxy = %s AND NOT (%s = ANY(banned_sites))
-                """, ('gsmarena', 'gsmarena', proxy, 'gsmarena'))
-                print(f"[PROXY] Marked as banned for gsmarena: {proxy}")
-            else:
-                # Connection error - mark as dead
-                cur.execute("""
-                    UPDATE zip_proxies
-                    SET status = 'dead', fail_count = fail_count + 1
-                    WHERE proxy = %s
-                """, (proxy,))
-
-            conn.close()
-        except Exception as e:
-            print(f"[PROXY] Error returning proxy: {e}")
+    def _lease_proxy(self):
+        """Lease next proxy (from local prefetch buffer)"""
+        proxy = self.proxy_client.lease()
+        if proxy:
+            print(f"[PROXY] Using: {proxy_label(proxy)}")
+        return proxy
 
     def _get_current_proxy(self):
         """Get current proxy dict for requests"""
@@ -254,32 +346,28 @@ class GSMArenaParser:
             return None
 
         if not self.current_proxy:
-            self.current_proxy = self._get_working_proxy_from_db()
-            if self.current_proxy:
-                print(f"[PROXY] Using: {self.current_proxy}")
+            self.current_proxy = self._lease_proxy()
 
         if self.current_proxy:
-            return {"http": f"http://{self.current_proxy}", "https": f"http://{self.current_proxy}"}
+            url = proxy_url(self.current_proxy)
+            return {"http": url, "https": url}
         return None
 
-    def _switch_proxy(self):
-        """Switch to next working proxy from database"""
-        # Return current proxy as failed
-        if self.current_proxy:
-            self._return_proxy_to_pool(self.current_proxy, success=False)
+    def _switch_proxy(self, banned=False):
+        """Report current proxy (failure or ban) and switch to next leased one"""
+        self.proxy_client.report(self.current_proxy, "ban" if banned else "failure")
 
         # Get new proxy
-        self.current_proxy = self._get_working_proxy_from_db()
+        self.current_proxy = self._lease_proxy()
         self.proxy_switch_count += 1
 
         if self.current_proxy:
-            print(f"[PROXY] Switched to: {self.current_proxy}")
             # Refresh cookies every 10 switches
             if self.proxy_switch_count % 10 == 0:
                 self._refresh_cookies_for_proxy()
             return True
         else:
-            print("[PROXY] No more working proxies available!")
+            print(f"[PROXY] No proxy from proxy-service for {LEASE_WAIT:.0f}s, giving up")
             return False
 
     def _refresh_cookies_for_proxy(self):
@@ -375,20 +463,17 @@ class GSMArenaParser:
                 if response.status_code == 429:
                     print(f"429 Too Many Requests for {url}")
                     if self.use_proxy and retry_on_429:
-                        # Mark as banned for gsmarena (not dead!)
-                        self._return_proxy_to_pool(self.current_proxy, success=False, banned=True)
-                        self.current_proxy = None
-                        # Get new proxy
-                        self.current_proxy = self._get_working_proxy_from_db()
-                        if self.current_proxy:
-                            print(f"[PROXY] Switched to: {self.current_proxy}")
+                        # Banned for gsmarena (not dead!) - reported with the next batch
+                        if self._switch_proxy(banned=True):
                             continue  # Retry with new proxy
                     return None
 
                 response.raise_for_status()
 
-                # Success! Keep using this proxy (don't return to pool yet)
-                # Proxy stays in 'used' status while parser is working
+                # Success! Keep using this proxy, outcome goes to proxy-service in a batch
+                if self.use_proxy:
+                    self.proxy_client.report(self.current_proxy, "success",
+                                             response_time=response.elapsed.total_seconds())
 
                 return response.text
 
@@ -422,6 +507,12 @@ class GSMArenaParser:
         if not html:
             return []
 
+        brands = self.parse_brands(html)
+        print(f"Found {len(brands)} brands")
+        return brands
+
+    def parse_brands(self, html):
+        """Parse makers.php3 page into brand dicts"""
         soup = BeautifulSoup(html, 'html.parser')
         brands = []
 
@@ -442,71 +533,77 @@ class GSMArenaParser:
                     'device_count': device_count
                 })
 
-        print(f"Found {len(brands)} brands")
         return brands
 
-    def get_brand_models(self, brand_url, brand_name, max_pages=50):
-        """Get all models for a brand"""
-        print(f"Fetching models for {brand_name}...")
-        models = []
-        page = 1
+    @staticmethod
+    def brand_page_url(brand_url, page):
+        """URL of brand models list page (None if brand URL has no id)"""
+        if page == 1:
+            return brand_url
 
         brand_id_match = re.search(r'-(\d+)\.php', brand_url)
         brand_id = brand_id_match.group(1) if brand_id_match else None
         brand_slug = brand_url.split('/')[-1].replace(f'-{brand_id}.php', '') if brand_id else None
+        if brand_slug and brand_id:
+            return f"{BASE_URL}/{brand_slug}-f-{brand_id}-0-p{page}.php"
+        return None
 
-        while page <= max_pages:
-            if page == 1:
-                url = brand_url
-            else:
-                if brand_slug and brand_id:
-                    url = f"{BASE_URL}/{brand_slug}-f-{brand_id}-0-p{page}.php"
-                else:
-                    break
-
-            html = self._get(url)
-            if not html:
-                break
-
-            soup = BeautifulSoup(html, 'html.parser')
-
-            found_on_page = 0
-            for item in soup.select('div.makers ul li'):
-                link = item.select_one('a')
-                if not link:
-                    continue
+    def parse_models_page(self, html, brand_name, page):
+        """Parse one brand models list page -> (models, has_next)"""
+        soup = BeautifulSoup(html, 'html.parser')
 
-                href = link.get('href', '')
-                name_elem = link.select_one('span')
-                img_elem = link.select_one('img')
+        models = []
+        for item in soup.select('div.makers ul li'):
+            link = item.select_one('a')
+            if not link:
+                continue
 
-                if name_elem and href:
-                    model_name = name_elem.get_text(strip=True)
-                    brief_specs = ''
-                    if img_elem:
-                        brief_specs = img_elem.get('title', '') or img_elem.get('alt', '')
+            href = link.get('href', '')
+            name_elem = link.select_one('span')
+            img_elem = link.select_one('img')
+
+            if name_elem and href:
+                model_name = name_elem.get_text(strip=True)
+                brief_specs = ''
+                if img_elem:
+                    brief_specs = img_elem.get('title', '') or img_elem.get('alt', '')
+
+                # Extract GSMArena ID from URL
+                gsm_id_match = re.search(r'-(\d+)\.php', href)
+                gsm_id = gsm_id_match.group(1) if gsm_id_match else None
+
+                models.append({
+                    'brand': brand_name,
+                    'name': model_name,
+                    'url': f"{BASE_URL}/{href}",
+                    'brief_specs': brief_specs,
+                    'gsmarena_id': gsm_id
+                })
 
-                    # Extract GSMArena ID from URL
-                    gsm_id_match = re.search(r'-(\d+)\.php', href)
-                    gsm_id = gsm_id_match.group(1) if gsm_id_match else None
+        nav_pages = soup.select('div.nav-pages a')
+        has_next = any(f'p{page+1}' in a.get('href', '') for a in nav_pages)
+        return models, has_next
 
-                    models.append({
-                        'brand': brand_name,
-                        'name': model_name,
-                        'url': f"{BASE_URL}/{href}",
-                        'brief_specs': brief_specs,
-                        'gsmarena_id': gsm_id
-                    })
-                    found_on_page += 1
+    def get_brand_models(self, brand_url, brand_name, max_pages=50):
+        """Get all models for a brand"""
+        print(f"Fetching models for {brand_name}...")
+        models = []
+        page = 1
 
-            print(f"  Page {page}: {found_on_page} models")
+        while page <= max_pages:
+            url = self.brand_page_url(brand_url, page)
+            if not url:
+                break
 
-            if found_on_page == 0:
+            html = self._get(url)
+            if not html:
                 break
 
-            nav_pages = soup.select('div.nav-pages a')
-            has_next = any(f'p{page+1}' in a.get('href', '') for a in nav_pages)
-            if not has_next:
+            page_models, has_next = self.parse_models_page(html, brand_name, page)
+            models.extend(page_models)
+            print(f"  Page {page}: {len(page_models)} models")
+
+            if not page_models or not has_next:
                 break
 
             page += 1
@@ -519,7 +616,10 @@ class GSMArenaParser:
         html = self._get(model_url)
         if not html:
             return None
+        return self.parse_model_specs(html, model_url, model_name)
 
+    def parse_model_specs(self, html, model_url, model_name):
+        """Parse model page HTML into specs dict"""
         soup = BeautifulSoup(html, 'html.parser')
         specs = {
             'name': model_name,
@@ -688,66 +788,10 @@ class GSMArenaParser:
 
         cur = self.conn.cursor()
 
-        # Upsert query
-        sql = """
-            INSERT INTO zip_gsmarena_raw (
-                brand, model_name, model_url, image_url, gsmarena_id,
-                announced, release_status, release_year,
-                dimensions, weight, weight_grams, build, sim, ip_rating,
-                display_type, display_size, display_size_inches, display_resolution, display_protection, refresh_rate,
-                os, chipset, cpu, gpu,
-                ram, storage, card_slot,
-                main_camera_mp, main_camera_setup, main_camera_features, main_camera_video,
-                selfie_camera_mp, selfie_camera_setup, selfie_camera_video,
-                battery_capacity, battery_capacity_mah, battery_type, charging_wired, charging_wireless,
-                network_technology, network_2g, network_3g, network_4g, network_5g,
-                wlan, bluetooth, nfc, gps, usb, radio,
-                loudspeaker, audio_jack, sensors,
-                colors, models_list, price, price_eur,
-                eu_energy_class, eu_battery_endurance, eu_repairability,
-                specs_json, parsed_at, updated_at
-            ) VALUES (
-                %(brand)s, %(model_name)s, %(model_url)s, %(image_url)s, %(gsmarena_id)s,
-                %(announced)s, %(release_status)s, %(release_year)s,
-                %(dimensions)s, %(weight)s, %(weight_grams)s, %(build)s, %(sim)s, %(ip_rating)s,
-                %(display_type)s, %(display_size)s, %(display_size_inches)s, %(display_resolution)s, %(display_protection)s, %(refresh_rate)s,
-                %(os)s, %(chipset)s, %(cpu)s, %(gpu)s,
-                %(ram)s, %(storage)s, %(card_slot)s,
-                %(main_camera_mp)s, %(main_camera_setup)s, %(main_camera_features)s, %(main_camera_video)s,
-                %(selfie_camera_mp)s, %(selfie_camera_setup)s, %(selfie_camera_video)s,
-                %(battery_capacity)s, %(battery_capacity_mah)s, %(battery_type)s, %(charging_wired)s, %(charging_wireless)s,
-                %(network_technology)s, %(network_2g)s, %(network_3g)s, %(network_4g)s, %(network_5g)s,
-                %(wlan)s, %(bluetooth)s, %(nfc)s, %(gps)s, %(usb)s, %(radio)s,
-                %(loudspeaker)s, %(audio_jack)s, %(sensors)s,
-                %(colors)s, %(models_list)s, %(price)s, %(price_eur)s,
-                %(eu_energy_class)s, %(eu_battery_endurance)s, %(eu_repairability)s,
-                %(specs_json)s, NOW(), NOW()
-            )
-            ON CONFLICT (brand, model_name) DO UPDATE SET
-                model_url = EXCLUDED.model_url,
-                image_url = EXCLUDED.image_url,
-                announced = EXCLUDED.announced,
-                release_status = EXCLUDED.release_status,
-                release_year = EXCLUDED.release_year,
-                dimensions = EXCLUDED.dimensions,
-                weight = EXCLUDED.weight,
-                weight_grams = EXCLUDED.weight_grams,
-                display_type = EXCLUDED.display_type,
-                display_size = EXCLUDED.display_size,
-                display_size_inches = EXCLUDED.display_size_inches,
-                chipset = EXCLUDED.chipset,
-                battery_capacity_mah = EXCLUDED.battery_capacity_mah,
-                colors = EXCLUDED.colors,
-                price = EXCLUDED.price,
-                price_eur = EXCLUDED.price_eur,
-                specs_json = EXCLUDED.specs_json,
-                updated_at = NOW()
-        """
-
         try:
             # Convert specs_json to Json type
             row['specs_json'] = Json(row['specs_json'])
-            cur.execute(sql, row)
+            cur.execute(UPSERT_SQL, row)
             self.conn.commit()
             return True
         except Exception as e:
@@ -778,6 +822,9 @@ class GSMArenaParser:
         if max_models:
             models = models[:max_models]
 
+        if self.incremental and self.use_db:
+            return self._parse_models_incremental(brand, models, brand_code, save_json)
+
         results = []
         saved_count = 0
 
@@ -809,6 +856,66 @@ class GSMArenaParser:
         print(f"\nCompleted {brand['name']}: {len(results)} models parsed, {saved_count} saved to DB")
         return results
 
+    def _parse_models_incremental(self, brand, models, brand_code, save_json=True):
+        """
+        Incremental mode: скачиваются только модели, которым пора на перепроверку,
+        страница с тем же хэшем не разбирается и не пишется, изменившиеся строки
+        уходят в БД пачками по BATCH_SIZE.
+        """
+        check_page_state_table(self.conn)
+        states = load_page_states(self.conn, brand['name'])
+        now = datetime.now()
+        due = [m for m in models if is_check_due(states.get(m['url']), now)]
+        print(f"Incremental: {len(due)} of {len(models)} models due for re-check")
+
+        results = []
+        rows, checks = [], []
+        saved_count = unchanged = 0
+
+        def flush():
+            nonlocal saved_count
+            if not rows and not checks:
+                return
+            try:
+                write_batch(self.conn, rows, checks)
+                saved_count += len(rows)
+            except Exception as e:
+                print(f"Database error: {e}")
+            rows.clear()
+            checks.clear()
+
+        for i, model in enumerate(due):
+            html = self._get(model['url'])
+            if not html:
+                continue
+
+            page_hash = page_fingerprint(html)
+            state = states.get(model['url'])
+            if state and state['page_hash'] == page_hash:
+                unchanged += 1
+                checks.append((model['url'], brand['name'], model['name'], page_hash,
+                               state['release_status'], state['release_year']))
+            else:
+                print(f"[{i+1}/{len(due)}] Changed: {model['name']}")
+                specs = self.parse_model_specs(html, model['url'], model['name'])
+                specs['brand'] = brand['name']
+                results.append(specs)
+                row = self.specs_to_db_row(specs, brand['name'], model.get('gsmarena_id'))
+                rows.append(row)
+                checks.append((model['url'], brand['name'], model['name'], page_hash,
+                               row['release_status'], row['release_year']))
+
+            if len(rows) >= BATCH_SIZE or len(checks) >= BATCH_SIZE * 4:
+                flush()
+        flush()
+
+        if save_json and results:
+            self._save_json(results, f"{brand_code}_changed")
+
+        print(f"\nCompleted {brand['name']}: {len(due)} checked, {unchanged} unchanged, "
+              f"{len(results)} changed, {saved_count} saved to DB")
+        return results
+
     def _save_json(self, results, name):
         """Save results to JSON file"""
         filepath = os.path.join(OUTPUT_DIR, f"{name}_{datetime.now().strftime('%Y%m%d')}.json")
@@ -832,11 +939,10 @@ class GSMArenaParser:
         print('='*60)
 
     def close(self):
-        """Close database connection and release proxy"""
-        # Release proxy back to pool
-        if self.use_proxy and self.current_proxy:
-            self._return_proxy_to_pool(self.current_proxy, success=True)
-            print(f"[PROXY] Released: {self.current_proxy}")
+        """Close database connection and send pending proxy reports"""
+        if self.proxy_client:
+            self.proxy_client.close()
+            print(f"[PROXY] Reports sent: {self.proxy_client.stats['reports_sent']}")
             self.current_proxy = None
 
         if self.conn:
@@ -855,13 +961,16 @@ def main():
     parser_args.add_argument('--max', '-m', type=int, help='Max models per brand')
     parser_args.add_argument('--no-db', action='store_true', help='Disable database saving')
     parser_args.add_argument('--list-brands', '-l', action='store_true', help='List all available brands')
-    parser_args.add_argument('--proxy', '-p', action='store_true', help='Use proxy rotation (requires proxies.txt)')
+    parser_args.add_argument('--proxy', '-p', action='store_true', help='Use proxy rotation (leased from proxy-service)')
     parser_args.add_argument('--resume', '-r', action='store_true', help='Resume: skip already parsed models')
+    parser_args.add_argument('--incremental', '-i', action='store_true',
+                             help='Re-check only models that are due, skip unchanged pages (page hash), batch upserts')
 
     args = parser_args.parse_args()
 
     gsm_parser = GSMArenaParser(use_db=not args.no_db, use_proxy=args.proxy)
     gsm_parser.resume_mode = args.resume
+    gsm_parser.incremental = args.incremental
 
     try:
         if args.list_brands:
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Клиент proxy-service для GSMArena
+- Прокси арендуются у proxy-service (GET /proxy/get?for_site=gsmarena), поиск и проверку
+  прокси делает сервис для всего пула — локальных чекеров больше нет
+- Небольшой локальный буфер (prefetch): следующий прокси уже получен, когда текущий забанят
+- Результаты (success / failure / ban) копятся и отправляются пачкой (POST /proxy/report/batch)
+- Пустой ответ / недоступность proxy-service часто временные (сервис перепроверяет пул) —
+  lease() повторяет запрос с нарастающей паузой до LEASE_WAIT сек и только потом отдаёт None
+
+Синхронный интерфейс — для parser.py (requests), асинхронный — для parallel_parse.py (httpx):
+    client = ProxyLeaseClient()
+    proxy = client.lease()                  # {"host", "port", "protocol", ...} или None
+    client.report(proxy, "ban")             # success | failure | ban
+    client.close()                          # отправить оставшиеся отчёты
+
+    proxy = await client.alease()
+    await client.areport(proxy, "success", response_time=0.8)
+    await client.aclose()
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import httpx
+
+PROXY_SERVICE_URL = os.environ.get("PROXY_SERVICE_URL", "http://localhost:8110")
+SITE = "gsmarena"
+PREFETCH = 3             # Сколько прокси держать наготове
+REPORT_BATCH = 25        # Отчётов в одной пачке
+REPORT_INTERVAL = 10.0   # Отправлять накопленное не реже, сек
+LEASE_TIMEOUT = 60       # proxy-service проверяет прокси перед выдачей — это не мгновенно
+LEASE_WAIT = float(os.environ.get("PROXY_LEASE_WAIT", 300))  # Сколько ждать прокси, прежде чем сдаться, сек
+LEASE_BACKOFF = 2.0      # Первая пауза между повторами, сек (дальше удваивается)
+LEASE_BACKOFF_MAX = 30.0
+
+OUTCOMES = ("success", "failure", "ban")
+
+
+def proxy_label(proxy: Optional[Dict]) -> str:
+    return f"{proxy['host']}:{proxy['port']}" if proxy else "direct"
+
+
+def proxy_url(proxy: Dict) -> str:
+    """URL прокси для requests / httpx"""
+    return f"{proxy.get('protocol', 'http')}://{proxy['host']}:{proxy['port']}"
+
+
+class ProxyLeaseClient:
+    def __init__(self, base_url: str = PROXY_SERVICE_URL, for_site: str = SITE, protocol: str = "http",
+                 prefetch: int = PREFETCH, report_batch: int = REPORT_BATCH,
+                 transport: Optional[httpx.BaseTransport] = None,
+                 async_transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url.rstrip("/")
+        self.for_site = for_site
+        self.protocol = protocol
+        self.prefetch = max(1, prefetch)
+        self.report_batch = report_batch
+        self._transport = transport
+        self._async_transport = async_transport
+
+        self._buffer = deque()
+        self._pending: List[Dict] = []
+        self._last_flush = time.monotonic()
+        self._batch_supported = True
+        self._client: Optional[httpx.Client] = None
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._refill_task: Optional[asyncio.Task] = None
+
+        self.stats = {"leased": 0, "success": 0, "failure": 0, "ban": 0, "reports_sent": 0, "empty": 0}
+
+    # ── общая часть ──
+
+    @property
+    def _lease_params(self) -> Dict:
+        return {"protocol": self.protocol, "for_site": self.for_site}
+
+    def _take(self) -> Optional[Dict]:
+        if not self._buffer:
+            self.stats["empty"] += 1
+            return None
+        self.stats["leased"] += 1
+        return self._buffer.popleft()
+
+    def _accept(self, response: httpx.Response) -> Optional[Dict]:
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code == 404:
+            print("[PROXY] proxy-service: no working proxies available")
+        else:
+            print(f"[PROXY] proxy-service error: HTTP {response.status_code}")
+        return None
+
+    def _queue_report(self, proxy: Optional[Dict], outcome: str, response_time: Optional[float]) -> bool:
+        """Добавить отчёт; True — пора отправлять пачку."""
+        if not proxy:
+            return False
+        if outcome not in OUTCOMES:
+            raise ValueError(f"unknown outcome: {outcome}")
+        self.stats[outcome] += 1
+        report = {"host": proxy["host"], "port": proxy["port"], "success": outcome == "success"}
+        if response_time is not None:
+            report["response_time"] = response_time
+        if outcome == "ban":
+            report["banned_site"] = self.for_site
+        self._pending.append(report)
+        return (len(self._pending) >= self.report_batch
+                or time.monotonic() - self._last_flush >= REPORT_INTERVAL)
+
+    def _take_pending(self) -> List[Dict]:
+        reports, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        return reports
+
+    def _sent(self, reports: List[Dict]):
+        self.stats["reports_sent"] += len(reports)
+
+    # ── синхронный интерфейс ──
+
+    def _sync_client(self) -> httpx.Client:
+        if self._client is None:
+            kwargs = {"timeout": LEASE_TIMEOUT}
+            if self._transport is not None:
+                kwargs["transport"] = self._transport
+            self._client = httpx.Client(**kwargs)
+        return self._client
+
+    def _get_one(self) -> Optional[Dict]:
+        try:
+            return self._accept(self._sync_client().get(f"{self.base_url}/proxy/get", params=self._lease_params))
+        except httpx.HTTPError as e:
+            print(f"[PROXY] proxy-service unavailable: {e}")
+            return None
+
+    def _fill(self):
+        while len(self._buffer) < self.prefetch:
+            proxy = self._get_one()
+            if proxy is None:
+                break
+            self._buffer.append(proxy)
+
+    def lease(self, wait: float = LEASE_WAIT) -> Optional[Dict]:
+        """
+        Следующий прокси из буфера; пустой буфер пополняется до prefetch.
+        Если proxy-service ничего не выдал — повторы с backoff, пока не пройдёт wait сек.
+        """
+        deadline = time.monotonic() + wait
+        delay = LEASE_BACKOFF
+        while True:
+            if not self._buffer:
+                self._fill()
+            if self._buffer or time.monotonic() + delay > deadline:
+                return self._take()
+            print(f"[PROXY] No proxy from proxy-service, retry in {delay:.0f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, LEASE_BACKOFF_MAX)
+
+    def report(self, proxy: Optional[Dict], outcome: str, response_time: Optional[float] = None):
+        if self._queue_report(proxy, outcome, response_time):
+            self.flush()
+
+    def flush(self):
+        reports = self._take_pending()
+        if not reports:
+            return
+        client = self._sync_client()
+        try:
+            if self._batch_supported:
+                response = client.post(f"{self.base_url}/proxy/report/batch", json={"reports": reports}, timeout=10)
+                if response.status_code != 404:
+                    response.raise_for_status()
+                    self._sent(reports)
+                    return
+                # Старый proxy-service без пакетного эндпоинта
+                self._batch_supported = False
+            for report in reports:
+                client.post(f"{self.base_url}/proxy/report", json=report, timeout=5)
+            self._sent(reports)
+        except httpx.HTTPError as e:
+            print(f"[PROXY] Report error ({len(reports)} dropped): {e}")
+
+    def close(self):
+        self.flush()
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    # ── асинхронный интерфейс ──
+
+    def _async_client(self) -> httpx.AsyncClient:
+        if self._aclient is None:
+            kwargs = {"timeout": LEASE_TIMEOUT}
+            if self._async_transport is not None:
+                kwargs["transport"] = self._async_transport
+            self._aclient = httpx.AsyncClient(**kwargs)
+        return self._aclient
+
+    async def _aget_one(self) -> Optional[Dict]:
+        try:
+            response = await self._async_client().get(f"{self.base_url}/proxy/get", params=self._lease_params)
+            return self._accept(response)
+        except httpx.HTTPError as e:
+            print(f"[PROXY] proxy-service unavailable: {e}")
+            return None
+
+    async def _arefill(self):
+        missing = self.prefetch - len(self._buffer)
+        if missing <= 0:
+            return
+        for proxy in await asyncio.gather(*(self._aget_one() for _ in range(missing))):
+            if proxy is not None:
+                self._buffer.append(proxy)
+
+    def _ensure_refill(self) -> asyncio.Task:
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._arefill())
+        return self._refill_task
+
+    async def alease(self, wait: float = LEASE_WAIT) -> Optional[Dict]:
+        """
+        Прокси из буфера; буфер пополняется в фоне, как только опустел наполовину.
+        Если proxy-service ничего не выдал — повторы с backoff, пока не пройдёт wait сек.
+        """
+        deadline = time.monotonic() + wait
+        delay = LEASE_BACKOFF
+        while not self._buffer:
+            await self._ensure_refill()
+            if self._buffer or time.monotonic() + delay > deadline:
+                break
+            print(f"[PROXY] No proxy from proxy-service, retry in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LEASE_BACKOFF_MAX)
+        proxy = self._take()
+        if len(self._buffer) <= self.prefetch // 2:
+            self._ensure_refill()
+        return proxy
+
+    async def areport(self, proxy: Optional[Dict], outcome: str, response_time: Optional[float] = None):
+        if self._queue_report(proxy, outcome, response_time):
+            await self.aflush()
+
+    async def aflush(self):
+        reports = self._take_pending()
+        if not reports:
+            return
+        client = self._async_client()
+        try:
+            if self._batch_supported:
+                response = await client.post(f"{self.base_url}/proxy/report/batch",
+                                             json={"reports": reports}, timeout=10)
+                if response.status_code != 404:
+                    response.raise_for_status()
+                    self._sent(reports)
+                    return
+                self._batch_supported = False
+            await asyncio.gather(*(client.post(f"{self.base_url}/proxy/report", json=r, timeout=5)
+                                   for r in reports))
+            self._sent(reports)
+        except httpx.HTTPError as e:
+            print(f"[PROXY] Report error ({len(reports)} dropped): {e}")
+
+    async def aclose(self):
+        if self._refill_task is not None and not self._refill_task.done():
+            self._refill_task.cancel()
+            await asyncio.gather(self._refill_task, return_exceptions=True)
+        await self.aflush()
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк извлечения товаров со страниц каталога moba.ru.
+
+Сравнивает старый путь (parse_products_from_html + has_next_page, два прохода
+BeautifulSoup/html.parser) с однопроходным extract_catalog_page (lxml) на
+корпусе сохранённых HTML-страниц и проверяет, что результаты совпадают.
+
+Usage:
+    python bench_parse.py                       # moba_data/pages/*.html + *.html рядом
+    python bench_parse.py path/to/pages -n 20   # свой корпус, 20 повторов
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from moba_multicity_parser import (
+    DATA_DIR, HAS_LXML,
+    parse_products_from_html, has_next_page, extract_catalog_page,
+)
+
+DEFAULT_CORPUS = DATA_DIR / "pages"
+
+
+def _load_corpus(paths):
+    pages = []
+    for p in paths:
+        p = Path(p)
+        files = sorted(p.glob("*.html")) if p.is_dir() else [p]
+        for f in files:
+            pages.append((f.name, f.read_text(encoding="utf-8", errors="replace")))
+    return pages
+
+
+def _old(html: str):
+    return parse_products_from_html(html), has_next_page(html, 1)
+
+
+def _new(html: str):
+    return extract_catalog_page(html, 1)
+
+
+def _bench(fn, pages, repeat: int):
+    products = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, html in pages:
+            prods, _ = fn(html)
+            products += len(prods)
+    elapsed = time.perf_counter() - start
+    total_pages = len(pages) * repeat
+    return total_pages / elapsed, products / elapsed, elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Moba catalog extraction benchmark")
+    ap.add_argument("paths", nargs="*", help="HTML files or directories (default: moba_data/pages + ./*.html)")
+    ap.add_argument("-n", "--repeat", type=int, default=10, help="Repeats over the corpus")
+    args = ap.parse_args()
+
+    paths = args.paths or [DEFAULT_CORPUS, *Path(__file__).resolve().parent.glob("*.html")]
+    pages = _load_corpus([p for p in paths if Path(p).exists()])
+    if not pages:
+        print("Корпус пуст: сохраните страницы каталога в", DEFAULT_CORPUS)
+        return 1
+
+    mismatches = [name for name, html in pages if _old(html) != _new(html)]
+    if mismatches:
+        print("WARNING: results differ on:", ", ".join(mismatches))
+
+    print(f"Corpus: {len(pages)} pages, repeat={args.repeat}, lxml={'yes' if HAS_LXML else 'NO (fallback)'}")
+    print(f"{'impl':<28}{'pages/s':>10}{'products/s':>14}{'time, s':>10}")
+    results = {}
+    for name, fn in (("old (bs4 html.parser x2)", _old), ("new (lxml single pass)", _new)):
+        pps, prps, elapsed = _bench(fn, pages, args.repeat)
+        results[name] = pps
+        print(f"{name:<28}{pps:>10.1f}{prps:>14.1f}{elapsed:>10.2f}")
+    old_pps, new_pps = results.values()
+    print(f"speedup: x{new_pps / old_pps:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
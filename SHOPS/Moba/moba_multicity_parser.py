@@ -4,11 +4,16 @@ Moba.ru Multi-Store Parser — parallel Playwright + proxy rotation.
 
 Parses 42 physical stores across 30+ cities using ?cid=XXXXX parameter.
 Each store has its own product availability.
-Each browser uses its own SOCKS5 proxy from proxy-service (port 8110).
+Stores share a pool of long-lived Chromium instances; each store gets its own
+context with its own SOCKS5 proxy from proxy-service (port 8110).
 Auto-rotates proxy on failure. Telegram notifications.
+Each store is written to JSON/DB as soon as it finishes, while others are still parsing.
+Hybrid mode (default): the browser only passes SmartCaptcha, catalog pages are then
+fetched over a keep-alive HTTP/2 client with the browser's cookies; a captcha on the
+HTTP side falls back to the browser page.
 
 Requirements:
-    pip install playwright beautifulsoup4 httpx
+    pip install -r requirements.txt
     playwright install chromium
 
 Usage:
@@ -16,12 +21,15 @@ Usage:
     python moba_multicity_parser.py --no-db             # JSON only
     python moba_multicity_parser.py --stores 3          # first 3 stores only
     python moba_multicity_parser.py --city Москва       # only Moscow stores
-    python moba_multicity_parser.py --parallel 10       # 10 browsers (default)
+    python moba_multicity_parser.py --parallel 10       # 10 stores at once (contexts in a shared browser pool)
+    python moba_multicity_parser.py --browsers 2        # size of the shared Chromium pool
     python moba_multicity_parser.py --list              # list stores and exit
     python moba_multicity_parser.py --no-proxy          # without proxy (direct)
     python moba_multicity_parser.py --no-tg             # without Telegram
+    python moba_multicity_parser.py --no-hybrid         # every page through Playwright
 """
 import asyncio
+import importlib.util
 import json
 import re
 import os
@@ -36,6 +44,16 @@ from typing import List, Dict, Tuple, Optional
 import httpx
 from bs4 import BeautifulSoup
 
+try:
+    import lxml.html
+    from lxml.etree import ParserError
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+HAS_H2 = importlib.util.find_spec("h2") is not None
+HAS_SOCKS = importlib.util.find_spec("socksio") is not None  # httpx через SOCKS5 прокси
+
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -360,6 +378,93 @@ def has_next_page(html: str, current_page: int) -> bool:
     return bool(pagen)
 
 
+def _xp_class(cls: str) -> str:
+    """XPath-условие «class содержит токен cls» (аналог CSS .cls)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+
+_XP_ITEMS = [
+    f"//tr[{_xp_class('item')} and {_xp_class('main_item_wrapper')}]",
+    f"//div[{_xp_class('catalog-item')}]",
+    f"//div[{_xp_class('item-card')}]",
+    f"//div[{_xp_class('product-item')}]",
+]
+_XP_PRICE = [f".//*[{_xp_class('cost')}]", f".//*[{_xp_class('price')}]"]
+_XP_NEXT = (
+    f"//a[{_xp_class('flex-next')} or {_xp_class('next')}"
+    f" or contains(concat(' ', normalize-space(@rel), ' '), ' next ')]"
+)
+_PRICE_RE = re.compile(r"([\d\s]+)")
+
+
+def _text(el) -> str:
+    """Аналог BeautifulSoup get_text(strip=True)."""
+    return "".join(s.strip() for s in el.itertext())
+
+
+def extract_catalog_page(html: str, current_page: int) -> Tuple[List[Dict], bool]:
+    """
+    Single-pass extraction: products + pagination state from one lxml tree.
+
+    Returns (products, has_next). Same output as parse_products_from_html() +
+    has_next_page(), but the page is parsed once and with the C parser.
+    Without lxml falls back to the BeautifulSoup implementation.
+    """
+    if not HAS_LXML:
+        return parse_products_from_html(html), has_next_page(html, current_page)
+    try:
+        root = lxml.html.fromstring(html)
+    except ValueError:
+        # unicode-строка с XML-декларацией кодировки
+        root = lxml.html.fromstring(html.encode("utf-8"))
+    except ParserError:
+        return [], False
+
+    items = []
+    for xp in _XP_ITEMS:
+        items = root.xpath(xp)
+        if items:
+            break
+
+    products = []
+    for item in items:
+        for a in item.iterdescendants("a"):
+            href = a.get("href")
+            if not href or not href.startswith("/catalog/") or href.count("/") < 3:
+                continue
+            text = _text(a)
+            if not text or len(text) <= 5:
+                continue
+            parts = href.rstrip("/").split("/")
+            pid = parts[-1] if parts[-1].isdigit() else None
+            if pid:
+                price = 0.0
+                for xp in _XP_PRICE:
+                    price_els = item.xpath(xp)
+                    if price_els:
+                        m = _PRICE_RE.search(_text(price_els[0]).replace("\xa0", " "))
+                        if m:
+                            try:
+                                price = float(m.group(1).replace(" ", "").strip())
+                            except ValueError:
+                                pass
+                        break
+                products.append({
+                    "article": f"MOBA-{pid}",
+                    "name": text[:200],
+                    "price": price,
+                    "url": href,
+                })
+            break
+
+    has_next = bool(root.xpath(_XP_NEXT))
+    if not has_next:
+        marker = f"PAGEN_1={current_page + 1}"
+        has_next = any(marker in href for href in root.xpath("//a/@href"))
+
+    return products, has_next
+
+
 # ─── Playwright helpers ──────────────────────────────────────────────
 
 USER_AGENT = (
@@ -376,6 +481,16 @@ BROWSER_ARGS = [
 ]
 
 
+# Типы ресурсов, которые не нужны ни для SmartCaptcha, ни для парсинга HTML.
+# Скрипты и XHR не блокируем — без них капча не проходит.
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+BLOCKED_URL_MARKERS = ("analytics", "metrika", "mc.yandex", "google-analytics")
+
+CONTEXTS_PER_BROWSER = 4       # сколько контекстов одновременно на один Chromium
+MAX_CONTEXTS_PER_BROWSER = 50  # после стольких контекстов браузер перезапускается (утечки памяти)
+CAPTCHA_CONTEXT_TTL = 15 * 60  # сколько живёт контекст с пройденной капчей в кэше, сек
+
+
 async def _launch_browser(pw_instance, proxy_url: Optional[str] = None):
     """Launch browser with optional SOCKS5 proxy."""
     kwargs = {"headless": True, "args": BROWSER_ARGS}
@@ -384,15 +499,28 @@ async def _launch_browser(pw_instance, proxy_url: Optional[str] = None):
     return await pw_instance.chromium.launch(**kwargs)
 
 
-async def _make_context(browser, subdomain: str, cookies: Optional[Dict[str, str]] = None):
+async def _block_resources(route):
+    req = route.request
+    if req.resource_type in BLOCKED_RESOURCE_TYPES or any(m in req.url for m in BLOCKED_URL_MARKERS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def _make_context(browser, subdomain: str, cookies: Optional[Dict[str, str]] = None,
+                        proxy_url: Optional[str] = None):
     """Create a browser context with anti-detection and resource blocking."""
-    ctx = await browser.new_context(
+    kwargs = dict(
         viewport={"width": 1920, "height": 1080},
         locale="ru-RU",
         timezone_id="Europe/Moscow",
         user_agent=USER_AGENT,
         ignore_https_errors=True,
     )
+    if proxy_url:
+        kwargs["proxy"] = {"server": proxy_url}
+    ctx = await browser.new_context(**kwargs)
+    await ctx.route("**/*", _block_resources)
     if cookies:
         pw_cookies = [{"name": k, "value": v, "domain": subdomain, "path": "/"}
                       for k, v in cookies.items()]
@@ -401,18 +529,143 @@ async def _make_context(browser, subdomain: str, cookies: Optional[Dict[str, str
 
 
 async def _make_page(ctx):
-    """Create page with anti-detection + resource blocking."""
+    """Create page with anti-detection (resource blocking is set on the context)."""
     page = await ctx.new_page()
     await page.add_init_script(
         'Object.defineProperty(navigator, "webdriver", {get: () => undefined})'
     )
-    await page.route("**/*.{png,jpg,jpeg,gif,svg,ico,webp,woff,woff2,ttf,eot}",
-                      lambda route: route.abort())
-    await page.route("**/{analytics,metrika,mc.yandex,google-analytics}**",
-                      lambda route: route.abort())
     return page
 
 
+class BrowserPool:
+    """
+    Пул долгоживущих Chromium для всех магазинов.
+
+    Вместо браузера на каждую точку — несколько браузеров, каждой точке/прокси
+    выдаётся свежий контекст (прокси задаётся на уровне контекста).
+    Контексты, прошедшие SmartCaptcha, возвращаются в кэш по ключу
+    (subdomain, proxy) и отдаются следующей точке того же субдомена.
+    """
+
+    def __init__(self, pw_instance, size: int, use_proxy: bool):
+        self.pw = pw_instance
+        self.size = max(1, size)
+        self.use_proxy = use_proxy
+        self._browsers: List[list] = []   # [browser, active_contexts, total_contexts]
+        self._captcha_ctx: Dict[Tuple[str, Optional[str]], List[Tuple[object, float]]] = {}
+        self._lock = asyncio.Lock()
+        self.stats = {"browsers_launched": 0, "contexts_created": 0, "contexts_reused": 0}
+
+    async def _launch(self):
+        # Chromium требует прокси при запуске, чтобы разрешить прокси на контекст
+        browser = await _launch_browser(self.pw, "http://per-context" if self.use_proxy else None)
+        self.stats["browsers_launched"] += 1
+        return [browser, 0, 0]
+
+    async def _pick_browser(self) -> list:
+        """Наименее загруженный живой браузер; запускает новые до self.size."""
+        async with self._lock:
+            alive = []
+            for entry in self._browsers:
+                browser, active, total = entry
+                if not browser.is_connected():
+                    continue
+                if total >= MAX_CONTEXTS_PER_BROWSER and active == 0:
+                    await self._close_browser(browser)
+                    continue
+                alive.append(entry)
+            self._browsers = alive
+
+            candidates = [e for e in alive if e[2] < MAX_CONTEXTS_PER_BROWSER]
+            busy = not candidates or min(e[1] for e in candidates) >= CONTEXTS_PER_BROWSER
+            if not candidates or (busy and len(alive) < self.size):
+                entry = await self._launch()
+                self._browsers.append(entry)
+                return entry
+            return min(candidates, key=lambda e: e[1])
+
+    @staticmethod
+    async def _close_browser(browser):
+        try:
+            await browser.close()
+        except Exception:
+            pass
+
+    async def _pop_captcha_ctx(self, key):
+        cached = self._captcha_ctx.get(key) or []
+        now = time.time()
+        while cached:
+            ctx, ts = cached.pop()
+            if now - ts < CAPTCHA_CONTEXT_TTL and ctx.browser and ctx.browser.is_connected():
+                return ctx
+            # Просроченный контекст закрываем сразу, а не в фоне — иначе закрытие
+            # может потеряться или пережить pool.close()
+            await self._close_ctx(ctx)
+        return None
+
+    async def acquire(self, subdomain: str, proxy_url: Optional[str] = None,
+                      reuse_captcha: bool = True) -> Tuple[object, bool]:
+        """
+        Выдать контекст для точки. Returns (ctx, captcha_passed).
+        captcha_passed=True — контекст из кэша, SmartCaptcha для субдомена уже пройдена.
+        """
+        if reuse_captcha:
+            ctx = await self._pop_captcha_ctx((subdomain, proxy_url))
+            if ctx is not None:
+                self._entry_for(ctx)[1] += 1
+                self.stats["contexts_reused"] += 1
+                return ctx, True
+
+        entry = await self._pick_browser()
+        ctx = await _make_context(entry[0], subdomain, proxy_url=proxy_url)
+        entry[1] += 1
+        entry[2] += 1
+        self.stats["contexts_created"] += 1
+        return ctx, False
+
+    def _entry_for(self, ctx) -> list:
+        for entry in self._browsers:
+            if entry[0] is ctx.browser:
+                return entry
+        return [ctx.browser, 0, 0]
+
+    async def release(self, ctx, subdomain: str, proxy_url: Optional[str] = None,
+                      captcha_passed: bool = False):
+        """Вернуть контекст: рабочий с пройденной капчей — в кэш, иначе закрыть."""
+        entry = self._entry_for(ctx)
+        entry[1] = max(0, entry[1] - 1)
+        if captcha_passed and ctx.browser and ctx.browser.is_connected():
+            for page in list(ctx.pages):
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            cached = self._captcha_ctx.setdefault((subdomain, proxy_url), [])
+            cached.append((ctx, time.time()))
+            # Держим не больше одного запасного контекста на ключ
+            while len(cached) > 1:
+                old, _ = cached.pop(0)
+                await self._close_ctx(old)
+            return
+        await self._close_ctx(ctx)
+
+    @staticmethod
+    async def _close_ctx(ctx):
+        try:
+            await ctx.close()
+        except Exception:
+            pass
+
+    async def close(self):
+        for cached in self._captcha_ctx.values():
+            for ctx, _ in cached:
+                await self._close_ctx(ctx)
+        self._captcha_ctx.clear()
+        for browser, _, _ in self._browsers:
+            await self._close_browser(browser)
+        self._browsers.clear()
+
+
 async def _pass_smartcaptcha(page, subdomain: str, label: str) -> bool:
     """Navigate to moba.ru and wait for SmartCaptcha. Returns True on success."""
     base = f"https://{subdomain}"
@@ -434,6 +687,74 @@ async def _pass_smartcaptcha(page, subdomain: str, label: str) -> bool:
     return False
 
 
+async def _captcha_still_valid(page, subdomain: str) -> bool:
+    """Быстрая проверка кэшированного контекста: главная открывается без капчи."""
+    try:
+        await page.goto(f"https://{subdomain}", wait_until="domcontentloaded", timeout=30_000)
+        html = await page.content()
+    except Exception:
+        return False
+    return any(s in html.lower() for s in SUCCESS_INDICATORS)
+
+
+# ─── hybrid HTTP client ───────────────────────────────────────────────
+
+CAPTCHA_MARKERS = ("smartcaptcha", "captcha.yandex", "checkbox-captcha")
+HTTP_TIMEOUT = 30
+
+
+def _is_captcha_page(html: str) -> bool:
+    low = html.lower()
+    if any(m in low for m in CAPTCHA_MARKERS):
+        return True
+    return not any(s in low for s in SUCCESS_INDICATORS)
+
+
+async def _make_http_client(ctx, proxy_url: Optional[str] = None) -> httpx.AsyncClient:
+    """
+    Keep-alive HTTP/2 клиент с cookies и UA браузерного контекста,
+    прошедшего SmartCaptcha. Тот же прокси, что и у контекста.
+    """
+    client = httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        headers={
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "ru-RU,ru;q=0.9",
+        },
+        follow_redirects=True,
+        transport=httpx.AsyncHTTPTransport(
+            proxy=proxy_url, http2=HAS_H2, verify=False,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+        ),
+    )
+    await _sync_cookies(ctx, client)
+    return client
+
+
+async def _sync_cookies(ctx, client: httpx.AsyncClient):
+    """Перенести (обновлённые) cookies из браузерного контекста в HTTP клиент."""
+    for c in await ctx.cookies():
+        client.cookies.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"))
+
+
+async def _fetch_http(client: httpx.AsyncClient, url: str, label: str) -> Optional[str]:
+    """HTML страницы по HTTP или None, если нужен браузер (капча/ошибка)."""
+    try:
+        resp = await client.get(url)
+    except httpx.HTTPError as e:
+        log.debug("[%s] HTTP failed: %s", label, str(e)[:100])
+        return None
+    if resp.status_code != 200:
+        log.info("[%s] HTTP %d → браузер", label, resp.status_code)
+        return None
+    html = resp.text
+    if _is_captcha_page(html):
+        log.info("[%s] Капча на HTTP → браузер", label)
+        return None
+    return html
+
+
 # ─── store parser ────────────────────────────────────────────────────
 
 async def parse_store(
@@ -442,17 +763,21 @@ async def parse_store(
     store_name: str,
     city: str,
     sem: asyncio.Semaphore,
-    pw_instance,
+    pool: "BrowserPool",
     use_proxy: bool = True,
     notifier: TelegramNotifier = None,
     stats: dict = None,
     stagger_delay: float = 0,
     fixed_proxy: str = None,
+    hybrid: bool = True,
 ) -> Tuple[str, str, str, str, List[Dict]]:
     """
     Parse one physical store.
-    Uses ONE browser: SmartCaptcha → parse categories in same context.
+    Uses ONE pooled context: SmartCaptcha (or a cached context that already
+    passed it for this subdomain) → parse categories in same context.
     With proxy: auto-rotates on failure (or uses fixed_proxy if provided).
+    hybrid=True: after the captcha, pages go over HTTP with the context's cookies;
+    the browser is used again only when HTTP hits a captcha.
     Returns (subdomain, cid, store_name, city, products).
     """
     label = f"{city}/{store_name}"
@@ -467,6 +792,8 @@ async def parse_store(
         all_products = []
         seen_articles = set()
         categories_done = 0
+        page_stats = {"http": 0, "browser": 0}
+        started = time.monotonic()
 
         proxy_client = ProxyClient() if (use_proxy and not fixed_proxy) else None
         max_attempts = MAX_PROXY_RETRIES if use_proxy else 2  # 2 attempts for direct
@@ -500,25 +827,40 @@ async def parse_store(
                     log.info("[%s] Повторная попытка %d", label, attempt + 1)
                     await asyncio.sleep(10)
 
-            # ── Один браузер: SmartCaptcha → парсинг ──
-            browser = None
+            # ── Контекст из пула: SmartCaptcha → парсинг ──
+            ctx = None
+            http = None
+            captcha_ok = False
+            proxy_failed = False
             try:
-                browser = await _launch_browser(pw_instance, proxy_url)
-                ctx = await _make_context(browser, subdomain)
+                # Online (без cid) не берёт чужой контекст: cid мог остаться в сессии
+                ctx, captcha_ok = await pool.acquire(subdomain, proxy_url, reuse_captcha=bool(cid))
                 page = await _make_page(ctx)
 
                 # SmartCaptcha
-                if not await _pass_smartcaptcha(page, subdomain, label):
-                    if proxy_client:
-                        proxy_client.report_failure(banned=True)
-                    continue
+                if captcha_ok and await _captcha_still_valid(page, subdomain):
+                    log.info("[%s] SmartCaptcha: контекст из пула (%s)", label, subdomain)
+                else:
+                    # Контекст из пула больше не проходит — в кэш его возвращать нельзя
+                    captcha_ok = False
+                    if not await _pass_smartcaptcha(page, subdomain, label):
+                        if proxy_client:
+                            proxy_client.report_failure(banned=True)
+                        continue
+                    captcha_ok = True
 
                 cookies = await ctx.cookies()
                 log.info("[%s] SmartCaptcha OK, %d cookies, парсинг %d categories, cid=%s",
                          label, len(cookies), len(ROOT_CATEGORIES) - categories_done, cid)
 
-                # ── Парсинг категорий в том же браузере ──
-                proxy_failed = False
+                if hybrid:
+                    try:
+                        http = await _make_http_client(ctx, proxy_url)
+                    except ImportError as e:
+                        # Нет socksio для SOCKS5 прокси — страницы грузит браузер
+                        log.warning("[%s] HTTP клиент недоступен (%s) — только браузер", label, e)
+
+                # ── Парсинг категорий в том же контексте ──
                 consecutive_empty = 0
 
                 for ci in range(categories_done, len(ROOT_CATEGORIES)):
@@ -532,17 +874,25 @@ async def parse_store(
                         if page_num > 1:
                             url += ("&" if cid else "?") + f"PAGEN_1={page_num}"
 
-                        try:
-                            await page.goto(url, wait_until="commit", timeout=60_000)
-                            await page.wait_for_timeout(2000)
-                            html = await page.content()
-                        except Exception as e:
-                            err_str = str(e)[:100]
-                            log.warning("[%s] Page failed: %s", label, err_str)
-                            proxy_failed = True
-                            break
-
-                        prods = parse_products_from_html(html)
+                        html = await _fetch_http(http, url, label) if http else None
+                        if html is not None:
+                            page_stats["http"] += 1
+                        else:
+                            try:
+                                await page.goto(url, wait_until="commit", timeout=60_000)
+                                await page.wait_for_timeout(2000)
+                                html = await page.content()
+                            except Exception as e:
+                                err_str = str(e)[:100]
+                                log.warning("[%s] Page failed: %s", label, err_str)
+                                proxy_failed = True
+                                break
+                            page_stats["browser"] += 1
+                            if http and not _is_captcha_page(html):
+                                # Браузер прошёл — обновить cookies для HTTP
+                                await _sync_cookies(ctx, http)
+
+                        prods, has_next = extract_catalog_page(html, page_num)
                         if not prods:
                             break
 
@@ -553,7 +903,7 @@ async def parse_store(
                                 all_products.append(p)
                                 cat_count += 1
 
-                        if not has_next_page(html, page_num):
+                        if not has_next:
                             break
 
                         await asyncio.sleep(page_delay)
@@ -592,16 +942,19 @@ async def parse_store(
 
             except Exception as e:
                 log.error("[%s] Browser crash: %s", label, str(e)[:200])
+                captcha_ok = False
                 if proxy_client:
                     proxy_client.report_failure(banned=False)
             finally:
-                if browser:
-                    try:
-                        await browser.close()
-                    except Exception:
-                        pass
+                if http is not None:
+                    await http.aclose()
+                if ctx is not None:
+                    await pool.release(ctx, subdomain, proxy_url,
+                                       captcha_passed=captcha_ok and not proxy_failed)
 
-        log.info("[%s] DONE: %d products", label, len(all_products))
+        log.info("[%s] DONE: %d products in %.0fs (pages: %d http, %d browser)",
+                 label, len(all_products), time.monotonic() - started,
+                 page_stats["http"], page_stats["browser"])
 
         # Обновить общую статистику
         if stats is not None:
@@ -703,19 +1056,100 @@ def save_store_to_db(subdomain: str, cid: str, store_name: str, city: str, produ
         conn.close()
 
 
+# ─── streaming writer ─────────────────────────────────────────────────
+
+def save_store_json(subdomain: str, cid: str, store_name: str, city: str, products: List[Dict]):
+    """Write one store's products to moba_data/moba_cid{cid}_{date}.json."""
+    DATA_DIR.mkdir(exist_ok=True)
+    fname = DATA_DIR / f"moba_cid{cid}_{datetime.now().strftime('%Y%m%d')}.json"
+    with open(fname, "w", encoding="utf-8") as f:
+        json.dump({
+            "city": city,
+            "store_name": store_name,
+            "cid": cid,
+            "subdomain": subdomain,
+            "date": datetime.now().isoformat(),
+            "total": len(products),
+            "products": products,
+        }, f, ensure_ascii=False, indent=2)
+
+
+class StoreWriter:
+    """
+    Асинхронная запись результатов по мере завершения магазинов.
+
+    Магазин, закончивший парсинг, кладётся в очередь; фоновый воркер пишет
+    JSON и БД в отдельном потоке, пока остальные магазины продолжают парситься.
+    Очередь ограничена (maxsize) — если БД не успевает, parse_store ждёт,
+    и в памяти одновременно лежит не больше maxsize списков товаров.
+    """
+
+    def __init__(self, use_db: bool = True, full_mode: bool = False, maxsize: int = 2):
+        self.use_db = use_db
+        self.full_mode = full_mode
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.saved = 0
+        self.failed = 0
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._worker = asyncio.create_task(self._run())
+
+    async def put(self, result: Tuple[str, str, str, str, List[Dict]]):
+        await self.queue.put(result)
+
+    async def _run(self):
+        while True:
+            item = await self.queue.get()
+            try:
+                if item is None:
+                    return
+                await asyncio.to_thread(self._write, *item)
+                self.saved += 1
+            except Exception as e:
+                self.failed += 1
+                log.error("[WRITER] %s/%s: %s", item[3], item[2], e)
+            finally:
+                self.queue.task_done()
+
+    def _write(self, subdomain: str, cid: str, store_name: str, city: str, products: List[Dict]):
+        save_store_json(subdomain, cid, store_name, city, products)
+        if self.use_db:
+            save_store_to_db(subdomain, cid, store_name, city, products, full_mode=self.full_mode)
+
+    async def close(self):
+        """Дождаться записи всего, что уже в очереди, и остановить воркер."""
+        if self._worker is None:
+            return
+        await self.queue.put(None)
+        await self._worker
+        self._worker = None
+
+
+async def parse_and_stream(writer: StoreWriter, *args, **kwargs) -> Tuple[str, str, str, str, int]:
+    """parse_store + передача товаров писателю. Returns (subdomain, cid, store_name, city, count)."""
+    subdomain, cid, store_name, city, products = await parse_store(*args, **kwargs)
+    if products:
+        await writer.put((subdomain, cid, store_name, city, products))
+    return subdomain, cid, store_name, city, len(products)
+
+
 # ─── main ─────────────────────────────────────────────────────────────
 
 async def amain():
     ap = argparse.ArgumentParser(description="Moba.ru multi-store parser with proxy rotation")
     ap.add_argument("--no-db", action="store_true", help="JSON only, no DB")
     ap.add_argument("--stores", type=int, default=None, help="Limit stores count")
-    ap.add_argument("--parallel", "-j", type=int, default=None, help="Parallel browsers (default: 2 direct, 5 proxy)")
+    ap.add_argument("--parallel", "-j", type=int, default=None, help="Parallel stores (default: 2 direct, 5 proxy)")
+    ap.add_argument("--browsers", type=int, default=None,
+                    help=f"Shared Chromium instances (default: parallel / {CONTEXTS_PER_BROWSER})")
     ap.add_argument("--list", action="store_true", help="List stores and exit")
     ap.add_argument("--skip-moscow", action="store_true", help="Skip moba.ru subdomain stores")
     ap.add_argument("--city", type=str, default=None, help="Filter by city name")
     ap.add_argument("--no-proxy", action="store_true", help="Direct connection (no proxy)")
     ap.add_argument("--proxies", type=str, default=None, help="Fixed proxies (comma-separated socks5://ip:port), distributed round-robin")
     ap.add_argument("--no-tg", action="store_true", help="Disable Telegram notifications")
+    ap.add_argument("--no-hybrid", action="store_true", help="Load every page through Playwright (no HTTP after captcha)")
     ap.add_argument("--full", action="store_true", help="Full parse (UPSERT is already full for this parser)")
     args = ap.parse_args()
 
@@ -769,24 +1203,44 @@ async def amain():
         "start_time": datetime.now(),
     }
 
-    log.info("Parsing %d stores with %d parallel browsers (proxy=%s)",
+    log.info("Parsing %d stores, %d in parallel (proxy=%s)",
              len(stores), parallel, "ON" if use_proxy else "OFF")
 
     sem = asyncio.Semaphore(parallel)
 
+    browsers = args.browsers or -(-parallel // CONTEXTS_PER_BROWSER)
+
+    # ── Гибридный режим: httpx через SOCKS5 прокси требует socksio ──
+    hybrid = not args.no_hybrid
+    socks_proxies = use_proxy and (not fixed_proxies or any(p.startswith("socks") for p in fixed_proxies))
+    if hybrid and socks_proxies and not HAS_SOCKS:
+        log.warning('[HYBRID] socksio не установлен (pip install "httpx[socks]") — '
+                    'гибридный режим выключен, все страницы через браузер')
+        hybrid = False
+
+    writer = StoreWriter(use_db=not args.no_db, full_mode=args.full)
+    writer.start()
+
     from playwright.async_api import async_playwright
     async with async_playwright() as pw:
-        tasks = [
-            parse_store(sub, cid, name, city, sem, pw,
-                        use_proxy=use_proxy, notifier=notifier, stats=shared_stats,
-                        stagger_delay=i * STORE_DELAY,
-                        fixed_proxy=fixed_proxies[i % len(fixed_proxies)] if fixed_proxies else None)
-            for i, (sub, cid, name, city) in enumerate(stores)
-        ]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        pool = BrowserPool(pw, browsers, use_proxy)
+        try:
+            tasks = [
+                parse_and_stream(writer, sub, cid, name, city, sem, pool,
+                                 use_proxy=use_proxy, notifier=notifier, stats=shared_stats,
+                                 stagger_delay=i * STORE_DELAY,
+                                 fixed_proxy=fixed_proxies[i % len(fixed_proxies)] if fixed_proxies else None,
+                                 hybrid=hybrid)
+                for i, (sub, cid, name, city) in enumerate(stores)
+            ]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            await pool.close()
+            await writer.close()
+        log.info("[POOL] %s", pool.stats)
+    log.info("[WRITER] saved %d stores, %d write errors", writer.saved, writer.failed)
 
     # ── Обработка результатов ──
-    DATA_DIR.mkdir(exist_ok=True)
     all_results = {}
     total_products = 0
     stores_failed = 0
@@ -796,33 +1250,17 @@ async def amain():
             log.error("Task exception: %s", r)
             stores_failed += 1
             continue
-        subdomain, cid, store_name, city, products = r
+        subdomain, cid, store_name, city, count = r
         label = f"{city}/{store_name}"
         all_results[label] = {
             "cid": cid,
             "subdomain": subdomain,
-            "products": len(products),
+            "products": count,
         }
-        total_products += len(products)
-        if not products:
+        total_products += count
+        if not count:
             stores_failed += 1
 
-        if products:
-            fname = DATA_DIR / f"moba_cid{cid}_{datetime.now().strftime('%Y%m%d')}.json"
-            with open(fname, "w", encoding="utf-8") as f:
-                json.dump({
-                    "city": city,
-                    "store_name": store_name,
-                    "cid": cid,
-                    "subdomain": subdomain,
-                    "date": datetime.now().isoformat(),
-                    "total": len(products),
-                    "products": products,
-                }, f, ensure_ascii=False, indent=2)
-
-            if not args.no_db:
-                save_store_to_db(subdomain, cid, store_name, city, products, full_mode=args.full)
-
     # ── Summary ──
     duration = int((datetime.now() - shared_stats["start_time"]).total_seconds() / 60)
     log.info("\n=== SUMMARY ===")
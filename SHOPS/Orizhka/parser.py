@@ -4,8 +4,10 @@ API: Tilda Store (store.tildaapi.com)
 БД: db_orizhka
 """
 
+import asyncio
 import httpx
 import json
+import math
 import time
 import os
 import re
@@ -32,10 +34,12 @@ PRODUCTS_XLSX = os.path.join(DATA_DIR, "products.xlsx")
 REQUEST_DELAY = 0.3
 REQUEST_TIMEOUT = 30
 PER_PAGE = 50
+CONCURRENCY = 4  # Одновременных запросов к store.tildaapi.com (--concurrency)
 
 # === КОНФИГУРАЦИЯ БД (Supabase) ===
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from db_wrapper import get_db  # Автоматически маппит таблицы на новые имена
+from crawl_engine import CrawlEngine
 
 # Категории (storepart ID -> название)
 CATEGORIES = {
@@ -237,45 +241,9 @@ class OrizhkaParser:
                 break
 
             for item in items:
-                uid = str(item.get("uid", ""))
-                if uid in self.seen_uids:
-                    continue
-                self.seen_uids.add(uid)
-
-                price_str = item.get("price", "0")
-                try:
-                    price = float(price_str.replace(",", ".").replace(" ", ""))
-                except:
-                    price = 0.0
-
-                price_old_str = item.get("priceold", "") or "0"
-                try:
-                    price_old = float(price_old_str.replace(",", ".").replace(" ", ""))
-                except:
-                    price_old = 0.0
-
-                qty_str = item.get("quantity", "0") or "0"
-                try:
-                    quantity = int(qty_str)
-                except:
-                    quantity = 0
-
-                text = item.get("text", "") or ""
-                text = re.sub(r'<[^>]+>', ' ', text)
-                text = re.sub(r'\s+', ' ', text).strip()
-
-                product = Product(
-                    uid=uid,
-                    title=item.get("title", ""),
-                    sku=item.get("sku", "") or "",
-                    price=price,
-                    price_old=price_old,
-                    quantity=quantity,
-                    url=item.get("url", ""),
-                    category=category_name,
-                    description=text,
-                )
-                products.append(product)
+                product = self._parse_item(item, category_name)
+                if product:
+                    products.append(product)
 
             print(f"  Страница {slice_num}: +{len(items)} товаров (всего: {total})")
 
@@ -286,6 +254,167 @@ class OrizhkaParser:
 
         return products
 
+    def _parse_item(self, item: Dict, category_name: str) -> Optional[Product]:
+        """Товар из элемента ответа Tilda API (None — уже встречался в другой категории)"""
+        uid = str(item.get("uid", ""))
+        if uid in self.seen_uids:
+            return None
+        self.seen_uids.add(uid)
+        return self._build_product(item, uid, category_name)
+
+    @staticmethod
+    def _build_product(item: Dict, uid: str, category_name: str) -> Product:
+        price_str = item.get("price", "0")
+        try:
+            price = float(price_str.replace(",", ".").replace(" ", ""))
+        except:
+            price = 0.0
+
+        price_old_str = item.get("priceold", "") or "0"
+        try:
+            price_old = float(price_old_str.replace(",", ".").replace(" ", ""))
+        except:
+            price_old = 0.0
+
+        qty_str = item.get("quantity", "0") or "0"
+        try:
+            quantity = int(qty_str)
+        except:
+            quantity = 0
+
+        text = item.get("text", "") or ""
+        text = re.sub(r'<[^>]+>', ' ', text)
+        text = re.sub(r'\s+', ' ', text).strip()
+
+        return Product(
+            uid=uid,
+            title=item.get("title", ""),
+            sku=item.get("sku", "") or "",
+            price=price,
+            price_old=price_old,
+            quantity=quantity,
+            url=item.get("url", ""),
+            category=category_name,
+            description=text,
+        )
+
+    # === Конкурентный режим ===
+
+    async def _fetch_slice(self, engine: CrawlEngine, storepart_uid: str, category_name: str,
+                           slice_num: int) -> Optional[Dict]:
+        params = {
+            "storepartuid": storepart_uid,
+            "getparts": "true",
+            "getoptions": "true",
+            "slice": str(slice_num),
+            "size": str(PER_PAGE),
+        }
+        url = str(httpx.URL(API_URL, params=params))
+        response = await engine.fetch(url)
+        if response is None:
+            # Одна запись на отказ: причина из engine.errors + контекст категории
+            cause = next((e["error"] for e in reversed(engine.errors) if e["url"] == url), "fetch failed")
+            self.errors.append({
+                "category": category_name,
+                "storepart": storepart_uid,
+                "slice": slice_num,
+                "error": cause,
+                "time": datetime.now().isoformat()
+            })
+            return None
+        try:
+            return response.json()
+        except ValueError as e:
+            self.errors.append({
+                "category": category_name,
+                "storepart": storepart_uid,
+                "slice": slice_num,
+                "error": f"JSON: {e}",
+                "time": datetime.now().isoformat()
+            })
+            return None
+
+    async def _fetch_category_async(self, engine: CrawlEngine, storepart_uid: str,
+                                    category_name: str) -> List[Dict]:
+        """
+        Первый slice даёт total — по нему планируются остальные slice'ы и грузятся параллельно.
+        Возвращает элементы API в порядке slice'ов (без дедупликации).
+        """
+        first = await self._fetch_slice(engine, storepart_uid, category_name, 1)
+        if not first:
+            return []
+
+        items = list(first.get("products", []))
+        total = int(first.get("total", 0) or 0)
+        slices = math.ceil(total / PER_PAGE)
+        if len(items) >= PER_PAGE and slices > 1:
+            rest = await asyncio.gather(*(
+                self._fetch_slice(engine, storepart_uid, category_name, n) for n in range(2, slices + 1)
+            ))
+            for data in rest:
+                if data:
+                    items.extend(data.get("products", []))
+        return items
+
+    async def _parse_all_async(self, categories: Dict[str, str], concurrency: int, stream=None):
+        """
+        Категории грузятся одновременно, но разбираются в порядке categories: товар из
+        нескольких категорий всегда достаётся первой из них, как в последовательном parse_all.
+        Товары категории уходят в staging, как только разобраны она и все предыдущие.
+        """
+        async with CrawlEngine(concurrency=concurrency, delay=REQUEST_DELAY, timeout=REQUEST_TIMEOUT,
+                               headers=dict(self.client.headers)) as engine:
+            tasks = [
+                (name, asyncio.create_task(self._fetch_category_async(engine, uid, name)))
+                for uid, name in categories.items()
+            ]
+            try:
+                for name, task in tasks:
+                    items = await task
+                    products = [p for p in (self._parse_item(item, name) for item in items) if p]
+                    self.products.extend(products)
+                    print(f"  {name}: {len(products)} товаров (элементов API: {len(items)})")
+                    if stream and products:
+                        await stream.put(products)
+            finally:
+                for _, task in tasks:
+                    task.cancel()
+                await asyncio.gather(*(task for _, task in tasks), return_exceptions=True)
+        return engine
+
+    def parse_all_concurrent(self, categories: Dict[str, str] = None, concurrency: int = CONCURRENCY,
+                             stream_staging: bool = False):
+        """
+        Параллельный парсинг: все категории одновременно, slice'ы каждой категории — параллельно
+        после первого. Общий лимит — concurrency запросов к хосту API и REQUEST_DELAY между стартами.
+        stream_staging=True — товары пишутся в orizhka_staging по мере поступления slice'ов.
+        """
+        categories = categories or CATEGORIES
+
+        print(f"\n{'='*60}")
+        print(f"Парсинг каталога Orizhka.ru (async, {concurrency} запросов)")
+        print(f"Дата: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Категорий: {len(categories)}")
+        print(f"{'='*60}\n")
+
+        async def run():
+            stream = StagingStream() if stream_staging else None
+            if stream:
+                await stream.start()
+            try:
+                return await self._parse_all_async(categories, concurrency, stream)
+            finally:
+                if stream:
+                    await stream.close()
+
+        engine = asyncio.run(run())
+
+        print(f"\n{'='*60}")
+        print(f"ИТОГО: {len(self.products)} уникальных товаров")
+        print(f"Ошибок: {len(self.errors)}")
+        print(f"HTTP: {engine.stats}")
+        print(f"{'='*60}")
+
     def parse_all(self, categories: Dict[str, str] = None):
         """Парсить все категории"""
         categories = categories or CATEGORIES
@@ -510,6 +639,86 @@ class OrizhkaParser:
         self.close()
 
 
+_STAGING_INSERT_SQL = """
+    INSERT INTO orizhka_staging (
+        outlet_code, name, article, category,
+        brand, price, old_price, url
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def _staging_row(p: Product) -> tuple:
+    article = p.sku.strip() if p.sku else p.uid
+    return (
+        'orizhka-spb',
+        p.title,
+        article,
+        p.category or '',
+        'Apple',
+        p.price,
+        p.price_old if p.price_old > 0 else None,
+        (BASE_URL + p.url) if p.url and not p.url.startswith("http") else p.url,
+    )
+
+
+class StagingStream:
+    """
+    Потоковая запись в orizhka_staging для конкурентного режима.
+
+    TRUNCATE при старте, дальше каждый slice кладётся в ограниченную очередь;
+    фоновый воркер пишет его в отдельном потоке и коммитит. Если БД не успевает,
+    загрузка slice'ов ждёт на put().
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.written = 0
+        self.conn = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.conn = await asyncio.to_thread(get_db)
+        await asyncio.to_thread(self._execute, "TRUNCATE TABLE orizhka_staging")
+        self._worker = asyncio.create_task(self._run())
+
+    def _execute(self, sql: str):
+        with self.conn.cursor() as cur:
+            cur.execute(sql)
+        self.conn.commit()
+
+    def _write(self, products: List[Product]):
+        with self.conn.cursor() as cur:
+            cur.executemany(_STAGING_INSERT_SQL, [_staging_row(p) for p in products])
+        self.conn.commit()
+        self.written += len(products)
+
+    async def put(self, products: List[Product]):
+        await self.queue.put(products)
+
+    async def _run(self):
+        while True:
+            products = await self.queue.get()
+            try:
+                if products is None:
+                    return
+                await asyncio.to_thread(self._write, products)
+            except Exception as e:
+                print(f"  [DB ERROR] staging: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def close(self):
+        """Дописать очередь и закрыть соединение."""
+        if self._worker is not None:
+            await self.queue.put(None)
+            await self._worker
+            self._worker = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        print(f"[DB] Сохранено в orizhka_staging: {self.written} товаров")
+
+
 def save_staging(products: List[Product]):
     """Сохранение сырых данных в orizhka_staging"""
     if not products:
@@ -521,25 +730,8 @@ def save_staging(products: List[Product]):
     try:
         cur.execute("TRUNCATE TABLE orizhka_staging")
 
-        insert_sql = """
-            INSERT INTO orizhka_staging (
-                outlet_code, name, article, category,
-                brand, price, old_price, url
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """
-
         for p in products:
-            article = p.sku.strip() if p.sku else p.uid
-            cur.execute(insert_sql, (
-                'orizhka-spb',
-                p.title,
-                article,
-                p.category or '',
-                'Apple',
-                p.price,
-                p.price_old if p.price_old > 0 else None,
-                (BASE_URL + p.url) if p.url and not p.url.startswith("http") else p.url,
-            ))
+            cur.execute(_STAGING_INSERT_SQL, _staging_row(p))
 
         conn.commit()
         print(f"[DB] Сохранено в orizhka_staging: {len(products)} товаров")
@@ -613,6 +805,8 @@ def main():
     arg_parser.add_argument('--old-schema', action='store_true', help='Использовать старую схему БД (products)')
     arg_parser.add_argument('--init-db', action='store_true', help='Только инициализация БД')
     arg_parser.add_argument('--full', action='store_true', help='Полный парсинг (UPSERT и так полный для этого парсера)')
+    arg_parser.add_argument('--concurrency', type=int, default=0,
+                            help=f'Параллельная загрузка категорий и slice\'ов (N запросов, напр. {CONCURRENCY})')
     args = arg_parser.parse_args()
 
     print("Orizhka.ru Parser v2.0")
@@ -629,8 +823,14 @@ def main():
         print("\nОбработка завершена!")
         return
 
+    # Стандартный путь (staging) в конкурентном режиме пишется потоково, по мере поступления slice'ов
+    stream_staging = args.concurrency > 0 and not (args.no_db or args.direct or args.old_schema)
+
     with OrizhkaParser(save_to_db=not args.no_db) as parser:
-        parser.parse_all()
+        if args.concurrency > 0:
+            parser.parse_all_concurrent(concurrency=args.concurrency, stream_staging=stream_staging)
+        else:
+            parser.parse_all()
 
         if not args.no_db:
             if args.direct:
@@ -640,7 +840,8 @@ def main():
                 parser.save_to_database()
             else:
                 # Стандарт: staging
-                save_staging(parser.products)
+                if not stream_staging:
+                    save_staging(parser.products)
                 if args.all:
                     process_staging(full_mode=args.full)
 
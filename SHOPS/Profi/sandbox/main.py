@@ -153,7 +153,13 @@ async def normalize_status():
 @app.post("/dict/sync")
 async def dict_sync():
     counts = await dict_service.sync_dicts()
-    return {"synced": counts}
+    info = dict_service.get_dict_info()
+    return {"synced": counts, "version": info["version"], "refresh_ms": info["refresh_ms"]}
+
+
+@app.get("/dict/info")
+async def dict_info():
+    return dict_service.get_dict_info()
 
 
 @app.get("/dict/brands")
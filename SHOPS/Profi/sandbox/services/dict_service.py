@@ -1,59 +1,121 @@
 """
 In-memory кэш zip_dict_* справочников
+
+Справочники хранятся как неизменяемый снимок (_DictSnapshot) с хеш-индексами:
+- по нормализованному имени (strip().lower()) для brands / part_types
+- по brand_id для models
+
+Списки снимка — кортежи, собранные один раз в build(): геттеры отдают их без копирования.
+
+sync_dicts() собирает новый снимок целиком и подменяет ссылку одной операцией,
+поэтому читатели никогда не видят наполовину загруженные справочники.
 """
 from __future__ import annotations
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
 from ..db import get_pool
 
-_cache: dict[str, list[dict]] = {}
+_TABLES = {
+    "brands": "SELECT id, name FROM zip_dict_brands ORDER BY name",
+    "models": "SELECT id, name, brand_id FROM zip_dict_models ORDER BY name",
+    "part_types": "SELECT id, name FROM zip_dict_part_types ORDER BY name",
+    "colors": "SELECT id, name FROM zip_dict_colors ORDER BY name",
+}
+
+
+def _norm(name: str) -> str:
+    return name.strip().lower()
+
+
+def _index_by_name(rows: list[dict]) -> dict[str, dict]:
+    """Индекс имя → запись. При дублях побеждает первая (как в линейном поиске)."""
+    index: dict[str, dict] = {}
+    for r in rows:
+        name = r.get("name")
+        if name:
+            index.setdefault(_norm(name), r)
+    return index
+
+
+@dataclass(frozen=True)
+class _DictSnapshot:
+    version: int = 0
+    loaded_at: datetime | None = None
+    refresh_ms: float = 0.0
+    lists: dict[str, tuple[dict, ...]] = field(default_factory=dict)
+    by_name: dict[str, dict[str, dict]] = field(default_factory=dict)
+    models_by_brand: dict[int, tuple[dict, ...]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, version: int, data: dict[str, list[dict]], refresh_ms: float) -> "_DictSnapshot":
+        models_by_brand: dict[int, list[dict]] = {}
+        for m in data.get("models", []):
+            models_by_brand.setdefault(m.get("brand_id"), []).append(m)
+        return cls(
+            version=version,
+            loaded_at=datetime.now(timezone.utc),
+            refresh_ms=refresh_ms,
+            lists={key: tuple(rows) for key, rows in data.items()},
+            by_name={
+                key: _index_by_name(data.get(key, []))
+                for key in ("brands", "part_types")
+            },
+            models_by_brand={brand_id: tuple(rows) for brand_id, rows in models_by_brand.items()},
+        )
+
+
+_snapshot = _DictSnapshot()
 
 
 async def sync_dicts() -> dict[str, int]:
-    """Загрузить справочники из БД в память."""
+    """Загрузить справочники из БД и атомарно подменить снимок."""
+    global _snapshot
     pool = get_pool()
-    tables = {
-        "brands": "SELECT id, name FROM zip_dict_brands ORDER BY name",
-        "models": "SELECT id, name, brand_id FROM zip_dict_models ORDER BY name",
-        "part_types": "SELECT id, name FROM zip_dict_part_types ORDER BY name",
-        "colors": "SELECT id, name FROM zip_dict_colors ORDER BY name",
-    }
-    counts = {}
-    for key, sql in tables.items():
+    started = time.perf_counter()
+    data: dict[str, list[dict]] = {}
+    for key, sql in _TABLES.items():
         rows = await pool.fetch(sql)
-        _cache[key] = [dict(r) for r in rows]
-        counts[key] = len(rows)
-    return counts
+        data[key] = [dict(r) for r in rows]
+    refresh_ms = (time.perf_counter() - started) * 1000
+    _snapshot = _DictSnapshot.build(_snapshot.version + 1, data, refresh_ms)
+    return {key: len(rows) for key, rows in data.items()}
+
+
+def get_dict_info() -> dict:
+    """Версия и стоимость последней загрузки снимка."""
+    snap = _snapshot
+    return {
+        "version": snap.version,
+        "loaded_at": snap.loaded_at.isoformat() if snap.loaded_at else None,
+        "refresh_ms": round(snap.refresh_ms, 1),
+        "counts": {key: len(rows) for key, rows in snap.lists.items()},
+    }
 
 
-def get_brands() -> list[dict]:
-    return _cache.get("brands", [])
+def get_brands() -> tuple[dict, ...]:
+    return _snapshot.lists.get("brands", ())
 
 
-def get_models(brand_id: int | None = None) -> list[dict]:
-    models = _cache.get("models", [])
+def get_models(brand_id: int | None = None) -> tuple[dict, ...]:
+    snap = _snapshot
     if brand_id is not None:
-        return [m for m in models if m.get("brand_id") == brand_id]
-    return models
+        return snap.models_by_brand.get(brand_id, ())
+    return snap.lists.get("models", ())
 
 
-def get_part_types() -> list[dict]:
-    return _cache.get("part_types", [])
+def get_part_types() -> tuple[dict, ...]:
+    return _snapshot.lists.get("part_types", ())
 
 
-def get_colors() -> list[dict]:
-    return _cache.get("colors", [])
+def get_colors() -> tuple[dict, ...]:
+    return _snapshot.lists.get("colors", ())
 
 
 def find_brand_by_name(name: str) -> dict | None:
-    name_lower = name.strip().lower()
-    for b in get_brands():
-        if b["name"].strip().lower() == name_lower:
-            return b
-    return None
+    return _snapshot.by_name.get("brands", {}).get(_norm(name))
 
 
 def find_part_type_by_name(name: str) -> dict | None:
-    name_lower = name.strip().lower()
-    for pt in get_part_types():
-        if pt["name"].strip().lower() == name_lower:
-            return pt
-    return None
+    return _snapshot.by_name.get("part_types", {}).get(_norm(name))
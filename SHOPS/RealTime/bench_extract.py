@@ -0,0 +1,102 @@
+"""
+Бенчмарк извлечения данных на сохранённых страницах
+
+Сравнивает извлечение без плана (экстрактор создаётся на каждую страницу, DOM строится
+всегда — как раньше) и по скомпилированному плану (HtmlExtractor/ApiJsonExtractor.for_config).
+Сеть не используется: только разбор файлов.
+
+Использование:
+    python bench_extract.py --shop 05gsm pages/05gsm/*.html
+    python bench_extract.py --config greenspark.json pages/greenspark/*.json --seconds 5
+
+Файлы *.json разбираются ApiJsonExtractor, остальные — HtmlExtractor.
+--config — JSON со строкой shop_parser_configs (для запуска без БД).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config_loader import ParserConfig, get_config_by_shop
+from extractors import ApiJsonExtractor, HtmlExtractor
+
+
+def load_pages(paths):
+    pages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        pages.append(json.loads(text) if path.endswith('.json') else text)
+    return pages
+
+
+def run(extract, pages, seconds: float) -> float:
+    """Извлечения в секунду: страницы по кругу в течение seconds"""
+    done = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for page in pages:
+            extract(page)
+        done += len(pages)
+    return done / (time.perf_counter() - start)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Extraction benchmark on stored pages')
+    arg_parser.add_argument('pages', nargs='+', help='Saved product pages (.html) or API responses (.json)')
+    source = arg_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--shop', help='Shop code (config from DB)')
+    source.add_argument('--config', help='JSON file with a shop_parser_configs row')
+    arg_parser.add_argument('--seconds', type=float, default=3.0, help='Duration of each run')
+    args = arg_parser.parse_args()
+
+    if args.shop:
+        config = get_config_by_shop(args.shop)
+        if config is None:
+            sys.exit(f"Config not found for shop: {args.shop}")
+    else:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = ParserConfig({'id': 0, 'domain_patterns': [], **json.load(f)})
+
+    pages = load_pages(args.pages)
+    is_json = args.pages[0].endswith('.json')
+
+    if is_json:
+        def baseline(page):
+            extractor = ApiJsonExtractor(config)
+            return extractor.extract_product_data(page)
+
+        plan = ApiJsonExtractor.for_config(config)
+        planned = plan.extract_product_data
+        print(f"Plan: {config.shop_code} api_json, {len(plan._steps)} paths")
+    else:
+        def baseline(page):
+            extractor = HtmlExtractor(config)
+            extractor.needs_dom = True
+            return extractor.extract_product_data(page)
+
+        plan = HtmlExtractor.for_config(config)
+        planned = plan.extract_product_data
+        print(f"Plan: {config.shop_code} html, selectors={len(plan._field_selectors)}, "
+              f"regexes={len(plan._field_regexes)}, DOM={'yes' if plan.needs_dom else 'no'}")
+
+    # Результаты должны совпадать
+    for page in pages:
+        if baseline(page) != planned(page):
+            print("WARNING: plan and baseline results differ")
+            break
+
+    print(f"Pages: {len(pages)}, {args.seconds:.0f}s per run")
+    base_rate = run(baseline, pages, args.seconds)
+    print(f"  baseline: {base_rate:10.0f} extractions/s")
+    plan_rate = run(planned, pages, args.seconds)
+    print(f"  plan:     {plan_rate:10.0f} extractions/s  (x{plan_rate / base_rate:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@
 
 import os
 import re
+import select
+import threading
+import time
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from typing import Optional, Dict, Any
@@ -20,6 +23,15 @@ DB_NAME = os.environ.get("DB_NAME", "db_greenspark")
 DB_USER = os.environ.get("DB_USER", "postgres")
 DB_PASSWORD = os.environ.get("DB_PASSWORD", "Mi31415926pSss!")
 
+# Кэш конфигов
+CONFIG_TTL = float(os.environ.get("PARSER_CONFIG_TTL", 300))  # Обновление снимка в фоне, сек (0 — только по NOTIFY)
+NEGATIVE_TTL = 300             # Сколько помнить домен без конфига, сек
+NEGATIVE_CACHE_MAX = 10000     # Защита от разрастания негативного кэша
+MISS_REFRESH_INTERVAL = 60     # Неизвестный домен обновляет снимок не чаще, сек
+NOTIFY_CHANNEL = "shop_parser_configs_changed"
+LISTEN_POLL = 30               # Таймаут select() в потоке LISTEN, сек
+LISTEN_RECONNECT_DELAY = 10
+
 
 def get_db():
     """Подключение к БД"""
@@ -58,6 +70,26 @@ class ParserConfig:
     def delay(self) -> float:
         return self.request_config.get('delay', 1.0)
 
+    @property
+    def burst(self) -> int:
+        """Сколько запросов подряд можно сделать без паузы delay (ёмкость token bucket)"""
+        return max(1, int(self.request_config.get('burst', 1)))
+
+    @property
+    def concurrency(self) -> int:
+        """Максимум одновременных запросов к магазину в parse_many"""
+        return max(1, int(self.request_config.get('concurrency', 4)))
+
+    @property
+    def cache_ttl(self) -> float:
+        """Сколько секунд результат парсинга считается свежим (0 — не кэшировать)"""
+        return float(self.request_config.get('cache_ttl', 60))
+
+    @property
+    def cache_stale_ttl(self) -> float:
+        """Сколько секунд после cache_ttl отдавать старый результат, обновляя его в фоне"""
+        return float(self.request_config.get('cache_stale_ttl', 300))
+
     @property
     def timeout(self) -> int:
         return self.request_config.get('timeout', 30)
@@ -75,111 +107,191 @@ class ParserConfig:
         return self.request_config.get('headers', {})
 
 
-class ConfigLoader:
-    """Загрузчик конфигураций из БД"""
+def normalize_domain(domain: str) -> str:
+    """Домен в ключ индекса: нижний регистр, без порта, точки в конце и www."""
+    domain = domain.lower().split(':', 1)[0].rstrip('.')
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain
 
-    def __init__(self):
+
+class ConfigLoader:
+    """
+    Загрузчик конфигураций из БД.
+
+    Все активные конфиги загружаются одним запросом в снимок:
+    индекс shop_code -> конфиг и индекс домен -> конфиг. URL ищется по домену и его
+    родительским доменам (shop.example.ru -> example.ru -> ru), самый длинный совпавший
+    паттерн побеждает. Неизвестные домены запоминаются в негативном кэше до следующего
+    обновления снимка. Обновление — по TTL в фоновом потоке (запросы в это время
+    обслуживаются старым снимком) или сразу по NOTIFY (см. start_listener),
+    так что в горячем пути к БД обращается только самый первый вызов.
+    """
+
+    def __init__(self, ttl: float = CONFIG_TTL):
+        self.ttl = ttl
         self._cache: Dict[str, ParserConfig] = {}
+        self._domains: Dict[str, ParserConfig] = {}
+        self._misses: Dict[str, float] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._listener: Optional[threading.Thread] = None
 
-    def get_config_by_shop_code(self, shop_code: str) -> Optional[ParserConfig]:
-        """Получить конфиг по коду магазина"""
-        if shop_code in self._cache:
-            return self._cache[shop_code]
+    # ── снимок ──
 
+    def _load_rows(self) -> list:
         conn = get_db()
         cur = conn.cursor(cursor_factory=RealDictCursor)
         try:
             cur.execute("""
                 SELECT * FROM shop_parser_configs
-                WHERE shop_code = %s AND is_active = true
-            """, (shop_code,))
-            row = cur.fetchone()
-            if row:
-                config = ParserConfig(dict(row))
-                self._cache[shop_code] = config
-                return config
-            return None
+                WHERE is_active = true
+                ORDER BY shop_code
+            """)
+            return cur.fetchall()
         finally:
             cur.close()
             conn.close()
 
-    def get_config_by_url(self, url: str) -> Optional[ParserConfig]:
-        """Найти конфиг по URL (сопоставление с domain_patterns)"""
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
+    def refresh(self) -> list:
+        """Перечитать все активные конфиги и атомарно подменить индексы"""
+        configs = [ParserConfig(dict(row)) for row in self._load_rows()]
 
-        # Убираем www.
-        if domain.startswith('www.'):
-            domain = domain[4:]
+        by_shop: Dict[str, ParserConfig] = {}
+        by_domain: Dict[str, ParserConfig] = {}
+        for config in configs:
+            by_shop[config.shop_code] = config
+            for pattern in config.domain_patterns or []:
+                # При дублировании домена выигрывает первый по shop_code — как раньше при скане
+                by_domain.setdefault(normalize_domain(pattern), config)
 
-        # Проверяем кэш
-        for config in self._cache.values():
-            if self._domain_matches(domain, config.domain_patterns):
-                return config
+        self._cache, self._domains = by_shop, by_domain
+        self._misses = {}
+        self._loaded_at = time.monotonic()
+        return configs
 
-        # Ищем в БД
-        conn = get_db()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+    def _refresh_in_background(self):
         try:
-            cur.execute("""
-                SELECT * FROM shop_parser_configs
-                WHERE is_active = true
-            """)
-            rows = cur.fetchall()
-
-            for row in rows:
-                config = ParserConfig(dict(row))
-                self._cache[config.shop_code] = config
-
-                if self._domain_matches(domain, config.domain_patterns):
-                    return config
-
-            return None
+            self.refresh()
+        except Exception as e:
+            print(f"Config refresh failed: {e}")
         finally:
-            cur.close()
-            conn.close()
-
-    def _domain_matches(self, domain: str, patterns: list) -> bool:
-        """Проверить соответствие домена паттернам"""
-        for pattern in patterns:
-            pattern = pattern.lower()
-            if pattern.startswith('www.'):
-                pattern = pattern[4:]
+            self._refreshing = False
+
+    def _ensure_fresh(self):
+        """Первый вызов грузит снимок синхронно; устаревший снимок обновляется в фоне"""
+        if self._loaded_at is None:
+            with self._lock:
+                if self._loaded_at is None:
+                    self.refresh()
+            return
+
+        if self.ttl and time.monotonic() - self._loaded_at > self.ttl:
+            self._start_background_refresh()
+
+    def _start_background_refresh(self):
+        if self._refreshing:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    # ── поиск ──
 
-            # Точное совпадение
-            if domain == pattern:
-                return True
+    def get_config_by_shop_code(self, shop_code: str) -> Optional[ParserConfig]:
+        """Получить конфиг по коду магазина"""
+        self._ensure_fresh()
+        return self._cache.get(shop_code)
 
-            # Поддомен
-            if domain.endswith('.' + pattern):
-                return True
+    def get_config_by_url(self, url: str) -> Optional[ParserConfig]:
+        """Найти конфиг по URL (домен и родительские домены по индексу domain_patterns)"""
+        self._ensure_fresh()
+        domain = normalize_domain(urlparse(url).netloc)
+        if not domain:
+            return None
 
-        return False
+        # Негативный кэш (сбрасывается при обновлении снимка)
+        misses = self._misses
+        expires = misses.get(domain)
+        if expires is not None:
+            if expires > time.monotonic():
+                return None
+            misses.pop(domain, None)
+
+        domains = self._domains
+        candidate = domain
+        while True:
+            config = domains.get(candidate)
+            if config is not None:
+                return config
+            dot = candidate.find('.')
+            if dot < 0:
+                break
+            candidate = candidate[dot + 1:]
+
+        # Новый домен без конфига: возможно, магазин только что добавили —
+        # снимок обновляется в фоне (не чаще MISS_REFRESH_INTERVAL), сам вызов к БД не ходит
+        if len(misses) >= NEGATIVE_CACHE_MAX:
+            misses.clear()
+        misses[domain] = time.monotonic() + NEGATIVE_TTL
+        if time.monotonic() - self._loaded_at > MISS_REFRESH_INTERVAL:
+            self._start_background_refresh()
+        return None
 
     def get_all_configs(self) -> list:
-        """Получить все активные конфиги"""
-        conn = get_db()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        try:
-            cur.execute("""
-                SELECT * FROM shop_parser_configs
-                WHERE is_active = true
-                ORDER BY shop_code
-            """)
-            rows = cur.fetchall()
-            configs = []
-            for row in rows:
-                config = ParserConfig(dict(row))
-                self._cache[config.shop_code] = config
-                configs.append(config)
-            return configs
-        finally:
-            cur.close()
-            conn.close()
+        """Получить все активные конфиги (всегда из БД, заодно обновляет снимок)"""
+        with self._lock:
+            return self.refresh()
 
     def clear_cache(self):
-        """Очистить кэш"""
-        self._cache.clear()
+        """Очистить кэш: следующий вызов заново загрузит снимок"""
+        with self._lock:
+            self._cache, self._domains, self._misses = {}, {}, {}
+            self._loaded_at = None
+
+    # ── LISTEN/NOTIFY ──
+
+    def start_listener(self, channel: str = NOTIFY_CHANNEL) -> bool:
+        """
+        Фоновый поток LISTEN на канале NOTIFY: при изменении shop_parser_configs
+        (триггер из schema.sql) снимок обновляется сразу, не дожидаясь TTL.
+        Если соединение рвётся, поток переподключается; TTL остаётся страховкой.
+        """
+        if self._listener is not None and self._listener.is_alive():
+            return False
+        self._listener = threading.Thread(target=self._listen, args=(channel,), daemon=True)
+        self._listener.start()
+        return True
+
+    def _listen(self, channel: str):
+        while True:
+            conn = None
+            try:
+                conn = get_db()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {channel}")
+                # Изменения между прошлым снимком и LISTEN не должны потеряться
+                self.refresh()
+                while True:
+                    if select.select([conn], [], [], LISTEN_POLL) == ([], [], []):
+                        continue
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        self.refresh()
+            except Exception as e:
+                print(f"Config listener error: {e}")
+                time.sleep(LISTEN_RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
 
 
 # Глобальный загрузчик
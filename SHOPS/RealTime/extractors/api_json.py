@@ -3,17 +3,44 @@ API JSON Extractor
 
 Извлечение данных из JSON API ответов.
 Поддерживает JSONPath-подобные выражения для навигации.
+
+Конфиг компилируется один раз в план извлечения (ApiJsonExtractor.for_config):
+пути json_paths разобраны на шаги, regex URL товара скомпилирован.
 """
 
 import re
 import json
+import weakref
 import httpx
-from typing import Optional, Dict, Any, List
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
 from urllib.parse import urlparse, urlencode
 
 
+@lru_cache(maxsize=1024)
+def parse_path(path: str) -> Tuple:
+    """Разобрать путь "a.b[0].c" на шаги ('a', 'b', 0, 'c') (результат кэшируется)"""
+    parts = []
+    # Разбиваем по точкам и скобкам
+    tokens = re.split(r'\.|\[|\]', path)
+
+    for token in tokens:
+        if not token:
+            continue
+        if token.isdigit():
+            parts.append(int(token))
+        elif token == '*':
+            parts.append('*')
+        else:
+            parts.append(token)
+
+    return tuple(parts)
+
+
 class ApiJsonExtractor:
-    """Извлекатель данных из JSON API"""
+    """Извлекатель данных из JSON API (план извлечения для одного ParserConfig)"""
+
+    _plans: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
 
     def __init__(self, config):
         """
@@ -24,6 +51,29 @@ class ApiJsonExtractor:
         self.api_config = config.api_config
         self.json_paths = config.json_paths
 
+        # План: скомпилированный regex URL и разобранные пути полей
+        url_regex = self.api_config.get('url_to_path_regex', '')
+        self._url_regex = re.compile(url_regex) if url_regex else None
+        self._steps = {
+            field: parse_path(path)
+            for field, path in self.json_paths.items()
+            if isinstance(path, str) and path
+        }
+        self._filter_steps = {}
+        for field, filter_key in (('price', 'price_path_filter'), ('price_wholesale', 'price_wholesale_filter')):
+            path = self.json_paths.get(field)
+            if path and self.json_paths.get(filter_key):
+                array_path, _, value_field = path.rpartition('.') if '.' in path else (path, '', '')
+                self._filter_steps[field] = (parse_path(array_path), value_field or None)
+
+    @classmethod
+    def for_config(cls, config) -> "ApiJsonExtractor":
+        """План для конфига: компилируется один раз и живёт, пока жив сам конфиг"""
+        plan = cls._plans.get(config)
+        if plan is None:
+            plan = cls._plans[config] = cls(config)
+        return plan
+
     def build_api_url(self, product_url: str) -> Optional[str]:
         """
         Построить URL для API запроса из URL товара.
@@ -45,7 +95,7 @@ class ApiJsonExtractor:
             return None
 
         # Извлекаем путь из URL товара
-        match = re.search(url_regex, product_url)
+        match = self._url_regex.search(product_url)
         if not match:
             return None
 
@@ -66,9 +116,9 @@ class ApiJsonExtractor:
         api_url = f"{base_url}{endpoint}?{query_string}"
         return api_url
 
-    def extract_value(self, data: Dict, path: str) -> Any:
+    def extract_value(self, data: Dict, path) -> Any:
         """
-        Извлечь значение по JSONPath-подобному пути.
+        Извлечь значение по JSONPath-подобному пути (строка или разобранные шаги).
 
         Поддерживаемые форматы:
         - "product.name" -> data["product"]["name"]
@@ -78,7 +128,7 @@ class ApiJsonExtractor:
         if not path or not data:
             return None
 
-        parts = self._parse_path(path)
+        parts = parse_path(path) if isinstance(path, str) else path
         current = data
 
         for part in parts:
@@ -105,21 +155,7 @@ class ApiJsonExtractor:
 
     def _parse_path(self, path: str) -> List:
         """Разобрать путь на части"""
-        parts = []
-        # Разбиваем по точкам и скобкам
-        tokens = re.split(r'\.|\[|\]', path)
-
-        for token in tokens:
-            if not token:
-                continue
-            if token.isdigit():
-                parts.append(int(token))
-            elif token == '*':
-                parts.append('*')
-            else:
-                parts.append(token)
-
-        return parts
+        return list(parse_path(path))
 
     def extract_with_filter(self, data: Dict, path: str, filter_config: Dict) -> Any:
         """
@@ -131,7 +167,11 @@ class ApiJsonExtractor:
         array_path = path.rsplit('.', 1)[0] if '.' in path else path
         value_field = path.rsplit('.', 1)[1] if '.' in path else None
 
-        items = self.extract_value(data, array_path)
+        return self._extract_filtered(data, parse_path(array_path), value_field, filter_config)
+
+    def _extract_filtered(self, data: Dict, array_steps: Tuple, value_field: Optional[str],
+                          filter_config: Dict) -> Any:
+        items = self.extract_value(data, array_steps)
         if not isinstance(items, list):
             return None
 
@@ -163,52 +203,42 @@ class ApiJsonExtractor:
         }
         """
         result = {}
+        steps = self._steps
 
         # Цена
-        price_path = self.json_paths.get('price')
-        price_filter = self.json_paths.get('price_path_filter')
-
-        if price_path:
-            if price_filter:
-                price = self.extract_with_filter(json_data, price_path, price_filter)
-            else:
-                price = self.extract_value(json_data, price_path)
-
-            result['price'] = self._to_float(price)
+        if 'price' in steps:
+            result['price'] = self._to_float(self._extract_price(json_data, 'price', 'price_path_filter'))
 
         # Оптовая цена
-        wholesale_path = self.json_paths.get('price_wholesale')
-        wholesale_filter = self.json_paths.get('price_wholesale_filter')
-
-        if wholesale_path:
-            if wholesale_filter:
-                wholesale = self.extract_with_filter(json_data, wholesale_path, wholesale_filter)
-            else:
-                wholesale = self.extract_value(json_data, wholesale_path)
-
-            result['price_wholesale'] = self._to_float(wholesale)
+        if 'price_wholesale' in steps:
+            result['price_wholesale'] = self._to_float(
+                self._extract_price(json_data, 'price_wholesale', 'price_wholesale_filter'))
 
         # Наличие
-        stock_path = self.json_paths.get('stock')
-        if stock_path:
-            stock_value = self.extract_value(json_data, stock_path)
+        if 'stock' in steps:
+            stock_value = self.extract_value(json_data, steps['stock'])
             result['in_stock'] = self._check_in_stock(stock_value)
             result['stock_quantity'] = self._to_stock_quantity(stock_value)
 
         # Артикул
-        article_path = self.json_paths.get('article')
-        if article_path:
-            article = self.extract_value(json_data, article_path)
+        if 'article' in steps:
+            article = self.extract_value(json_data, steps['article'])
             result['article'] = str(article).strip() if article else None
 
         # Название
-        name_path = self.json_paths.get('name')
-        if name_path:
-            name = self.extract_value(json_data, name_path)
+        if 'name' in steps:
+            name = self.extract_value(json_data, steps['name'])
             result['name'] = str(name).strip() if name else None
 
         return result
 
+    def _extract_price(self, json_data: Dict, field: str, filter_key: str) -> Any:
+        """Цена по заранее разобранному пути (с фильтром массива, если он задан)"""
+        if field in self._filter_steps:
+            array_steps, value_field = self._filter_steps[field]
+            return self._extract_filtered(json_data, array_steps, value_field, self.json_paths[filter_key])
+        return self.extract_value(json_data, self._steps[field])
+
     def _to_float(self, value) -> Optional[float]:
         """Преобразовать в float"""
         if value is None:
@@ -3,15 +3,26 @@ HTML Extractor
 
 Извлечение данных из HTML страниц.
 Поддерживает CSS селекторы и regex паттерны.
+
+Конфиг компилируется один раз в план извлечения (HtmlExtractor.for_config):
+regex и CSS селекторы компилируются заранее, а если ни одно поле не требует
+селекторов, BeautifulSoup не строится вовсе — хватает regex по сырому HTML.
 """
 
 import re
+import weakref
 from typing import Optional, Dict, Any
+
+import soupsieve
 from bs4 import BeautifulSoup
 
+FIELDS = ('price', 'price_wholesale', 'article', 'name')
+
 
 class HtmlExtractor:
-    """Извлекатель данных из HTML"""
+    """Извлекатель данных из HTML (план извлечения для одного ParserConfig)"""
+
+    _plans: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
 
     def __init__(self, config):
         """
@@ -22,22 +33,55 @@ class HtmlExtractor:
         self.selectors = config.html_selectors
         self.patterns = config.regex_patterns
 
-    def extract_by_selector(self, soup: BeautifulSoup, selector: str) -> Optional[str]:
-        """Извлечь текст по CSS селектору"""
+        # План: скомпилированные селекторы и regex по полям
+        self._field_selectors = {
+            field: soupsieve.compile(self.selectors[field])
+            for field in FIELDS if self.selectors.get(field)
+        }
+        self._field_regexes = {
+            field: re.compile(self.patterns[field], re.IGNORECASE)
+            for field in FIELDS if self.patterns.get(field)
+        }
+        in_stock_class = self.selectors.get('in_stock_class')
+        self._in_stock_selector = soupsieve.compile(f'.{in_stock_class}') if in_stock_class else None
+        stock_selector = self.selectors.get('stock')
+        self._stock_selector = soupsieve.compile(stock_selector) if stock_selector else None
+        self._out_texts = [t.lower() for t in self.selectors.get('out_of_stock_text', [])]
+        self._in_texts = [t.lower() for t in self.selectors.get('in_stock_text', [])]
+
+        # DOM нужен только если есть хоть один селектор для карточки товара
+        self.needs_dom = bool(self._field_selectors or self._in_stock_selector or self._stock_selector)
+
+    @classmethod
+    def for_config(cls, config) -> "HtmlExtractor":
+        """План для конфига: компилируется один раз и живёт, пока жив сам конфиг"""
+        plan = cls._plans.get(config)
+        if plan is None:
+            plan = cls._plans[config] = cls(config)
+        return plan
+
+    def extract_by_selector(self, soup: BeautifulSoup, selector) -> Optional[str]:
+        """Извлечь текст по CSS селектору (строка или скомпилированный soupsieve)"""
         if not selector:
             return None
 
-        element = soup.select_one(selector)
+        if isinstance(selector, str):
+            element = soup.select_one(selector)
+        else:
+            element = selector.select_one(soup)
         if element:
             return element.get_text(strip=True)
         return None
 
-    def extract_by_regex(self, html: str, pattern: str) -> Optional[str]:
-        """Извлечь значение по regex паттерну"""
+    def extract_by_regex(self, html: str, pattern) -> Optional[str]:
+        """Извлечь значение по regex паттерну (строка или скомпилированный re.Pattern)"""
         if not pattern:
             return None
 
-        match = re.search(pattern, html, re.IGNORECASE)
+        if isinstance(pattern, str):
+            match = re.search(pattern, html, re.IGNORECASE)
+        else:
+            match = pattern.search(html)
         if match:
             return match.group(1) if match.groups() else match.group(0)
         return None
@@ -55,7 +99,7 @@ class HtmlExtractor:
             "name": str
         }
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = BeautifulSoup(html, 'html.parser') if self.needs_dom else None
         result = {}
 
         # Цена
@@ -79,18 +123,18 @@ class HtmlExtractor:
 
         return result
 
-    def _extract_field(self, soup: BeautifulSoup, html: str, field: str) -> Optional[str]:
+    def _extract_field(self, soup: Optional[BeautifulSoup], html: str, field: str) -> Optional[str]:
         """Извлечь поле (сначала селектор, потом regex)"""
         # Пробуем CSS селектор
-        selector = self.selectors.get(field)
-        if selector:
+        selector = self._field_selectors.get(field)
+        if selector is not None:
             value = self.extract_by_selector(soup, selector)
             if value:
                 return value
 
         # Пробуем regex
-        pattern = self.patterns.get(field)
-        if pattern:
+        pattern = self._field_regexes.get(field)
+        if pattern is not None:
             value = self.extract_by_regex(html, pattern)
             if value:
                 return value
@@ -121,32 +165,28 @@ class HtmlExtractor:
         except ValueError:
             return None
 
-    def _check_in_stock(self, soup: BeautifulSoup, html: str) -> bool:
+    def _check_in_stock(self, soup: Optional[BeautifulSoup], html: str) -> bool:
         """Проверить наличие товара"""
         # Проверяем CSS класс
-        in_stock_class = self.selectors.get('in_stock_class')
-        if in_stock_class:
-            element = soup.select_one(f'.{in_stock_class}')
+        if self._in_stock_selector is not None:
+            element = self._in_stock_selector.select_one(soup)
             if element:
                 return True
 
         # Проверяем селектор наличия
-        stock_selector = self.selectors.get('stock')
-        if stock_selector:
-            element = soup.select_one(stock_selector)
+        if self._stock_selector is not None:
+            element = self._stock_selector.select_one(soup)
             if element:
                 text = element.get_text(strip=True).lower()
 
                 # Проверяем out_of_stock_text
-                out_texts = self.selectors.get('out_of_stock_text', [])
-                for out_text in out_texts:
-                    if out_text.lower() in text:
+                for out_text in self._out_texts:
+                    if out_text in text:
                         return False
 
                 # Проверяем in_stock_text
-                in_texts = self.selectors.get('in_stock_text', [])
-                for in_text in in_texts:
-                    if in_text.lower() in text:
+                for in_text in self._in_texts:
+                    if in_text in text:
                         return True
 
         # По умолчанию - в наличии, если есть цена
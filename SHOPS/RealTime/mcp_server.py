@@ -17,18 +17,43 @@ import sys
 # Добавляем текущую директорию в path для импортов
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from contextlib import asynccontextmanager
 from typing import Optional
 from mcp.server.fastmcp import FastMCP
 
 from parser import UniversalParser, ParseResult
-from config_loader import get_all_configs, get_config_by_url, get_config_by_shop, ParserConfig
+from config_loader import get_all_configs, get_config_by_url, get_config_by_shop, get_loader, ParserConfig
+from serving import ParseService, RequestLog, REQUEST_LOG_ENABLED
+from metrics import get_metrics, serve_metrics
+
+# Прогрев клиентов магазинов при старте (--warm-up)
+WARM_UP = os.environ.get("PARSER_WARM_UP", "0") == "1"
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """Прогрев в event loop сервера: клиенты и соединения привязаны к нему"""
+    if WARM_UP:
+        report = await get_parser().warm_up()
+        failed = {code: r["errors"] for code, r in report.items() if r["errors"]}
+        # stdout занят протоколом MCP (stdio) — отчёт в stderr
+        print(f"Warm-up: {len(report)} shops, failed: {failed or 'none'}", file=sys.stderr)
+    try:
+        yield {}
+    finally:
+        if _service is not None and _service.request_log is not None:
+            await _service.request_log.close()
+
 
 # Создаем MCP сервер
-mcp = FastMCP("realtime-parser")
+mcp = FastMCP("realtime-parser", lifespan=lifespan)
 
 # Глобальный парсер
 _parser: Optional[UniversalParser] = None
 
+# Слой обслуживания: кэш результатов + single-flight + бюджет магазинов
+_service: Optional[ParseService] = None
+
 
 def get_parser() -> UniversalParser:
     """Получить или создать парсер"""
@@ -38,16 +63,28 @@ def get_parser() -> UniversalParser:
     return _parser
 
 
+def get_service() -> ParseService:
+    """Получить или создать слой обслуживания (общий парсер)"""
+    global _service
+    if _service is None:
+        _service = ParseService(get_parser(), request_log=RequestLog() if REQUEST_LOG_ENABLED else None)
+    return _service
+
+
 @mcp.tool()
-def parse_product_realtime(url: str) -> dict:
+async def parse_product_realtime(url: str, max_age: Optional[float] = None) -> dict:
     """
     Парсит актуальную цену и наличие товара по URL.
 
     Автоматически определяет магазин по домену URL
     и использует соответствующую конфигурацию парсера.
+    Недавний результат отдаётся из кэша (TTL задаётся на магазин),
+    возраст результата — в cache_age_s. Одновременные запросы одного URL
+    обслуживаются одной загрузкой.
 
     Args:
         url: Полный URL страницы товара
+        max_age: Не отдавать результат старше N секунд (по умолчанию — TTL магазина)
 
     Returns:
         {
@@ -60,16 +97,16 @@ def parse_product_realtime(url: str) -> dict:
             "name": "Название товара",
             "shop_code": "greenspark",
             "error": null,
-            "response_time_ms": 250
+            "response_time_ms": 250,
+            "cache": "miss",        # miss | fresh | stale (stale — уже обновляется в фоне)
+            "cache_age_s": 0.0
         }
     """
-    parser = get_parser()
-    result = parser.parse(url)
-    return result.to_dict()
+    return await get_service().parse(url, max_age)
 
 
 @mcp.tool()
-def parse_product_by_shop(shop_code: str, url: str) -> dict:
+async def parse_product_by_shop(shop_code: str, url: str, max_age: Optional[float] = None) -> dict:
     """
     Парсит товар с явным указанием магазина.
 
@@ -79,13 +116,36 @@ def parse_product_by_shop(shop_code: str, url: str) -> dict:
     Args:
         shop_code: Код магазина (greenspark, 05gsm, taggsm и т.д.)
         url: URL страницы товара
+        max_age: Не отдавать результат старше N секунд
 
     Returns:
         Аналогично parse_product_realtime
     """
-    parser = get_parser()
-    result = parser.parse_by_shop(shop_code, url)
-    return result.to_dict()
+    return await get_service().parse_by_shop(shop_code, url, max_age)
+
+
+@mcp.tool()
+async def parse_products_realtime(urls: list) -> list:
+    """
+    Парсит пачку товаров (корзину) по списку URL.
+
+    URL разных магазинов загружаются параллельно, для каждого магазина
+    соблюдается его delay. Результаты идут в порядке готовности,
+    кэш и объединение одинаковых запросов — как у parse_product_realtime.
+
+    Args:
+        urls: Список URL страниц товаров
+
+    Returns:
+        [
+            {"url": "https://...", "success": true, "price": 5500.0, ...},
+            ...
+        ]
+    """
+    return [
+        {"url": url, **data}
+        async for url, data in get_service().parse_many(urls)
+    ]
 
 
 @mcp.tool()
@@ -196,6 +256,34 @@ def check_url_parser(url: str) -> dict:
     }
 
 
+@mcp.tool()
+def get_parser_metrics(shop_code: Optional[str] = None) -> dict:
+    """
+    Метрики загрузок по магазинам (с момента запуска сервера).
+
+    Args:
+        shop_code: Только один магазин (по умолчанию — все)
+
+    Returns:
+        {
+            "shops": {
+                "greenspark": {
+                    "requests": 120, "success": 114, "success_rate": 0.95,
+                    "errors": {"http_403": 4, "ReadTimeout": 2},
+                    "paths": {"api": 110, "html_fallback": 10},
+                    "latency_ms": {"count": 120, "avg": 310.5, "p50": 250.0, "p95": 1000.0, "buckets": {...}},
+                    "bytes": {...}, "bytes_total": 5400000
+                }
+            },
+            "serving": {"cache": {...}, "single_flight": {...}}
+        }
+    """
+    return {
+        "shops": get_metrics().snapshot(shop_code),
+        "serving": get_service().stats(),
+    }
+
+
 # Ресурс с информацией о сервере
 @mcp.resource("parser://info")
 def get_parser_info() -> str:
@@ -214,9 +302,11 @@ def get_parser_info() -> str:
 Инструменты:
 - parse_product_realtime(url) - парсить товар по URL
 - parse_product_by_shop(shop_code, url) - парсить с указанием магазина
+- parse_products_realtime(urls) - парсить пачку URL параллельно
 - get_parser_configs() - список всех парсеров
 - test_parser_config(shop_code) - тест конфигурации
 - check_url_parser(url) - проверить доступность парсера
+- get_parser_metrics(shop_code) - метрики загрузок по магазинам
 """
     return info
 
@@ -229,8 +319,21 @@ if __name__ == "__main__":
                            help='Transport type (default: stdio)')
     arg_parser.add_argument('--port', type=int, default=8000,
                            help='Port for SSE transport (default: 8000)')
+    arg_parser.add_argument('--metrics-port', type=int, default=int(os.environ.get('METRICS_PORT', 0)),
+                           help='Port for Prometheus /metrics endpoint (default: off)')
+    arg_parser.add_argument('--warm-up', action='store_true',
+                           help='Open connections to all active shops at startup')
     args = arg_parser.parse_args()
 
+    if args.warm_up:
+        WARM_UP = True
+
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+
+    # Конфиги обновляются по NOTIFY из shop_parser_configs (TTL остаётся страховкой)
+    get_loader().start_listener()
+
     if args.transport == 'stdio':
         mcp.run(transport='stdio')
     else:
@@ -0,0 +1,197 @@
+"""
+Метрики real-time парсинга по магазинам
+
+Каждая загрузка у магазина (не ответ из кэша) записывается в реестр:
+- гистограмма времени ответа (мс) и объёма загруженного (байт)
+- успехи и ошибки по классам (http_403, ReadTimeout, bad_json, no_data, ...)
+- путь извлечения: api / html / html_fallback
+
+По этим данным видно медленные и банящие магазины и подбираются
+request_config.cache_ttl / delay / concurrency.
+
+Доступ: get_metrics().snapshot() (MCP tool get_parser_metrics) и
+текст в формате Prometheus на http://host:METRICS_PORT/metrics (serve_metrics).
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+BYTES_BUCKETS = (1_000, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000)
+
+PATHS = ("api", "html", "html_fallback")
+
+
+class Histogram:
+    """Накопительная гистограмма с фиксированными границами (как в Prometheus)"""
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # последняя корзина — +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Оценка квантиля — верхняя граница корзины, в которую он попал"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return float(self.bounds[i]) if i < len(self.bounds) else float("inf")
+        return float("inf")
+
+    def cumulative(self) -> List[int]:
+        out, total = [], 0
+        for n in self.counts:
+            total += n
+            out.append(total)
+        return out
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 1) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": {
+                (str(b) if i < len(self.bounds) else "+Inf"): n
+                for i, (b, n) in enumerate(zip(list(self.bounds) + [None], self.cumulative()))
+            },
+        }
+
+
+class ShopMetrics:
+    def __init__(self):
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.bytes = Histogram(BYTES_BUCKETS)
+        self.success = 0
+        self.errors: Dict[str, int] = {}
+        self.paths: Dict[str, int] = {}
+
+    def to_dict(self) -> dict:
+        total = self.success + sum(self.errors.values())
+        return {
+            "requests": total,
+            "success": self.success,
+            "success_rate": round(self.success / total, 3) if total else None,
+            "errors": dict(sorted(self.errors.items(), key=lambda kv: -kv[1])),
+            "paths": dict(self.paths),
+            "latency_ms": self.latency_ms.to_dict(),
+            "bytes": self.bytes.to_dict(),
+            "bytes_total": int(self.bytes.sum),
+        }
+
+
+class Metrics:
+    """Потокобезопасный реестр метрик по shop_code"""
+
+    def __init__(self):
+        self._shops: Dict[str, ShopMetrics] = {}
+        self._lock = threading.Lock()
+
+    def record(self, shop_code: Optional[str], success: bool, latency_ms: Optional[int],
+               error_class: Optional[str] = None, path: Optional[str] = None, bytes_fetched: int = 0):
+        shop_code = shop_code or "_unknown"
+        with self._lock:
+            shop = self._shops.get(shop_code)
+            if shop is None:
+                shop = self._shops[shop_code] = ShopMetrics()
+            if success:
+                shop.success += 1
+            else:
+                error_class = error_class or "error"
+                shop.errors[error_class] = shop.errors.get(error_class, 0) + 1
+            if path:
+                shop.paths[path] = shop.paths.get(path, 0) + 1
+            if latency_ms is not None:
+                shop.latency_ms.observe(latency_ms)
+            if bytes_fetched:
+                shop.bytes.observe(bytes_fetched)
+
+    def record_result(self, result):
+        """Записать ParseResult (error_class, path, bytes_fetched заполняет парсер)"""
+        self.record(result.shop_code, result.success, result.response_time_ms,
+                    result.error_class, result.path, result.bytes_fetched)
+
+    def snapshot(self, shop_code: Optional[str] = None) -> dict:
+        with self._lock:
+            if shop_code is not None:
+                shop = self._shops.get(shop_code)
+                return {shop_code: shop.to_dict()} if shop else {}
+            return {code: shop.to_dict() for code, shop in sorted(self._shops.items())}
+
+    def reset(self):
+        with self._lock:
+            self._shops.clear()
+
+    def prometheus(self) -> str:
+        """Текст в формате Prometheus exposition"""
+        lines = [
+            "# TYPE realtime_parser_requests_total counter",
+            "# TYPE realtime_parser_errors_total counter",
+            "# TYPE realtime_parser_path_total counter",
+            "# TYPE realtime_parser_latency_ms histogram",
+            "# TYPE realtime_parser_response_bytes histogram",
+        ]
+        with self._lock:
+            for code, shop in sorted(self._shops.items()):
+                lines.append(f'realtime_parser_requests_total{{shop="{code}",outcome="success"}} {shop.success}')
+                lines.append(f'realtime_parser_requests_total{{shop="{code}",outcome="failure"}} '
+                             f'{sum(shop.errors.values())}')
+                for error_class, n in sorted(shop.errors.items()):
+                    lines.append(f'realtime_parser_errors_total{{shop="{code}",class="{error_class}"}} {n}')
+                for path, n in sorted(shop.paths.items()):
+                    lines.append(f'realtime_parser_path_total{{shop="{code}",path="{path}"}} {n}')
+                for name, hist in (("realtime_parser_latency_ms", shop.latency_ms),
+                                   ("realtime_parser_response_bytes", shop.bytes)):
+                    for bound, n in zip(list(hist.bounds) + ["+Inf"], hist.cumulative()):
+                        lines.append(f'{name}_bucket{{shop="{code}",le="{bound}"}} {n}')
+                    lines.append(f'{name}_sum{{shop="{code}"}} {hist.sum:g}')
+                    lines.append(f'{name}_count{{shop="{code}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+
+# Глобальный реестр
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Metrics:
+    """Получить глобальный реестр метрик"""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    HTTP эндпоинт /metrics в фоновом потоке (работает и при stdio транспорте MCP).
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = get_metrics().prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
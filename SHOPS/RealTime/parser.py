@@ -9,14 +9,54 @@ import os
 import re
 import json
 import time
+import asyncio
+import contextlib
+import socket
 import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Iterable, List, Tuple
 from dataclasses import dataclass
 from urllib.parse import urlparse
 
-from config_loader import get_config_by_url, get_config_by_shop, ParserConfig
+from config_loader import get_config_by_url, get_config_by_shop, get_all_configs, ParserConfig
 from extractors.api_json import ApiJsonExtractor
 from extractors.html import HtmlExtractor
+from metrics import get_metrics
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "application/json, text/html, */*",
+    "Accept-Language": "ru,en;q=0.9",
+}
+
+PARSE_MANY_CONCURRENCY = 20  # Общий предел одновременных запросов в parse_many (по всем магазинам)
+KEEPALIVE_EXPIRY = 60        # Сколько держать простаивающее соединение с магазином, сек (httpx по умолчанию — 5)
+WARM_UP_TIMEOUT = 10         # Предел на прогрев одного магазина, сек
+
+# Универсальные regex для HTML fallback (когда API недоступен)
+FALLBACK_PRICE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'"price":\s*(\d+(?:\.\d+)?)',  # JSON в HTML
+    r'data-price="(\d+(?:\.\d+)?)"',  # data-атрибут
+    r'itemprop="price"\s+content="(\d+(?:\.\d+)?)"',  # microdata
+    r'class="[^"]*price[^"]*"[^>]*>[\s\S]*?(\d[\d\s]*)\s*(?:₽|руб|р\.)',  # текст с ценой
+)]
+FALLBACK_ARTICLE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'"article":\s*"([^"]+)"',  # JSON
+    r'Артикул[:\s]*</?\w+[^>]*>?\s*([A-ZА-Яa-zа-я]{2,3}[-\s]?\d+)',  # Текст
+    r'data-article="([^"]+)"',  # data-атрибут
+    r'itemprop="sku"[^>]*>([^<]+)',  # microdata
+)]
+FALLBACK_NAME_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'"name":\s*"([^"]+)"',  # JSON
+    r'<h1[^>]*>([^<]+)</h1>',  # H1
+    r'itemprop="name"[^>]*>([^<]+)',  # microdata
+)]
+FALLBACK_OUT_OF_STOCK_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'нет в наличии',
+    r'под заказ',
+    r'отсутствует',
+    r'"availability":\s*"OutOfStock"',
+    r'class="[^"]*out-of-stock',
+)]
 
 
 @dataclass
@@ -32,6 +72,10 @@ class ParseResult:
     shop_code: Optional[str] = None
     error: Optional[str] = None
     response_time_ms: Optional[int] = None
+    # Для метрик (в to_dict не входят)
+    error_class: Optional[str] = None
+    path: Optional[str] = None
+    bytes_fetched: int = 0
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -48,6 +92,84 @@ class ParseResult:
         }
 
 
+_ssl_context = None
+
+
+def shared_ssl_context():
+    """
+    Один SSLContext на все клиенты: httpx иначе заново грузит CA bundle на каждый клиент
+    (~40 мс), а в общем контексте переиспользуются и настройки TLS.
+    """
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = httpx.create_ssl_context()
+    return _ssl_context
+
+
+def warm_up_hosts(config: ParserConfig) -> List[str]:
+    """Хосты магазина, к которым идут запросы: API, test_url и основной домен"""
+    hosts = []
+    candidates = [config.api_config.get('base_url'), config.test_url]
+    if config.domain_patterns:
+        candidates.append(f"https://{config.domain_patterns[0]}")
+    for candidate in candidates:
+        if not candidate:
+            continue
+        parsed = urlparse(candidate)
+        origin = f"{parsed.scheme or 'https'}://{parsed.netloc}"
+        if parsed.netloc and origin not in hosts:
+            hosts.append(origin)
+    return hosts
+
+
+class TokenBucket:
+    """
+    Асинхронный token bucket: rate токенов в секунду, в запасе не больше capacity.
+    Ожидание токена — asyncio.sleep, поэтому другие магазины в это время работают.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def for_config(cls, config: ParserConfig) -> "TokenBucket":
+        """Bucket по request_config магазина: один запрос в delay сек, burst подряд"""
+        rate = 1.0 / config.delay if config.delay > 0 else 0.0
+        return cls(rate, config.burst)
+
+    async def acquire(self):
+        """Забрать токен, при необходимости дождавшись его (очередь ожидающих — FIFO)"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._tokens = 0.0
+                self._updated = time.monotonic()
+            else:
+                self._tokens -= 1
+
+
+def _drop_connections(client: httpx.AsyncClient):
+    """Оборвать keep-alive соединения клиента, чей event loop уже остановлен"""
+    # У httpx нет публичного доступа к пулу: внутренности httpcore, всё через getattr
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    for connection in list(getattr(pool, "connections", ())):
+        stream = getattr(getattr(connection, "_connection", None), "_network_stream", None)
+        sock = stream.get_extra_info("socket") if stream is not None else None
+        if sock is None:
+            continue
+        with contextlib.suppress(OSError):
+            sock.shutdown(socket.SHUT_RDWR)
+
+
 class UniversalParser:
     """Универсальный парсер товаров"""
 
@@ -60,34 +182,94 @@ class UniversalParser:
         self._clients: Dict[str, httpx.Client] = {}
         self._last_request: Dict[str, float] = {}
 
-    def _get_client(self, config: ParserConfig) -> httpx.Client:
-        """Получить или создать HTTP клиент для магазина"""
-        if config.shop_code in self._clients:
-            return self._clients[config.shop_code]
+        # Асинхронная часть (parse_many): клиенты привязаны к event loop, в котором созданы
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._shop_slots: Dict[str, asyncio.Semaphore] = {}
 
+    def _client_kwargs(self, config: ParserConfig) -> Dict[str, Any]:
+        """Общие параметры httpx.Client / httpx.AsyncClient для магазина"""
         # Загружаем cookies
         cookies = {}
         if config.cookies_required:
             cookies = self._load_cookies(config)
 
         # Формируем headers
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Accept": "application/json, text/html, */*",
-            "Accept-Language": "ru,en;q=0.9",
-        }
+        headers = dict(DEFAULT_HEADERS)
         headers.update(config.headers)
 
-        client = httpx.Client(
-            timeout=config.timeout,
-            headers=headers,
-            cookies=cookies,
-            follow_redirects=True
-        )
+        return {
+            "timeout": config.timeout,
+            "headers": headers,
+            "cookies": cookies,
+            "follow_redirects": True,
+            "verify": shared_ssl_context(),
+        }
+
+    def _get_client(self, config: ParserConfig) -> httpx.Client:
+        """Получить или создать HTTP клиент для магазина"""
+        if config.shop_code in self._clients:
+            return self._clients[config.shop_code]
+
+        client = httpx.Client(**self._client_kwargs(config))
 
         self._clients[config.shop_code] = client
         return client
 
+    def _bind_loop(self):
+        """Асинхронные клиенты и семафоры нельзя переносить между event loop'ами"""
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._release_async_clients(self._async_loop)
+            self._shop_slots.clear()
+            for bucket in self._buckets.values():
+                bucket._lock = asyncio.Lock()
+            self._async_loop = loop
+
+    def _release_async_clients(self, old_loop: Optional[asyncio.AbstractEventLoop]):
+        """
+        Освободить клиенты прошлого event loop. Если он ещё работает (в другом потоке) —
+        aclose() выполняется в нём. Если уже остановлен (asyncio.run завершился без aclose),
+        закрыть клиент в новом loop нельзя: соединения обрываются shutdown() сокета,
+        дескрипторы освобождаются вместе с транспортами при сборке мусора.
+        """
+        clients = list(self._async_clients.values())
+        self._async_clients.clear()
+        for client in clients:
+            if old_loop is not None and old_loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), old_loop)
+            else:
+                _drop_connections(client)
+
+    def _get_async_client(self, config: ParserConfig) -> httpx.AsyncClient:
+        """Получить или создать асинхронный HTTP клиент для магазина (keep-alive пул на магазин)"""
+        self._bind_loop()
+        if config.shop_code in self._async_clients:
+            return self._async_clients[config.shop_code]
+
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=config.concurrency,
+                                max_keepalive_connections=config.concurrency,
+                                keepalive_expiry=KEEPALIVE_EXPIRY),
+            **self._client_kwargs(config)
+        )
+
+        self._async_clients[config.shop_code] = client
+        return client
+
+    def _get_bucket(self, config: ParserConfig) -> TokenBucket:
+        """Token bucket магазина живёт между вызовами parse_many — повторный вызов не даёт всплеска"""
+        if config.shop_code not in self._buckets:
+            self._buckets[config.shop_code] = TokenBucket.for_config(config)
+        return self._buckets[config.shop_code]
+
+    def _get_shop_slots(self, config: ParserConfig) -> asyncio.Semaphore:
+        self._bind_loop()
+        if config.shop_code not in self._shop_slots:
+            self._shop_slots[config.shop_code] = asyncio.Semaphore(config.concurrency)
+        return self._shop_slots[config.shop_code]
+
     def _load_cookies(self, config: ParserConfig) -> dict:
         """Загрузить cookies для магазина"""
         source = config.cookies_source
@@ -144,6 +326,10 @@ class UniversalParser:
                 error=f"No parser config found for URL: {url}"
             )
 
+        return self._parse_with_config(url, config, start_time)
+
+    def _parse_with_config(self, url: str, config: ParserConfig, start_time: float) -> ParseResult:
+        """Общая часть parse / parse_by_shop: загрузка, извлечение, запись метрик"""
         try:
             self._rate_limit(config)
 
@@ -152,27 +338,27 @@ class UniversalParser:
             elif config.parser_type == 'html':
                 result = self._parse_html(url, config)
             else:
-                return ParseResult(
+                result = ParseResult(
                     success=False,
-                    shop_code=config.shop_code,
-                    error=f"Unknown parser type: {config.parser_type}"
+                    error=f"Unknown parser type: {config.parser_type}",
+                    error_class="unknown_parser_type"
                 )
 
-            result.shop_code = config.shop_code
-            result.response_time_ms = int((time.time() - start_time) * 1000)
-            return result
-
         except Exception as e:
-            return ParseResult(
+            result = ParseResult(
                 success=False,
-                shop_code=config.shop_code,
                 error=str(e),
-                response_time_ms=int((time.time() - start_time) * 1000)
+                error_class=type(e).__name__
             )
 
+        result.shop_code = config.shop_code
+        result.response_time_ms = int((time.time() - start_time) * 1000)
+        get_metrics().record_result(result)
+        return result
+
     def _parse_api_json(self, url: str, config: ParserConfig, fallback_to_html: bool = True) -> ParseResult:
         """Парсинг через JSON API с fallback на HTML"""
-        extractor = ApiJsonExtractor(config)
+        extractor = ApiJsonExtractor.for_config(config)
         client = self._get_client(config)
 
         # Строим URL API
@@ -182,12 +368,52 @@ class UniversalParser:
                 return self._parse_html_fallback(url, config)
             return ParseResult(
                 success=False,
-                error="Failed to build API URL from product URL"
+                error="Failed to build API URL from product URL",
+                error_class="no_api_url"
             )
 
         # Запрос к API
         response = client.get(api_url)
+        result = self._api_result(extractor, response, fallback_to_html)
+        if result is None:
+            result = self._parse_html_fallback(url, config)
+            result.bytes_fetched += len(response.content)
+            return result
+        return self._tag(result, 'api', response)
+
+    def _parse_html(self, url: str, config: ParserConfig) -> ParseResult:
+        """Парсинг через HTML"""
+        client = self._get_client(config)
+
+        # Запрос страницы
+        response = client.get(url)
+        return self._tag(self._html_result(config, response), 'html', response)
+
+    def _parse_html_fallback(self, url: str, config: ParserConfig) -> ParseResult:
+        """
+        Fallback парсинг через HTML с regex.
+        Используется когда API недоступен.
+        """
+        client = self._get_client(config)
 
+        # Запрос страницы товара напрямую
+        response = client.get(url)
+        return self._tag(self._fallback_result(response), 'html_fallback', response)
+
+    # ── Разбор ответов (общий для синхронного и асинхронного пути) ──
+
+    @staticmethod
+    def _tag(result: ParseResult, path: str, response: httpx.Response) -> ParseResult:
+        """Отметить путь извлечения, объём ответа и класс HTTP ошибки (для метрик)"""
+        result.path = path
+        result.bytes_fetched += len(response.content)
+        if not result.success and result.error_class is None and response.status_code != 200:
+            result.error_class = f"http_{response.status_code}"
+        return result
+
+    def _api_result(self, extractor: ApiJsonExtractor, response: httpx.Response,
+                    fallback_to_html: bool) -> Optional[ParseResult]:
+        """Результат по ответу API. None — API вернул не JSON, нужен fallback на HTML."""
         if response.status_code != 200:
             return ParseResult(
                 success=False,
@@ -198,10 +424,11 @@ class UniversalParser:
         if 'application/json' not in content_type:
             # API вернул HTML вместо JSON - пробуем fallback
             if fallback_to_html:
-                return self._parse_html_fallback(url, config)
+                return None
             return ParseResult(
                 success=False,
-                error=f"Expected JSON, got {content_type}"
+                error=f"Expected JSON, got {content_type}",
+                error_class="not_json"
             )
 
         try:
@@ -209,7 +436,8 @@ class UniversalParser:
         except json.JSONDecodeError as e:
             return ParseResult(
                 success=False,
-                error=f"Failed to parse JSON: {e}"
+                error=f"Failed to parse JSON: {e}",
+                error_class="bad_json"
             )
 
         # Извлекаем данные
@@ -225,14 +453,8 @@ class UniversalParser:
             name=extracted.get('name')
         )
 
-    def _parse_html(self, url: str, config: ParserConfig) -> ParseResult:
-        """Парсинг через HTML"""
-        extractor = HtmlExtractor(config)
-        client = self._get_client(config)
-
-        # Запрос страницы
-        response = client.get(url)
-
+    def _html_result(self, config: ParserConfig, response: httpx.Response) -> ParseResult:
+        """Результат по HTML странице товара (селекторы и regex из конфига)"""
         if response.status_code != 200:
             return ParseResult(
                 success=False,
@@ -242,7 +464,7 @@ class UniversalParser:
         html = response.text
 
         # Извлекаем данные
-        extracted = extractor.extract_product_data(html)
+        extracted = HtmlExtractor.for_config(config).extract_product_data(html)
 
         return ParseResult(
             success=True,
@@ -253,16 +475,8 @@ class UniversalParser:
             name=extracted.get('name')
         )
 
-    def _parse_html_fallback(self, url: str, config: ParserConfig) -> ParseResult:
-        """
-        Fallback парсинг через HTML с regex.
-        Используется когда API недоступен.
-        """
-        client = self._get_client(config)
-
-        # Запрос страницы товара напрямую
-        response = client.get(url)
-
+    def _fallback_result(self, response: httpx.Response) -> ParseResult:
+        """Результат по HTML странице универсальными regex (без конфига)"""
         if response.status_code != 200:
             return ParseResult(
                 success=False,
@@ -270,19 +484,12 @@ class UniversalParser:
             )
 
         html = response.text
-
-        # Универсальные regex паттерны
+        # Универсальные regex паттерны (FALLBACK_*, скомпилированы заранее)
         result = {}
 
         # Цена - ищем разные форматы
-        price_patterns = [
-            r'"price":\s*(\d+(?:\.\d+)?)',  # JSON в HTML
-            r'data-price="(\d+(?:\.\d+)?)"',  # data-атрибут
-            r'itemprop="price"\s+content="(\d+(?:\.\d+)?)"',  # microdata
-            r'class="[^"]*price[^"]*"[^>]*>[\s\S]*?(\d[\d\s]*)\s*(?:₽|руб|р\.)',  # текст с ценой
-        ]
-        for pattern in price_patterns:
-            match = re.search(pattern, html, re.IGNORECASE)
+        for pattern in FALLBACK_PRICE_PATTERNS:
+            match = pattern.search(html)
             if match:
                 price_str = match.group(1).replace(' ', '')
                 try:
@@ -292,41 +499,23 @@ class UniversalParser:
                     continue
 
         # Артикул
-        article_patterns = [
-            r'"article":\s*"([^"]+)"',  # JSON
-            r'Артикул[:\s]*</?\w+[^>]*>?\s*([A-ZА-Яa-zа-я]{2,3}[-\s]?\d+)',  # Текст
-            r'data-article="([^"]+)"',  # data-атрибут
-            r'itemprop="sku"[^>]*>([^<]+)',  # microdata
-        ]
-        for pattern in article_patterns:
-            match = re.search(pattern, html, re.IGNORECASE)
+        for pattern in FALLBACK_ARTICLE_PATTERNS:
+            match = pattern.search(html)
             if match:
                 result['article'] = match.group(1).strip()
                 break
 
         # Название товара
-        name_patterns = [
-            r'"name":\s*"([^"]+)"',  # JSON
-            r'<h1[^>]*>([^<]+)</h1>',  # H1
-            r'itemprop="name"[^>]*>([^<]+)',  # microdata
-        ]
-        for pattern in name_patterns:
-            match = re.search(pattern, html, re.IGNORECASE)
+        for pattern in FALLBACK_NAME_PATTERNS:
+            match = pattern.search(html)
             if match:
                 result['name'] = match.group(1).strip()
                 break
 
         # Наличие
         in_stock = True  # По умолчанию в наличии
-        out_of_stock_patterns = [
-            r'нет в наличии',
-            r'под заказ',
-            r'отсутствует',
-            r'"availability":\s*"OutOfStock"',
-            r'class="[^"]*out-of-stock',
-        ]
-        for pattern in out_of_stock_patterns:
-            if re.search(pattern, html, re.IGNORECASE):
+        for pattern in FALLBACK_OUT_OF_STOCK_PATTERNS:
+            if pattern.search(html):
                 in_stock = False
                 break
 
@@ -344,7 +533,8 @@ class UniversalParser:
 
         return ParseResult(
             success=False,
-            error="HTML fallback: Could not extract product data"
+            error="HTML fallback: Could not extract product data",
+            error_class="no_data"
         )
 
     def parse_by_shop(self, shop_code: str, url: str) -> ParseResult:
@@ -360,33 +550,198 @@ class UniversalParser:
                 error=f"No parser config found for shop: {shop_code}"
             )
 
-        start_time = time.time()
+        return self._parse_with_config(url, config, time.time())
 
-        try:
-            self._rate_limit(config)
+    # ── Асинхронный пакетный парсинг ──
 
-            if config.parser_type == 'api_json':
-                result = self._parse_api_json(url, config)
-            elif config.parser_type == 'html':
-                result = self._parse_html(url, config)
-            else:
-                return ParseResult(
-                    success=False,
-                    shop_code=config.shop_code,
-                    error=f"Unknown parser type: {config.parser_type}"
-                )
+    async def _aparse_api_json(self, url: str, config: ParserConfig) -> ParseResult:
+        """Асинхронный _parse_api_json (с fallback на HTML)"""
+        extractor = ApiJsonExtractor.for_config(config)
+        client = self._get_async_client(config)
 
-            result.shop_code = config.shop_code
-            result.response_time_ms = int((time.time() - start_time) * 1000)
+        api_url = extractor.build_api_url(url)
+        if not api_url:
+            return await self._aparse_html_fallback(url, config)
+
+        response = await client.get(api_url)
+        result = self._api_result(extractor, response, True)
+        if result is None:
+            result = await self._aparse_html_fallback(url, config)
+            result.bytes_fetched += len(response.content)
             return result
+        return self._tag(result, 'api', response)
 
-        except Exception as e:
-            return ParseResult(
-                success=False,
-                shop_code=config.shop_code,
-                error=str(e),
-                response_time_ms=int((time.time() - start_time) * 1000)
-            )
+    async def _aparse_html(self, url: str, config: ParserConfig) -> ParseResult:
+        client = self._get_async_client(config)
+        response = await client.get(url)
+        return self._tag(self._html_result(config, response), 'html', response)
+
+    async def _aparse_html_fallback(self, url: str, config: ParserConfig) -> ParseResult:
+        client = self._get_async_client(config)
+        response = await client.get(url)
+        return self._tag(self._fallback_result(response), 'html_fallback', response)
+
+    async def aparse(self, url: str, config: ParserConfig,
+                     slots: Optional[asyncio.Semaphore] = None) -> ParseResult:
+        """
+        Асинхронно распарсить один URL по уже найденному конфигу.
+        Действуют те же ограничения магазина, что и в parse_many (token bucket, concurrency);
+        slots — необязательный общий предел одновременных запросов.
+        """
+        return await self._aparse_one(url, config, slots or contextlib.nullcontext())
+
+    async def _aparse_one(self, url: str, config: ParserConfig, slots) -> ParseResult:
+        """
+        Один URL в parse_many. Порядок ожидания: слот магазина -> токен магазина -> общий слот,
+        чтобы URL медленного магазина, ждущие токен, не занимали общие слоты других магазинов.
+        response_time_ms — время самого запроса, без ожидания в очереди.
+        """
+        async with self._get_shop_slots(config):
+            await self._get_bucket(config).acquire()
+            async with slots:
+                start_time = time.time()
+                try:
+                    if config.parser_type == 'api_json':
+                        result = await self._aparse_api_json(url, config)
+                    elif config.parser_type == 'html':
+                        result = await self._aparse_html(url, config)
+                    else:
+                        result = ParseResult(
+                            success=False,
+                            error=f"Unknown parser type: {config.parser_type}",
+                            error_class="unknown_parser_type"
+                        )
+
+                except Exception as e:
+                    result = ParseResult(
+                        success=False,
+                        error=str(e),
+                        error_class=type(e).__name__
+                    )
+
+                result.shop_code = config.shop_code
+                result.response_time_ms = int((time.time() - start_time) * 1000)
+                get_metrics().record_result(result)
+                return result
+
+    @staticmethod
+    def _resolve_configs(urls: List[str]) -> Dict[str, Optional[ParserConfig]]:
+        """Конфиг для каждого URL (поиск один раз на домен)"""
+        by_domain: Dict[str, Optional[ParserConfig]] = {}
+        configs = {}
+        for url in urls:
+            domain = urlparse(url).netloc.lower()
+            if domain not in by_domain:
+                by_domain[domain] = get_config_by_url(url)
+            configs[url] = by_domain[domain]
+        return configs
+
+    async def parse_many(self, urls: Iterable[str], concurrency: int = PARSE_MANY_CONCURRENCY
+                         ) -> AsyncIterator[Tuple[str, ParseResult]]:
+        """
+        Парсить пачку URL параллельно. Пары (url, ParseResult) отдаются по мере готовности.
+
+        URL группируются по конфигу магазина: у каждого магазина свой AsyncClient,
+        token bucket по request_config.delay (burst — запас токенов) и предел
+        request_config.concurrency одновременных запросов. Магазины друг друга не ждут,
+        поэтому корзина по нескольким магазинам занимает примерно столько, сколько
+        доля самого медленного. Повторяющиеся URL парсятся один раз.
+
+            async for url, result in parser.parse_many(urls):
+                ...
+        """
+        urls = list(dict.fromkeys(urls))
+        configs = await asyncio.to_thread(self._resolve_configs, urls)
+
+        groups: Dict[str, List[str]] = {}
+        shop_configs: Dict[str, ParserConfig] = {}
+        unknown = []
+        for url in urls:
+            config = configs[url]
+            if config is None:
+                unknown.append(url)
+                continue
+            groups.setdefault(config.shop_code, []).append(url)
+            shop_configs[config.shop_code] = config
+
+        slots = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(url: str, config: ParserConfig) -> Tuple[str, ParseResult]:
+            return url, await self._aparse_one(url, config, slots)
+
+        tasks = [
+            asyncio.create_task(run(url, shop_configs[shop_code]))
+            for shop_code, shop_urls in groups.items()
+            for url in shop_urls
+        ]
+        try:
+            for url in unknown:
+                yield url, ParseResult(
+                    success=False,
+                    error=f"No parser config found for URL: {url}"
+                )
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def warm_up(self, configs: Optional[List[ParserConfig]] = None, connections: int = 1,
+                      timeout: float = WARM_UP_TIMEOUT) -> Dict[str, Dict[str, Any]]:
+        """
+        Прогрев перед первыми запросами (по умолчанию — все активные конфиги из get_all_configs):
+        асинхронный клиент с cookies, планы извлечения и `connections` keep-alive соединений
+        к каждому хосту магазина (DNS + TCP + TLS уже пройдены). Вызывать в том event loop,
+        в котором потом идут запросы. Ошибки прогрева не фатальны — только в отчёте.
+
+        Returns:
+            {shop_code: {"hosts": [...], "ms": 120, "errors": [...]}}
+        """
+        if configs is None:
+            configs = await asyncio.to_thread(get_all_configs)
+
+        async def touch(client: httpx.AsyncClient, origin: str) -> Optional[str]:
+            try:
+                # Ответ не важен: соединение вернётся в пул и останется открытым
+                await client.head(f"{origin}/", timeout=timeout, follow_redirects=False)
+                return None
+            except Exception as e:
+                return f"{origin}: {type(e).__name__}"
+
+        async def warm(config: ParserConfig) -> Tuple[str, Dict[str, Any]]:
+            start_time = time.time()
+            errors = []
+            try:
+                client = self._get_async_client(config)
+                if config.parser_type == 'api_json':
+                    ApiJsonExtractor.for_config(config)
+                HtmlExtractor.for_config(config)
+
+                hosts = warm_up_hosts(config)
+                results = await asyncio.wait_for(asyncio.gather(*(
+                    touch(client, origin)
+                    for origin in hosts
+                    for _ in range(max(1, min(connections, config.concurrency)))
+                )), timeout)
+                errors = [e for e in results if e]
+            except Exception as e:
+                hosts = []
+                errors.append(f"{type(e).__name__}: {e}")
+            return config.shop_code, {
+                "hosts": hosts,
+                "ms": int((time.time() - start_time) * 1000),
+                "errors": errors,
+            }
+
+        return dict(await asyncio.gather(*(warm(config) for config in configs)))
+
+    async def aclose(self):
+        """Закрыть все HTTP клиенты, включая асинхронные"""
+        for client in self._async_clients.values():
+            await client.aclose()
+        self._async_clients.clear()
+        self.close()
 
     def close(self):
         """Закрыть все HTTP клиенты"""
@@ -400,6 +755,12 @@ class UniversalParser:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
 
 # Глобальный экземпляр парсера
 _parser: Optional[UniversalParser] = None
@@ -423,14 +784,31 @@ def parse_product_by_shop(shop_code: str, url: str) -> ParseResult:
     return get_parser().parse_by_shop(shop_code, url)
 
 
+def parse_products(urls: Iterable[str], concurrency: int = PARSE_MANY_CONCURRENCY) -> Dict[str, ParseResult]:
+    """Shortcut: синхронно распарсить пачку URL через parse_many (свой event loop на вызов)"""
+    async def run() -> Dict[str, ParseResult]:
+        async with UniversalParser() as parser:
+            return {url: result async for url, result in parser.parse_many(urls, concurrency)}
+
+    return asyncio.run(run())
+
+
 if __name__ == "__main__":
     import argparse
 
     arg_parser = argparse.ArgumentParser(description='Universal product parser')
-    arg_parser.add_argument('url', help='Product URL to parse')
-    arg_parser.add_argument('--shop', help='Shop code (optional)')
+    arg_parser.add_argument('url', nargs='+', help='Product URL(s) to parse')
+    arg_parser.add_argument('--shop', help='Shop code (optional, single URL only)')
+    arg_parser.add_argument('--concurrency', type=int, default=PARSE_MANY_CONCURRENCY,
+                            help='Max parallel requests for several URLs')
     args = arg_parser.parse_args()
 
+    if len(args.url) > 1:
+        results = parse_products(args.url, args.concurrency)
+        print(json.dumps({url: r.to_dict() for url, r in results.items()}, indent=2, ensure_ascii=False))
+        raise SystemExit(0)
+
+    args.url = args.url[0]
     with UniversalParser() as parser:
         if args.shop:
             result = parser.parse_by_shop(args.shop, args.url)
@@ -0,0 +1,317 @@
+"""
+Точечное обновление цен горячих товаров между полными парсингами
+
+Берёт список строк {shop}_product_urls, парсит их по правилам shop_parser_configs
+(UniversalParser.aparse: token bucket и request_config.concurrency магазина, общий
+предел --concurrency) и пачками пишет результат в БД:
+
+- zip_current_prices — UPSERT по (nomenclature_id, outlet_id), nomenclature_id —
+  {shop}_nomenclature.zip_nomenclature_id (не нормализованные товары пропускаются)
+- {shop}_nomenclature.price / price_wholesale — для single-URL строк (outlet_id = NULL)
+- {shop}_product_urls.updated_at — чтобы --shop следующим запуском брал другие URL
+
+Строка product_urls без outlet_id пишется в точку '{shop_code}-online' из zip_outlets
+(если такой точки нет — строка пропускается, цена в nomenclature всё равно обновляется).
+Неуспешный парсинг ничего не перезаписывает: остаётся цена последнего полного парсинга.
+
+Источники URL:
+    python refresh_prices.py --hot 500 --days 7       # самые запрашиваемые (parser_request_log)
+    python refresh_prices.py --shop 05gsm --limit 1000 # давно не обновлявшиеся URL магазина
+    python refresh_prices.py --urls-file hot.txt       # свой список (URL по строке)
+
+    --dry-run — только парсинг и статистика, без записи в БД
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from config_loader import ParserConfig, get_config_by_shop, get_config_by_url, get_db
+from parser import ParseResult, UniversalParser, PARSE_MANY_CONCURRENCY
+
+REFRESH_CONCURRENCY = PARSE_MANY_CONCURRENCY  # Общий предел одновременных запросов (по всем магазинам)
+WRITE_BATCH_SIZE = 200                        # Результатов на один bulk-запрос к БД
+HOT_DAYS = 7                                  # Окно parser_request_log для --hot, дней
+ONLINE_OUTLET_SUFFIX = "-online"              # Точка по умолчанию для single-URL магазинов
+
+# shop_code из shop_parser_configs -> префикс таблиц магазина (если отличается)
+SHOP_TABLE_PREFIX = {
+    "05gsm": "_05gsm",
+    "naffas": "moysklad_naffas",
+}
+
+_PREFIX_RE = re.compile(r'^[a-z0-9_]+$')
+
+
+def table_prefix(shop_code: str) -> str:
+    """Префикс таблиц {shop}_product_urls / {shop}_nomenclature для кода магазина"""
+    prefix = SHOP_TABLE_PREFIX.get(shop_code, shop_code)
+    if not _PREFIX_RE.match(prefix):
+        raise ValueError(f"Bad shop code: {shop_code}")
+    return prefix
+
+
+@dataclass
+class RefreshTarget:
+    """Строка {shop}_product_urls, которую нужно обновить"""
+    shop_code: str
+    url: str
+    nomenclature_id: str                  # {shop}_nomenclature.id
+    zip_nomenclature_id: Optional[str]    # NULL — товар ещё не нормализован
+    outlet_id: Optional[str]              # NULL — single-URL магазин
+
+
+# ── выбор URL ──
+
+def load_hot_urls(limit: int, days: int = HOT_DAYS) -> Dict[str, List[str]]:
+    """Самые запрашиваемые URL за days дней из parser_request_log: {shop_code: [url, ...]}"""
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT shop_code, url
+            FROM parser_request_log
+            WHERE created_at > NOW() - make_interval(days => %s)
+              AND shop_code IS NOT NULL AND url IS NOT NULL
+            GROUP BY shop_code, url
+            ORDER BY COUNT(*) DESC
+            LIMIT %s
+        """, (days, limit))
+        by_shop: Dict[str, List[str]] = {}
+        for shop_code, url in cur.fetchall():
+            by_shop.setdefault(shop_code, []).append(url)
+        return by_shop
+    finally:
+        cur.close()
+        conn.close()
+
+
+def group_urls(urls: Iterable[str]) -> Dict[str, List[str]]:
+    """Свой список URL -> {shop_code: [url, ...]} по domain_patterns"""
+    by_shop: Dict[str, List[str]] = {}
+    for url in dict.fromkeys(u.strip() for u in urls if u.strip()):
+        config = get_config_by_url(url)
+        if config is None:
+            print(f"[WARN] No parser config for URL: {url}")
+            continue
+        by_shop.setdefault(config.shop_code, []).append(url)
+    return by_shop
+
+
+def load_targets(shop_code: str, urls: Optional[List[str]] = None,
+                 limit: Optional[int] = None) -> List[RefreshTarget]:
+    """
+    Строки product_urls магазина: по списку URL или limit самых давно обновлявшихся.
+    """
+    prefix = table_prefix(shop_code)
+    query = f"""
+        SELECT pu.url, n.id::text, n.zip_nomenclature_id::text, pu.outlet_id::text
+        FROM {prefix}_product_urls pu
+        JOIN {prefix}_nomenclature n ON n.id = pu.nomenclature_id
+    """
+    if urls is not None:
+        query += " WHERE pu.url = ANY(%s)"
+        params: tuple = (list(urls),)
+    else:
+        query += " ORDER BY pu.updated_at ASC NULLS FIRST LIMIT %s"
+        params = (limit,)
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute(query, params)
+        return [RefreshTarget(shop_code, *row) for row in cur.fetchall()]
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ── запись ──
+
+def _online_outlet(cur, shop_code: str) -> Optional[str]:
+    cur.execute("SELECT id::text FROM zip_outlets WHERE code = %s",
+                (f"{shop_code}{ONLINE_OUTLET_SUFFIX}",))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def write_results(conn, shop_code: str, results: List[Tuple[RefreshTarget, ParseResult]],
+                  outlets: Dict[str, Optional[str]]) -> Dict[str, int]:
+    """
+    Записать пачку успешных результатов одного магазина одной транзакцией.
+    outlets — кэш точки '{shop}-online' по магазину (заполняется здесь).
+    """
+    prefix = table_prefix(shop_code)
+    prices: Dict[Tuple[str, str], tuple] = {}
+    nomenclature: Dict[str, tuple] = {}
+    urls = list(dict.fromkeys((target.url,) for target, _ in results))
+
+    with conn.cursor() as cur:
+        for target, result in results:
+            outlet_id = target.outlet_id
+            if outlet_id is None:
+                if shop_code not in outlets:
+                    outlets[shop_code] = _online_outlet(cur, shop_code)
+                outlet_id = outlets[shop_code]
+                if result.price is not None:
+                    nomenclature[target.nomenclature_id] = (
+                        target.nomenclature_id, result.price, result.price_wholesale)
+            if target.zip_nomenclature_id and outlet_id:
+                # Несколько URL одного товара в одной точке — последний результат побеждает
+                prices[(target.zip_nomenclature_id, outlet_id)] = (
+                    target.zip_nomenclature_id, outlet_id, result.price, result.price_wholesale,
+                    result.in_stock, result.stock_quantity)
+
+        if prices:
+            execute_values(cur, """
+                INSERT INTO zip_current_prices
+                    (nomenclature_id, outlet_id, price, price_wholesale, in_stock, quantity, updated_at)
+                VALUES %s
+                ON CONFLICT (nomenclature_id, outlet_id) DO UPDATE SET
+                    price = COALESCE(EXCLUDED.price, zip_current_prices.price),
+                    price_wholesale = COALESCE(EXCLUDED.price_wholesale, zip_current_prices.price_wholesale),
+                    in_stock = COALESCE(EXCLUDED.in_stock, zip_current_prices.in_stock),
+                    quantity = COALESCE(EXCLUDED.quantity, zip_current_prices.quantity),
+                    updated_at = NOW()
+            """, list(prices.values()), template="(%s::uuid, %s::uuid, %s, %s, %s, %s, NOW())",
+                page_size=WRITE_BATCH_SIZE)
+
+        if nomenclature:
+            execute_values(cur, f"""
+                UPDATE {prefix}_nomenclature n SET
+                    price = v.price,
+                    price_wholesale = COALESCE(v.price_wholesale, n.price_wholesale),
+                    updated_at = NOW()
+                FROM (VALUES %s) AS v(id, price, price_wholesale)
+                WHERE n.id = v.id
+            """, list(nomenclature.values()), template="(%s::uuid, %s::numeric, %s::numeric)",
+                page_size=WRITE_BATCH_SIZE)
+
+        if urls:
+            execute_values(cur, f"""
+                UPDATE {prefix}_product_urls pu SET updated_at = NOW()
+                FROM (VALUES %s) AS v(url)
+                WHERE pu.url = v.url
+            """, urls, page_size=WRITE_BATCH_SIZE)
+
+    conn.commit()
+    return {"prices": len(prices), "nomenclature": len(nomenclature), "urls": len(urls)}
+
+
+# ── обновление ──
+
+async def refresh_targets(targets: List[RefreshTarget], concurrency: int = REFRESH_CONCURRENCY,
+                          batch_size: int = WRITE_BATCH_SIZE, dry_run: bool = False) -> Dict[str, dict]:
+    """
+    Спарсить строки и записать результаты пачками по мере готовности
+    (запись идёт в отдельном потоке, парсинг остальных URL в это время продолжается).
+
+    Returns:
+        {shop_code: {"urls": N, "success": N, "failed": N, "prices": N, "nomenclature": N, "errors": {...}}}
+    """
+    configs: Dict[str, Optional[ParserConfig]] = {}
+    stats: Dict[str, dict] = {}
+    for target in targets:
+        if target.shop_code not in configs:
+            configs[target.shop_code] = get_config_by_shop(target.shop_code)
+            stats[target.shop_code] = {"urls": 0, "success": 0, "failed": 0,
+                                       "prices": 0, "nomenclature": 0, "errors": {}}
+        stats[target.shop_code]["urls"] += 1
+
+    conn = None if dry_run else get_db()
+    outlets: Dict[str, Optional[str]] = {}
+    pending: Dict[str, List[Tuple[RefreshTarget, ParseResult]]] = {}
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def flush(shop_code: str):
+        batch = pending.pop(shop_code, [])
+        if not batch or conn is None:
+            return
+        written = await asyncio.to_thread(write_results, conn, shop_code, batch, outlets)
+        stats[shop_code]["prices"] += written["prices"]
+        stats[shop_code]["nomenclature"] += written["nomenclature"]
+
+    async with UniversalParser() as parser:
+        async def run(target: RefreshTarget) -> Tuple[RefreshTarget, ParseResult]:
+            config = configs[target.shop_code]
+            if config is None:
+                return target, ParseResult(success=False, error=f"No parser config found for shop: "
+                                                                f"{target.shop_code}", error_class="no_config")
+            return target, await parser.aparse(target.url, config, slots)
+
+        tasks = [asyncio.create_task(run(target)) for target in targets]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                target, result = await next_done
+                shop_stats = stats[target.shop_code]
+                if not result.success or (result.price is None and result.in_stock is None):
+                    shop_stats["failed"] += 1
+                    error_class = result.error_class or "no_data"
+                    shop_stats["errors"][error_class] = shop_stats["errors"].get(error_class, 0) + 1
+                    continue
+                shop_stats["success"] += 1
+                batch = pending.setdefault(target.shop_code, [])
+                batch.append((target, result))
+                if len(batch) >= batch_size:
+                    await flush(target.shop_code)
+            for shop_code in list(pending):
+                await flush(shop_code)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if conn is not None:
+                conn.close()
+
+    return stats
+
+
+def refresh(by_shop: Dict[str, Optional[List[str]]], limit: Optional[int] = None,
+            concurrency: int = REFRESH_CONCURRENCY, dry_run: bool = False) -> Dict[str, dict]:
+    """
+    Обновить цены: by_shop — {shop_code: [url, ...]} или {shop_code: None} (тогда limit
+    давно не обновлявшихся URL магазина).
+    """
+    targets: List[RefreshTarget] = []
+    for shop_code, urls in by_shop.items():
+        shop_targets = load_targets(shop_code, urls, limit)
+        if urls is not None and len(shop_targets) < len(urls):
+            print(f"[WARN] {shop_code}: {len(urls) - len(shop_targets)} URL not found "
+                  f"in {table_prefix(shop_code)}_product_urls")
+        targets.extend(shop_targets)
+
+    print(f"[INFO] Refreshing {len(targets)} URL in {len(by_shop)} shop(s)...")
+    return asyncio.run(refresh_targets(targets, concurrency, dry_run=dry_run))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Refresh prices of hot products')
+    source = arg_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--hot', type=int, metavar='N', help='Top N requested URLs from parser_request_log')
+    source.add_argument('--shop', help='Shop code: refresh its least recently updated URLs')
+    source.add_argument('--urls-file', help='File with product URLs, one per line')
+    arg_parser.add_argument('--days', type=int, default=HOT_DAYS, help='Window for --hot, days')
+    arg_parser.add_argument('--limit', type=int, default=1000, help='URL count for --shop')
+    arg_parser.add_argument('--concurrency', type=int, default=REFRESH_CONCURRENCY,
+                            help='Max parallel requests across all shops')
+    arg_parser.add_argument('--dry-run', action='store_true', help='Parse only, do not write to DB')
+    args = arg_parser.parse_args()
+
+    if args.hot is not None:
+        shops = load_hot_urls(args.hot, args.days)
+    elif args.shop:
+        shops = {args.shop: None}
+    else:
+        with open(args.urls_file, 'r', encoding='utf-8') as f:
+            shops = group_urls(f)
+
+    start_time = time.time()
+    result = refresh(shops, args.limit, args.concurrency, args.dry_run)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(f"[INFO] Done in {time.time() - start_time:.1f}s")
@@ -0,0 +1,183 @@
+"""
+Кэш результатов real-time парсинга
+
+Один и тот же URL часто проверяют несколько раз подряд (агент уточняет цену,
+n8n повторяет шаг) — повторный запрос к магазину не нужен.
+
+- TTL на магазин: request_config.cache_ttl (сек, 0 — не кэшировать)
+- stale-while-revalidate: после TTL результат ещё request_config.cache_stale_ttl сек
+  отдаётся сразу, а свежий загружается в фоновом потоке (один на ключ)
+- LRU с ограничением числа записей
+- кэшируются только успешные результаты
+
+Использование:
+    cache = ResultCache()
+    result, age, status = cache.lookup(key, lambda: parser.parse(url), ttl=60, stale_ttl=600)
+    # status: "miss" | "fresh" | "stale", age — возраст отданного результата, сек
+
+    result, age, status = await cache.alookup(key, lambda: parser.aparse(url, config), ttl=60)
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional, Tuple
+
+CACHE_MAX_ENTRIES = 5000     # Предел записей (LRU)
+REFRESH_WORKERS = 4          # Потоков фонового обновления
+
+
+class _Entry:
+    __slots__ = ("result", "fetched_at", "ttl", "stale_ttl")
+
+    def __init__(self, result, ttl: float, stale_ttl: float):
+        self.result = result
+        self.fetched_at = time.monotonic()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class ResultCache:
+    """Потокобезопасный LRU кэш результатов с фоновым обновлением устаревших записей"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, refresh_workers: int = REFRESH_WORKERS):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: set = set()
+        self._tasks: set = set()  # Фоновые asyncio-обновления (держим ссылки до завершения)
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+        self.stats = {"fresh": 0, "stale": 0, "miss": 0, "refreshes": 0, "evicted": 0}
+
+    def get(self, key: str) -> Optional[Tuple[object, float]]:
+        """(результат, возраст) без учёта TTL или None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry.result, entry.age
+
+    def put(self, key: str, result, ttl: float, stale_ttl: float = 0):
+        """Запомнить результат (неуспешные и ttl <= 0 не кэшируются)"""
+        if ttl <= 0 or not getattr(result, "success", False):
+            return
+        with self._lock:
+            self._entries[key] = _Entry(result, ttl, stale_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evicted"] += 1
+
+    def invalidate(self, key: Optional[str] = None):
+        """Удалить одну запись или весь кэш"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _hit(self, key: str, ttl: float, max_age: Optional[float]) -> Optional[Tuple[object, float, str]]:
+        """(результат, возраст, "fresh" | "stale") или None, если нужно загружать"""
+        if ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            return None
+        age = entry.age
+        if max_age is not None and age > max_age:
+            return None
+        if age <= entry.ttl:
+            self.stats["fresh"] += 1
+            return entry.result, age, "fresh"
+        if age <= entry.ttl + entry.stale_ttl:
+            self.stats["stale"] += 1
+            return entry.result, age, "stale"
+        return None
+
+    def lookup(self, key: str, fetch: Callable[[], object], ttl: float, stale_ttl: float = 0,
+               max_age: Optional[float] = None) -> Tuple[object, float, str]:
+        """
+        Результат из кэша или fetch().
+
+        max_age — вызывающий может потребовать результат не старше N сек
+        (тогда устаревшая запись не отдаётся, а загружается синхронно).
+        """
+        hit = self._hit(key, ttl, max_age)
+        if hit is not None:
+            if hit[2] == "stale":
+                self._refresh(key, fetch, ttl, stale_ttl)
+            return hit
+
+        self.stats["miss"] += 1
+        result = fetch()
+        self.put(key, result, ttl, stale_ttl)
+        return result, 0.0, "miss"
+
+    async def alookup(self, key: str, fetch: Callable[[], Awaitable[object]], ttl: float,
+                      stale_ttl: float = 0, max_age: Optional[float] = None) -> Tuple[object, float, str]:
+        """
+        Асинхронный lookup: fetch — корутинная функция.
+        Устаревшая запись обновляется фоновой задачей в текущем event loop.
+        """
+        hit = self._hit(key, ttl, max_age)
+        if hit is not None:
+            if hit[2] == "stale":
+                self._arefresh(key, fetch, ttl, stale_ttl)
+            return hit
+
+        self.stats["miss"] += 1
+        result = await fetch()
+        self.put(key, result, ttl, stale_ttl)
+        return result, 0.0, "miss"
+
+    def _arefresh(self, key: str, fetch: Callable[[], Awaitable[object]], ttl: float, stale_ttl: float):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        async def run():
+            try:
+                self.stats["refreshes"] += 1
+                self.put(key, await fetch(), ttl, stale_ttl)
+            except Exception as e:
+                print(f"Cache refresh error ({key}): {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _refresh(self, key: str, fetch: Callable[[], object], ttl: float, stale_ttl: float):
+        """Фоновое обновление записи (не больше одного на ключ одновременно)"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.stats["refreshes"] += 1
+                self.put(key, fetch(), ttl, stale_ttl)
+            except Exception as e:
+                print(f"Cache refresh error ({key}): {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(run)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -83,6 +83,19 @@ CREATE TABLE IF NOT EXISTS shop_parser_configs (
 CREATE INDEX IF NOT EXISTS idx_parser_configs_shop ON shop_parser_configs(shop_code);
 CREATE INDEX IF NOT EXISTS idx_parser_configs_active ON shop_parser_configs(is_active);
 
+-- Уведомление real-time парсеров об изменении конфигов (ConfigLoader.start_listener)
+CREATE OR REPLACE FUNCTION notify_shop_parser_configs_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('shop_parser_configs_changed', COALESCE(NEW.shop_code, OLD.shop_code));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_shop_parser_configs_notify ON shop_parser_configs;
+CREATE TRIGGER trg_shop_parser_configs_notify
+    AFTER INSERT OR UPDATE OR DELETE ON shop_parser_configs
+    FOR EACH ROW EXECUTE FUNCTION notify_shop_parser_configs_changed();
+
 -- Таблица для хранения cookies (опционально)
 CREATE TABLE IF NOT EXISTS shop_cookies (
     id SERIAL PRIMARY KEY,
@@ -0,0 +1,230 @@
+"""
+Асинхронный слой обслуживания запросов MCP сервера
+
+Путь запроса: кэш результатов -> single-flight -> UniversalParser.aparse.
+
+- single-flight: одновременные запросы одного URL одного магазина ждут одну загрузку,
+  а не делают по запросу к магазину каждый (несколько агентов спросили одну цену)
+- бюджет магазина из parser.py: не больше request_config.concurrency одновременных
+  запросов и token bucket по request_config.delay — всплеск запросов не приводит к бану
+- общий предел одновременных запросов к магазинам — SERVICE_CONCURRENCY
+- каждый запрос (включая ответы из кэша) пишется в parser_request_log пачками
+  в фоне (RequestLog) — по нему refresh_prices.py --hot выбирает популярные URL
+
+Использование:
+    service = ParseService(parser)
+    data = await service.parse(url)                 # dict как ParseResult.to_dict() + cache, cache_age_s
+    async for url, data in service.parse_many(urls):
+        ...
+"""
+
+import asyncio
+import os
+import sys
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from config_loader import ParserConfig, get_config_by_shop, get_config_by_url, get_db
+from parser import ParseResult, UniversalParser, PARSE_MANY_CONCURRENCY
+from result_cache import ResultCache
+
+SERVICE_CONCURRENCY = PARSE_MANY_CONCURRENCY
+
+REQUEST_LOG_ENABLED = os.environ.get("PARSER_REQUEST_LOG", "1") == "1"
+REQUEST_LOG_BATCH = 200          # Строк в одной вставке
+REQUEST_LOG_FLUSH = 5.0          # Максимальная задержка записи, сек
+REQUEST_LOG_MAX_BUFFER = 10000   # При недоступной БД старые строки отбрасываются
+
+
+class RequestLog:
+    """Буфер строк parser_request_log: запись пачками в потоке, не в event loop"""
+
+    def __init__(self, batch: int = REQUEST_LOG_BATCH, flush_interval: float = REQUEST_LOG_FLUSH):
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self._rows: List[tuple] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats = {"logged": 0, "written": 0, "dropped": 0, "errors": 0}
+
+    def record(self, shop_code: str, url: str, data: dict):
+        self._rows.append((
+            shop_code, url, data.get("success"), data.get("price"), data.get("in_stock"),
+            data.get("response_time_ms") if data.get("cache") == "miss" else None,
+            data.get("error"),
+        ))
+        self.stats["logged"] += 1
+        if len(self._rows) > REQUEST_LOG_MAX_BUFFER:
+            dropped = len(self._rows) - REQUEST_LOG_MAX_BUFFER
+            del self._rows[:dropped]
+            self.stats["dropped"] += dropped
+        if self._flusher is None or self._flusher.done():
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.ensure_future(self._run())
+        elif len(self._rows) >= self.batch:
+            self._wakeup.set()
+
+    async def _run(self):
+        while self._rows:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        rows, self._rows = self._rows, []
+        if not rows:
+            return
+        try:
+            await asyncio.to_thread(self._write, rows)
+            self.stats["written"] += len(rows)
+        except Exception as e:
+            # stdout занят протоколом MCP (stdio)
+            print(f"parser_request_log write failed: {e}", file=sys.stderr)
+            self.stats["errors"] += 1
+            self._rows[:0] = rows
+
+    @staticmethod
+    def _write(rows: List[tuple]):
+        conn = get_db()
+        try:
+            with conn.cursor() as cur:
+                execute_values(cur, """
+                    INSERT INTO parser_request_log
+                        (shop_code, url, success, price, in_stock, response_time_ms, error_message)
+                    VALUES %s
+                """, rows, page_size=len(rows))
+            conn.commit()
+        finally:
+            conn.close()
+
+    async def close(self):
+        """Остановить фоновую запись и сбросить остаток"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
+
+
+class SingleFlight:
+    """Объединение одновременных одинаковых загрузок: одна задача на ключ, результат — всем"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"started": 0, "joined": 0}
+
+    async def do(self, key: str, fetch: Callable[[], Awaitable]):
+        future = self._inflight.get(key)
+        if future is None:
+            self.stats["started"] += 1
+            future = asyncio.ensure_future(fetch())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats["joined"] += 1
+        # Отмена одного ожидающего (клиент отключился) не отменяет общую загрузку
+        return await asyncio.shield(future)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class ParseService:
+    """Кэш + single-flight + бюджет магазинов поверх UniversalParser"""
+
+    def __init__(self, parser: Optional[UniversalParser] = None, cache: Optional[ResultCache] = None,
+                 concurrency: int = SERVICE_CONCURRENCY, request_log: Optional[RequestLog] = None):
+        self.parser = parser or UniversalParser()
+        self.cache = cache or ResultCache()
+        self.request_log = request_log
+        self.flights = SingleFlight()
+        self.concurrency = concurrency
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self._slots
+
+    @staticmethod
+    def _key(config: ParserConfig, url: str) -> str:
+        return f"{config.shop_code}|{url}"
+
+    async def _fetch(self, config: ParserConfig, url: str) -> ParseResult:
+        return await self.flights.do(
+            self._key(config, url),
+            lambda: self.parser.aparse(url, config, self._get_slots()),
+        )
+
+    async def parse_with_config(self, config: ParserConfig, url: str,
+                                max_age: Optional[float] = None) -> dict:
+        """Результат по известному конфигу (кэш магазина, затем общая загрузка)"""
+        result, age, status = await self.cache.alookup(
+            self._key(config, url),
+            lambda: self._fetch(config, url),
+            ttl=config.cache_ttl,
+            stale_ttl=config.cache_stale_ttl,
+            max_age=max_age,
+        )
+        data = result.to_dict()
+        data["cache"] = status
+        data["cache_age_s"] = round(age, 1)
+        if self.request_log is not None:
+            self.request_log.record(config.shop_code, url, data)
+        return data
+
+    @staticmethod
+    def _failed(result: ParseResult) -> dict:
+        data = result.to_dict()
+        data["cache"] = "miss"
+        data["cache_age_s"] = 0.0
+        return data
+
+    async def parse(self, url: str, max_age: Optional[float] = None) -> dict:
+        """Парсить товар по URL (магазин — по домену)"""
+        # Первый вызов (и после clear_cache) читает снимок конфигов из БД — не в event loop
+        config = await asyncio.to_thread(get_config_by_url, url)
+        if config is None:
+            return self._failed(ParseResult(
+                success=False,
+                error=f"No parser config found for URL: {url}"
+            ))
+        return await self.parse_with_config(config, url, max_age)
+
+    async def parse_by_shop(self, shop_code: str, url: str, max_age: Optional[float] = None) -> dict:
+        """Парсить товар с явным указанием магазина"""
+        config = await asyncio.to_thread(get_config_by_shop, shop_code)
+        if config is None:
+            return self._failed(ParseResult(
+                success=False,
+                error=f"No parser config found for shop: {shop_code}"
+            ))
+        return await self.parse_with_config(config, url, max_age)
+
+    async def parse_many(self, urls: Iterable[str], max_age: Optional[float] = None
+                         ) -> AsyncIterator[Tuple[str, dict]]:
+        """Пачка URL через тот же кэш и single-flight; (url, dict) в порядке готовности"""
+        async def run(url: str) -> Tuple[str, dict]:
+            return url, await self.parse(url, max_age)
+
+        tasks = [asyncio.ensure_future(run(url)) for url in dict.fromkeys(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        stats = {
+            "cache": dict(self.cache.stats, entries=len(self.cache)),
+            "single_flight": dict(self.flights.stats, in_flight=len(self.flights)),
+        }
+        if self.request_log is not None:
+            stats["request_log"] = dict(self.request_log.stats)
+        return stats
@@ -51,6 +51,7 @@ CATEGORIES_JSON = f"{DATA_DIR}/categories.json"
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from db_wrapper import get_db  # Автоматически маппит таблицы на новые имена
+from crawl_engine import CrawlTask, crawl
 
 
 class TaggsmParser:
@@ -457,6 +458,88 @@ class TaggsmParser:
             if len(page_products) < ITEMS_PER_PAGE // 2:
                 break
 
+    # === Конкурентный обход (crawl_engine) ===
+
+    def _category_url(self, category_path: str, page: int = 1) -> str:
+        url = f"{CATEGORY_URL}&path={category_path}&limit={ITEMS_PER_PAGE}"
+        return url if page == 1 else f"{url}&page={page}"
+
+    def _parse_cards(self, soup: BeautifulSoup, category_path: str, category_name: str) -> List[Dict]:
+        cards = soup.select("div.product-thumb") or \
+                soup.select("div.product-layout") or \
+                soup.select("div.product-list .product-item")
+        products = []
+        for card in cards:
+            product = self.parse_product_card(card, category_path, category_name)
+            if product:
+                products.append(product)
+        return products
+
+    def _handle_page(self, task: CrawlTask, soup: BeautifulSoup) -> List[CrawlTask]:
+        """
+        Обработчик CrawlEngine.
+        category: подкатегории → новые category-задачи, иначе товары 1-й страницы + page-задачи.
+        page: товары со страницы пагинации.
+        """
+        category_path = task.data["path"]
+        indent = "  " * task.depth
+
+        if task.kind == "page":
+            products = self._parse_cards(soup, category_path, task.data["name"])
+            self.products.extend(products)
+            print(f"{indent}    {category_path} стр. {task.data['page']}: +{len(products)} товаров")
+            return []
+
+        _, cat_name = self.extract_breadcrumbs(soup)
+        if not cat_name:
+            h1 = soup.find('h1')
+            cat_name = h1.get_text(strip=True) if h1 else category_path
+        self.categories[category_path] = cat_name
+
+        subcategories = self.get_subcategories(soup, category_path)
+        if subcategories:
+            print(f"{indent}[{task.depth}] {category_path}: подкатегорий {len(subcategories)}")
+            return [
+                CrawlTask(self._category_url(sub['path']), kind="category",
+                          depth=task.depth + 1, data={"path": sub['path']})
+                for sub in subcategories
+            ]
+
+        products = self._parse_cards(soup, category_path, cat_name)
+        self.products.extend(products)
+        total_pages = self.get_total_pages(soup)
+        print(f"{indent}[{task.depth}] {category_path}: стр. 1/{total_pages}, +{len(products)} товаров")
+        return [
+            CrawlTask(self._category_url(category_path, page), kind="page", depth=task.depth,
+                      data={"path": category_path, "name": cat_name, "page": page})
+            for page in range(2, total_pages + 1)
+        ]
+
+    def parse_all_concurrent(self, concurrency: int = 4, root_categories: List[str] = None):
+        """Парсит корневые категории через crawl_engine: страницы грузятся параллельно"""
+        roots = root_categories or ROOT_CATEGORIES
+        print(f"\n{'='*60}")
+        print(f"Парсинг TAGGSM.ru (async, {concurrency} потоков на домен)")
+        print(f"Дата: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Корневые категории: {', '.join(roots)}")
+        print(f"{'='*60}\n")
+
+        engine = crawl(
+            [CrawlTask(self._category_url(path), kind="category", data={"path": path}) for path in roots],
+            self._handle_page,
+            concurrency=concurrency, delay=REQUEST_DELAY, timeout=REQUEST_TIMEOUT,
+            retries=MAX_RETRIES, headers=dict(self.session.headers),
+            cookies=dict(self.session.cookies), encoding="utf-8",
+        )
+        self.errors.extend(engine.errors)
+
+        print(f"\n{'='*60}")
+        print(f"ИТОГО: {len(self.products)} товаров")
+        print(f"Категорий: {len(self.categories)}")
+        print(f"Ошибок: {len(self.errors)}")
+        print(f"HTTP: {engine.stats}")
+        print(f"{'='*60}")
+
     def parse_all(self):
         """Парсит все корневые категории"""
         print(f"\n{'='*60}")
@@ -789,6 +872,8 @@ def main():
                            help='Не сохранять в БД')
     arg_parser.add_argument('--category', '-c', type=str, default=None,
                            help='Парсить только указанную категорию (path)')
+    arg_parser.add_argument('--concurrency', type=int, default=0,
+                           help='Параллельная загрузка страниц через crawl_engine (N запросов на домен)')
     args = arg_parser.parse_args()
 
     # Только обработка (LEGACY)
@@ -800,7 +885,10 @@ def main():
     # Парсинг
     parser = TaggsmParser()
 
-    if args.category:
+    if args.concurrency > 0:
+        roots = [args.category] if args.category else None
+        parser.parse_all_concurrent(concurrency=args.concurrency, root_categories=roots)
+    elif args.category:
         # Парсим одну категорию
         parser.crawl_category(args.category)
     else:
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк извлечения данных парсерами магазинов на офлайн-корпусе (fixtures.py).
+
+Для каждого магазина прогоняет функции извлечения (parse_product_card,
+extract_product_info, parse_products_from_html, parse_excel_file, ...) по записанным
+ответам и печатает pages/s, products/s и пиковую память (tracemalloc).
+Сеть и БД не используются.
+
+Замер недействителен (INVALID, exit 1), если функция не нашла ни одного товара или
+парсер записал ошибки в parser.errors — иначе измерялся бы путь отказа.
+Файлы, для которых нет внешней утилиты (.xls без soffice), пропускаются.
+
+Usage:
+    python bench_parsers.py                           # все магазины с корпусом
+    python bench_parsers.py Taggsm Moba -n 5          # выбранные, 5 повторов
+    python bench_parsers.py --json bench.json         # результат для CI
+    python bench_parsers.py --baseline bench.json --max-regression 0.2
+        # exit 1, если pages/s упал или пиковая память выросла больше чем на 20%
+"""
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from fixtures import FixtureStore, versions
+
+SHOPS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SHOPS_DIR))
+
+HTML = (".html",)
+
+
+@dataclass
+class Bench:
+    """
+    Функция извлечения магазина: setup(module) -> (run, parser).
+    run(entry, body) -> кол-во товаров; parser — объект с .errors (или None).
+    requires — внешние утилиты по расширению: {".xls": "soffice"}.
+    """
+    shop: str
+    name: str
+    script: str
+    extensions: tuple
+    setup: Callable
+    requires: Dict[str, str] = field(default_factory=dict)
+
+
+def load_shop_module(shop: str, script: str):
+    """
+    Импортировать парсер магазина из его каталога.
+    Локальные модули магазина (config, price_lists_config, ...) убираются из sys.modules,
+    чтобы следующий магазин получил свой config.
+    """
+    shop_dir = SHOPS_DIR / shop
+    old_cwd = os.getcwd()
+    os.chdir(shop_dir)
+    sys.path.insert(0, str(shop_dir))
+    try:
+        spec = importlib.util.spec_from_file_location(f"bench_{shop.replace('-', '_')}", shop_dir / script)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(str(shop_dir))
+        for name, mod in list(sys.modules.items()):
+            if str(getattr(mod, "__file__", "") or "").startswith(str(shop_dir)):
+                del sys.modules[name]
+        os.chdir(old_cwd)
+    return module
+
+
+def _text(entry: Dict, body: bytes) -> str:
+    ctype = entry["headers"].get("content-type", "")
+    encoding = ctype.split("charset=", 1)[1].split(";")[0].strip() if "charset=" in ctype else "utf-8"
+    return body.decode(encoding, errors="replace")
+
+
+# ── адаптеры магазинов ──
+
+def _taggsm(m):
+    parser = m.TaggsmParser()
+
+    def run(entry, body):
+        parser.seen_product_ids.clear()
+        return len(parser._parse_cards(BeautifulSoup(_text(entry, body), "html.parser"), "", ""))
+    return run, parser
+
+
+def _05gsm(m):
+    parser = m.Parser05GSM()
+
+    def run(entry, body):
+        parser.seen_urls.clear()
+        return len(parser._parse_cards(BeautifulSoup(_text(entry, body), "lxml"), "", ""))
+    return run, parser
+
+
+def _memstech(m):
+    parser = m.MemsTechParser()
+
+    def run(entry, body):
+        parser.seen_product_ids.clear()
+        soup = BeautifulSoup(_text(entry, body), "html.parser")
+        items = soup.find_all("div", class_="catalog-section-item", attrs={"data-entity": "items-row"})
+        return sum(1 for item in items if parser.parse_product_from_data(item, ""))
+    return run, parser
+
+
+def _lcd_stock(m):
+    parser = m.LcdStockParser()
+
+    def run(entry, body):
+        parser.seen_ids.clear()
+        soup = BeautifulSoup(_text(entry, body), "html.parser")
+        cards = soup.select(".card-product")
+        if cards:
+            return sum(1 for card in cards if parser._parse_card(card, ""))
+        details = parser._parse_details(soup)
+        return 1 if details["sku"] or details["stock"] else 0
+    return run, parser
+
+
+def _signal23(m):
+    parser = m.Signal23Parser()
+
+    def run(entry, body):
+        product = parser._extract_product(entry["url"], BeautifulSoup(_text(entry, body), "html.parser"))
+        return 1 if product and product.get("name") else 0
+    return run, parser
+
+
+def _moba_bs4(m):
+    return (lambda entry, body: len(m.parse_products_from_html(_text(entry, body)))), None
+
+
+def _moba_lxml(m):
+    return (lambda entry, body: len(m.extract_catalog_page(_text(entry, body), 1)[0])), None
+
+
+def _greenspark(m):
+    parser = m.GreenSparkCatalogParser()
+
+    def run(entry, body):
+        parser.seen_ids.clear()
+        data = json.loads(body)
+        products = data.get("products", {}) if isinstance(data, dict) else []
+        if isinstance(products, dict):
+            products = products.get("data", [])
+        return sum(1 for p in products if parser.extract_product_info(p, "", ""))
+    return run, parser
+
+
+def _profi(m):
+    parser = m.ProfiParser()
+    return (lambda entry, body: len(parser.parse_excel_file(str(entry["path"]), "", "", ""))), parser
+
+
+BENCHES: List[Bench] = [
+    Bench("Taggsm", "parse_product_card", "parser.py", HTML, _taggsm),
+    Bench("05GSM", "parse_product_card", "parser.py", HTML, _05gsm),
+    Bench("memstech", "parse_product_from_data", "parser.py", HTML, _memstech),
+    Bench("lcd-stock", "_parse_card/_parse_details", "parser.py", HTML, _lcd_stock),
+    Bench("signal23", "_extract_product", "parser.py", HTML, _signal23),
+    Bench("Moba", "parse_products_from_html", "moba_multicity_parser.py", HTML, _moba_bs4),
+    Bench("Moba", "extract_catalog_page", "moba_multicity_parser.py", HTML, _moba_lxml),
+    Bench("GreenSpark", "extract_product_info", "parser.py", (".json",), _greenspark),
+    Bench("Profi", "parse_excel_file", "parser.py", (".xls", ".xlsx"), _profi,
+          requires={".xls": "soffice"}),
+]
+
+
+def run_bench(bench: Bench, version: Optional[str], repeat: int) -> Optional[Dict]:
+    if not versions(bench.shop):
+        return None
+    store = FixtureStore(bench.shop, version)
+    # Без утилиты конвертации замерялся бы только отказ — такие файлы не берём
+    extensions = tuple(ext for ext in bench.extensions
+                       if ext not in bench.requires or shutil.which(bench.requires[ext]))
+    skipped = sorted(set(bench.extensions) - set(extensions))
+    pages = [(e, e["path"].read_bytes()) for e in store.entries(extensions) if e["status"] == 200]
+    if not pages:
+        return None
+
+    module = load_shop_module(bench.shop, bench.script)
+    old_cwd = os.getcwd()
+    os.chdir(SHOPS_DIR / bench.shop)
+    try:
+        fn, parser = bench.setup(module)
+
+        # Первый проход — пиковая память (tracemalloc замедляет, поэтому отдельно от замера времени)
+        tracemalloc.start()
+        products_per_pass = sum(fn(entry, body) for entry, body in pages)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for entry, body in pages:
+                fn(entry, body)
+        elapsed = time.perf_counter() - started
+    finally:
+        os.chdir(old_cwd)
+
+    errors = getattr(parser, "errors", None) or []
+    invalid = []
+    if products_per_pass == 0:
+        invalid.append("0 товаров")
+    if errors:
+        invalid.append(f"ошибок парсера: {len(errors)} ({errors[0].get('error', errors[0])})")
+
+    return {
+        "version": store.version,
+        "pages": len(pages),
+        "products": products_per_pass,
+        "pages_per_sec": round(len(pages) * repeat / elapsed, 1),
+        "products_per_sec": round(products_per_pass * repeat / elapsed, 1),
+        "peak_mb": round(peak / 1e6, 2),
+        "skipped": [f"{ext} (нет {bench.requires[ext]})" for ext in skipped],
+        "invalid": invalid,
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], max_regression: float) -> List[str]:
+    problems = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if cur["pages_per_sec"] < base["pages_per_sec"] * (1 - max_regression):
+            problems.append(f"{key}: pages/s {base['pages_per_sec']} → {cur['pages_per_sec']}")
+        if cur["peak_mb"] > base["peak_mb"] * (1 + max_regression) + 0.5:
+            problems.append(f"{key}: peak {base['peak_mb']} MB → {cur['peak_mb']} MB")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Parser extraction benchmark on the offline fixture corpus")
+    ap.add_argument("shops", nargs="*", help="Магазины (по умолчанию все с корпусом)")
+    ap.add_argument("-n", "--repeat", type=int, default=3, help="Повторов по корпусу")
+    ap.add_argument("--version", default=None, help="Версия корпуса (по умолчанию последняя)")
+    ap.add_argument("--json", dest="json_out", default=None, help="Сохранить результаты в JSON")
+    ap.add_argument("--baseline", default=None, help="JSON предыдущего прогона для сравнения")
+    ap.add_argument("--max-regression", type=float, default=0.2, help="Допустимое ухудшение (доля)")
+    args = ap.parse_args()
+
+    benches = [b for b in BENCHES if not args.shops or b.shop in args.shops]
+    results: Dict[str, Dict] = {}
+    failed: List[str] = []
+
+    print(f"{'shop / function':<46}{'pages':>7}{'pages/s':>10}{'products/s':>12}{'peak MB':>9}")
+    for bench in benches:
+        key = f"{bench.shop}/{bench.name}"
+        try:
+            res = run_bench(bench, args.version, args.repeat)
+        except Exception as e:
+            print(f"{key:<46}  ERROR: {type(e).__name__}: {e}")
+            failed.append(key)
+            continue
+        if res is None:
+            print(f"{key:<46}  нет корпуса")
+            continue
+        if res["invalid"]:
+            print(f"{key:<46}  INVALID: {'; '.join(res['invalid'])}")
+            failed.append(key)
+            continue
+        results[key] = res
+        print(f"{key:<46}{res['pages']:>7}{res['pages_per_sec']:>10.1f}"
+              f"{res['products_per_sec']:>12.1f}{res['peak_mb']:>9.2f}"
+              + (f"  пропущено: {', '.join(res['skipped'])}" if res["skipped"] else ""))
+
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    status = 0
+    if failed:
+        print(f"\nНедействительные замеры: {', '.join(failed)}")
+        status = 1
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        problems = compare(results, baseline, args.max_regression)
+        if problems:
+            print("\nРЕГРЕССИИ:")
+            for p in problems:
+                print(f"  {p}")
+            return 1
+        print(f"\nРегрессий нет (порог {args.max_regression:.0%})")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""
+Асинхронный движок обхода HTML-каталогов для парсеров магазинов.
+
+Общая часть для Taggsm, 05GSM, MemsTech, Signal23, LCD-Stock (Orizhka использует только fetch):
+- один httpx.AsyncClient на прогон: пул соединений, keep-alive, HTTP/2 (если установлен h2)
+- бюджет на домен: не больше N одновременных запросов и не чаще одного старта в `delay` сек
+- повторы с экспоненциальной задержкой и джиттером (таймауты, обрывы, 429, 5xx; учитывается Retry-After)
+- frontier: очередь задач CrawlTask с дедупликацией по (kind, url)
+
+Магазин передаёт только обработчик страницы: handler(task, soup) -> новые задачи.
+Обработчик может быть обычной функцией — селекторы и парсеры карточек остаются
+в классе парсера, движок отвечает только за загрузку и планирование.
+
+Разбор HTML (BeautifulSoup) и синхронный обработчик выполняются в пуле потоков
+(asyncio.to_thread), чтобы не останавливать event loop, пока другие воркеры ждут сеть.
+Синхронные обработчики вызываются строго по одному (общая блокировка), поэтому
+могут без синхронизации дописывать в self.products/self.errors парсера.
+Async-обработчик выполняется в event loop и должен быть дешёвым.
+
+Использование из синхронного парсера:
+    from crawl_engine import CrawlTask, crawl
+
+    engine = crawl(
+        [CrawlTask(url, kind="category")],
+        self._handle_page,
+        concurrency=4, delay=0.3, headers=self.session.headers,
+    )
+    self.errors.extend(engine.errors)
+"""
+import asyncio
+import importlib.util
+import inspect
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+from bs4 import BeautifulSoup
+
+HAS_H2 = importlib.util.find_spec("h2") is not None
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class CrawlTask:
+    """Единица работы frontier: URL + тип страницы + данные от родителя."""
+    url: str
+    kind: str = "page"
+    depth: int = 0
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.url}"
+
+
+class _DomainBudget:
+    """Ограничение одновременных запросов и частоты стартов для одного домена."""
+
+    def __init__(self, concurrency: int, delay: float):
+        self.sem = asyncio.Semaphore(max(1, concurrency))
+        self.delay = delay
+        self._lock = asyncio.Lock()
+        self._next_at = 0.0
+
+    async def __aenter__(self):
+        await self.sem.acquire()
+        # Даже при delay=0: _next_at может быть сдвинут penalize()
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.delay
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.sem.release()
+
+    def penalize(self, seconds: float):
+        """Сдвинуть следующий старт (Retry-After / 429)."""
+        self._next_at = max(self._next_at, time.monotonic() + seconds)
+
+
+class CrawlEngine:
+    """
+    Асинхронный загрузчик + frontier.
+
+    concurrency/delay — бюджет по умолчанию для каждого домена,
+    domain_policies — переопределение для отдельных доменов: {"spb.memstech.ru": (2, 0.5)}.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = 4,
+        delay: float = 0.3,
+        timeout: float = 30,
+        retries: int = 3,
+        backoff: float = 1.0,
+        backoff_max: float = 30.0,
+        headers: Optional[Dict[str, str]] = None,
+        cookies: Optional[Dict[str, str]] = None,
+        parser: str = "html.parser",
+        encoding: Optional[str] = None,
+        domain_policies: Optional[Dict[str, tuple]] = None,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        workers: Optional[int] = None,
+    ):
+        self.concurrency = concurrency
+        self.delay = delay
+        self.retries = max(1, retries)
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.parser = parser
+        self.encoding = encoding
+        self.domain_policies = domain_policies or {}
+        self.workers = workers or max(concurrency, sum(c for c, _ in self.domain_policies.values()))
+        self._client_kwargs = dict(
+            timeout=timeout,
+            headers=dict(headers or {}),
+            cookies=cookies,
+            follow_redirects=True,
+            http2=http2 and HAS_H2 and transport is None,
+            limits=httpx.Limits(max_connections=self.workers * 2,
+                                max_keepalive_connections=self.workers * 2),
+        )
+        if transport is not None:
+            self._client_kwargs["transport"] = transport
+
+        self.client: Optional[httpx.AsyncClient] = None
+        self._budgets: Dict[str, _DomainBudget] = {}
+        self._seen: set = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._stopped = False
+        self._handler_lock = threading.Lock()
+
+        self.errors: List[Dict] = []
+        self.stats = {"requests": 0, "retries": 0, "failed": 0, "bytes": 0, "tasks": 0}
+
+    # ── lifecycle ──
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(**self._client_kwargs)
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    # ── fetching ──
+
+    def _budget(self, url: str) -> _DomainBudget:
+        host = urlparse(url).hostname or ""
+        budget = self._budgets.get(host)
+        if budget is None:
+            concurrency, delay = self.domain_policies.get(host, (self.concurrency, self.delay))
+            budget = self._budgets[host] = _DomainBudget(concurrency, delay)
+        return budget
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        base = min(self.backoff * (2 ** attempt), self.backoff_max)
+        return base * random.uniform(0.5, 1.5)
+
+    async def fetch(self, url: str) -> Optional[httpx.Response]:
+        """GET с бюджетом домена и повторами. None — после исчерпания попыток (ошибка в self.errors)."""
+        budget = self._budget(url)
+        last_error = ""
+        for attempt in range(self.retries):
+            retry_after = None
+            penalized = False
+            try:
+                async with budget:
+                    self.stats["requests"] += 1
+                    response = await self.client.get(url)
+                if response.status_code in RETRY_STATUSES:
+                    last_error = f"HTTP {response.status_code}"
+                    retry_after = response.headers.get("Retry-After")
+                    if response.status_code == 429:
+                        # Пауза — через бюджет домена: её выдержат все воркеры этого хоста,
+                        # включая этот повтор, поэтому отдельный sleep ниже не нужен
+                        budget.penalize(self._backoff_delay(attempt, retry_after))
+                        penalized = True
+                else:
+                    response.raise_for_status()
+                    if self.encoding:
+                        response.encoding = self.encoding
+                    self.stats["bytes"] += len(response.content)
+                    return response
+            except httpx.HTTPStatusError as e:
+                # 4xx кроме 429 — повторять бессмысленно
+                last_error = str(e)
+                break
+            except httpx.HTTPError as e:
+                last_error = f"{type(e).__name__}: {e}"
+
+            if attempt < self.retries - 1:
+                self.stats["retries"] += 1
+                if not penalized:
+                    await asyncio.sleep(self._backoff_delay(attempt, retry_after))
+
+        self.stats["failed"] += 1
+        self.errors.append({"url": url, "error": last_error, "time": time.strftime("%Y-%m-%dT%H:%M:%S")})
+        return None
+
+    async def fetch_soup(self, url: str) -> Optional[BeautifulSoup]:
+        response = await self.fetch(url)
+        if response is None:
+            return None
+        return await asyncio.to_thread(BeautifulSoup, response.text, self.parser)
+
+    def _call_locked(self, fn: Callable, *args):
+        """Синхронный обработчик парсера — не больше одного одновременно."""
+        with self._handler_lock:
+            return fn(*args)
+
+    def _handle_sync(self, handler: Callable, task: CrawlTask, text: str):
+        """Разбор (параллельно с другими потоками) + обработчик под блокировкой."""
+        return self._call_locked(handler, task, BeautifulSoup(text, self.parser))
+
+    # ── frontier ──
+
+    def seen(self, url: str, kind: str = "page") -> bool:
+        return f"{kind}:{url}" in self._seen
+
+    def add(self, task: CrawlTask) -> bool:
+        """Поставить задачу в очередь (если такой (kind, url) ещё не было)."""
+        if self._stopped or task.key in self._seen:
+            return False
+        self._seen.add(task.key)
+        self._queue.put_nowait(task)
+        return True
+
+    def stop(self):
+        """Прекратить обход: оставшиеся задачи будут пропущены (например, достигнут limit)."""
+        self._stopped = True
+
+    async def _worker(self, handler: Callable, on_failed: Optional[Callable]):
+        is_async = inspect.iscoroutinefunction(handler)
+        while True:
+            task = await self._queue.get()
+            try:
+                if self._stopped:
+                    continue
+                response = await self.fetch(task.url)
+                if response is None:
+                    result = None
+                    if on_failed:
+                        result = await asyncio.to_thread(self._call_locked, on_failed, task)
+                elif is_async:
+                    self.stats["tasks"] += 1
+                    soup = await asyncio.to_thread(BeautifulSoup, response.text, self.parser)
+                    result = handler(task, soup)
+                else:
+                    self.stats["tasks"] += 1
+                    result = await asyncio.to_thread(self._handle_sync, handler, task, response.text)
+                if inspect.isawaitable(result):
+                    result = await result
+                for new_task in result or ():
+                    self.add(new_task)
+            except Exception as e:
+                self.errors.append({"url": task.url, "error": f"handler: {e}",
+                                    "time": time.strftime("%Y-%m-%dT%H:%M:%S")})
+            finally:
+                self._queue.task_done()
+
+    async def run(self, seeds: Iterable[CrawlTask], handler: Callable,
+                  on_failed: Optional[Callable] = None) -> "CrawlEngine":
+        """
+        Обойти всё, что достижимо из seeds. handler(task, soup) -> Iterable[CrawlTask] | None.
+        on_failed(task) вызывается, если страницу так и не удалось загрузить.
+        """
+        self._queue = asyncio.Queue()
+        self._stopped = False
+        for task in seeds:
+            self.add(task)
+        workers = [asyncio.create_task(self._worker(handler, on_failed)) for _ in range(self.workers)]
+        try:
+            await self._queue.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return self
+
+
+def crawl(seeds: Iterable[CrawlTask], handler: Callable, on_failed: Optional[Callable] = None,
+          **engine_kwargs) -> CrawlEngine:
+    """Синхронная обёртка: запустить CrawlEngine.run в новом event loop и вернуть движок (errors/stats)."""
+    async def _main():
+        async with CrawlEngine(**engine_kwargs) as engine:
+            return await engine.run(seeds, handler, on_failed)
+
+    return asyncio.run(_main())
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Корпус сырых HTTP-ответов магазинов: запись и воспроизведение без сети.
+
+Запись идёт на уровне транспорта (requests.HTTPAdapter.send, httpx.HTTPTransport /
+AsyncHTTPTransport), поэтому парсеры не меняются: любой парсер на requests или httpx
+можно записать и потом прогнать офлайн. Playwright (Moba browser-режим) не покрывается,
+для Moba записывается hybrid HTTP-часть.
+
+Структура корпуса (версионируется по магазину):
+    fixtures/<shop>/v1/index.json      — ключ "METHOD url" → status, headers, file
+    fixtures/<shop>/v1/<sha1>.html     — тело ответа (html / json / xls / xlsx / bin)
+
+Usage:
+    python fixtures.py record Taggsm -- Taggsm/parser.py --no-db --limit 200
+    python fixtures.py replay Taggsm -- Taggsm/parser.py --no-db --limit 200
+    python fixtures.py add Profi "Profi/Profi Astrahan.xls"     # добавить готовый файл
+    python fixtures.py list
+
+Из кода:
+    from fixtures import replaying
+    with replaying("Taggsm"):
+        TaggsmParser().parse_all()
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import runpy
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+FIXTURES_DIR = Path(os.environ.get("SHOPS_FIXTURES_DIR") or Path(__file__).resolve().parent / "fixtures")
+
+# Заголовки, которые не сохраняются: тело хранится уже раскодированным
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie", "connection"}
+
+_EXTENSIONS = [
+    ("html", ".html"),
+    ("json", ".json"),
+    ("spreadsheetml", ".xlsx"),
+    ("ms-excel", ".xls"),
+    ("xml", ".xml"),
+    ("text/plain", ".txt"),
+]
+
+
+def fixture_key(method: str, url: str, body: Optional[bytes] = None) -> str:
+    key = f"{method.upper()} {url}"
+    if body:
+        key += " #" + hashlib.sha1(body).hexdigest()[:12]
+    return key
+
+
+def _extension(content_type: str, url: str) -> str:
+    content_type = (content_type or "").lower()
+    for marker, ext in _EXTENSIONS:
+        if marker in content_type:
+            return ext
+    suffix = Path(url.split("?", 1)[0]).suffix.lower()
+    return suffix if suffix in (".xls", ".xlsx", ".json", ".html") else ".bin"
+
+
+def versions(shop: str) -> List[str]:
+    shop_dir = FIXTURES_DIR / shop
+    if not shop_dir.is_dir():
+        return []
+    found = [p.name for p in shop_dir.iterdir() if p.is_dir() and p.name[1:].isdigit() and p.name[0] == "v"]
+    return sorted(found, key=lambda v: int(v[1:]))
+
+
+class FixtureStore:
+    """Одна версия корпуса одного магазина."""
+
+    def __init__(self, shop: str, version: Optional[str] = None, create: bool = False):
+        existing = versions(shop)
+        if version is None:
+            if create:
+                version = f"v{int(existing[-1][1:]) + 1 if existing else 1}"
+            elif existing:
+                version = existing[-1]
+            else:
+                raise FileNotFoundError(f"Корпус {shop} пуст: сначала `python fixtures.py record {shop} -- ...`")
+        self.shop = shop
+        self.version = version
+        self.path = FIXTURES_DIR / shop / version
+        if create:
+            self.path.mkdir(parents=True, exist_ok=True)
+        elif not self.path.is_dir():
+            raise FileNotFoundError(f"Нет версии корпуса: {self.path}")
+
+        index_file = self.path / "index.json"
+        self.index: Dict[str, Dict] = {}
+        if index_file.exists():
+            self.index = json.loads(index_file.read_text(encoding="utf-8"))["entries"]
+
+    def entries(self, extensions: Optional[tuple] = None) -> Iterator[Dict]:
+        """Записи корпуса (с абсолютным путём к телу), опционально только с заданными расширениями."""
+        for key, entry in self.index.items():
+            if extensions and not entry["file"].endswith(extensions):
+                continue
+            yield {"key": key, **entry, "path": self.path / entry["file"]}
+
+    def get(self, key: str) -> Optional[tuple]:
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        return entry, (self.path / entry["file"]).read_bytes()
+
+    def put(self, key: str, url: str, status: int, headers: Dict[str, str], body: bytes) -> Dict:
+        headers = {k.lower(): v for k, v in headers.items() if k.lower() not in _DROP_HEADERS}
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + _extension(headers.get("content-type", ""), url)
+        (self.path / name).write_bytes(body)
+        entry = self.index[key] = {
+            "url": url,
+            "status": status,
+            "headers": headers,
+            "file": name,
+            "size": len(body),
+        }
+        return entry
+
+    def save(self):
+        data = {
+            "shop": self.shop,
+            "version": self.version,
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+            "entries": self.index,
+        }
+        (self.path / "index.json").write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+# ── requests ──
+
+def _requests_body(request: requests.PreparedRequest) -> Optional[bytes]:
+    body = request.body
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return body or None
+
+
+def _requests_response(request: requests.PreparedRequest, entry: Dict, body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = body
+    response.url = request.url
+    response.request = request
+    response.reason = "OK" if entry["status"] < 400 else "Fixture"
+    response.encoding = get_encoding_from_headers(response.headers)
+    return response
+
+
+# ── httpx ──
+
+def _httpx_response(request: httpx.Request, entry: Dict, body: bytes) -> httpx.Response:
+    return httpx.Response(entry["status"], headers=entry["headers"], content=body, request=request)
+
+
+@contextlib.contextmanager
+def _patched(sync_requests, sync_httpx, async_httpx):
+    orig = (HTTPAdapter.send, httpx.HTTPTransport.handle_request, httpx.AsyncHTTPTransport.handle_async_request)
+    HTTPAdapter.send = sync_requests
+    httpx.HTTPTransport.handle_request = sync_httpx
+    httpx.AsyncHTTPTransport.handle_async_request = async_httpx
+    try:
+        yield
+    finally:
+        HTTPAdapter.send, httpx.HTTPTransport.handle_request, httpx.AsyncHTTPTransport.handle_async_request = orig
+
+
+@contextlib.contextmanager
+def recording(shop: str, version: Optional[str] = None):
+    """Пропускать запросы в сеть и сохранять ответы в новую (или указанную) версию корпуса."""
+    store = FixtureStore(shop, version, create=True)
+    orig_requests, orig_httpx, orig_async = (
+        HTTPAdapter.send, httpx.HTTPTransport.handle_request, httpx.AsyncHTTPTransport.handle_async_request)
+
+    def rec_requests(adapter, request, **kwargs):
+        response = orig_requests(adapter, request, **kwargs)
+        store.put(fixture_key(request.method, request.url, _requests_body(request)),
+                  request.url, response.status_code, dict(response.headers), response.content)
+        return response
+
+    def _store_httpx(request, response, body):
+        entry = store.put(fixture_key(request.method, str(request.url), request.content or None),
+                          str(request.url), response.status_code, dict(response.headers), body)
+        return _httpx_response(request, entry, body)
+
+    def rec_httpx(transport, request):
+        response = orig_httpx(transport, request)
+        return _store_httpx(request, response, response.read())
+
+    async def rec_async(transport, request):
+        response = await orig_async(transport, request)
+        return _store_httpx(request, response, await response.aread())
+
+    print(f"[fixtures] запись {shop}/{store.version} → {store.path}")
+    try:
+        with _patched(rec_requests, rec_httpx, rec_async):
+            yield store
+    finally:
+        store.save()
+        print(f"[fixtures] сохранено ответов: {len(store.index)}")
+
+
+@contextlib.contextmanager
+def replaying(shop: str, version: Optional[str] = None):
+    """Отдавать ответы из корпуса; запрос, которого нет в корпусе, — сетевая ошибка (сеть не используется)."""
+    store = FixtureStore(shop, version)
+    missing: List[str] = []
+
+    def lookup(method: str, url: str, body: Optional[bytes]):
+        key = fixture_key(method, url, body)
+        found = store.get(key)
+        if found is None:
+            missing.append(key)
+        return found, key
+
+    def rep_requests(adapter, request, **kwargs):
+        found, key = lookup(request.method, request.url, _requests_body(request))
+        if found is None:
+            raise requests.ConnectionError(f"fixture missing: {key}", request=request)
+        return _requests_response(request, *found)
+
+    def rep_httpx(transport, request):
+        found, key = lookup(request.method, str(request.url), request.read() or None)
+        if found is None:
+            raise httpx.ConnectError(f"fixture missing: {key}", request=request)
+        return _httpx_response(request, *found)
+
+    async def rep_async(transport, request):
+        found, key = lookup(request.method, str(request.url), await request.aread() or None)
+        if found is None:
+            raise httpx.ConnectError(f"fixture missing: {key}", request=request)
+        await asyncio.sleep(0)
+        return _httpx_response(request, *found)
+
+    print(f"[fixtures] replay {shop}/{store.version}: {len(store.index)} ответов")
+    try:
+        with _patched(rep_requests, rep_httpx, rep_async):
+            yield store
+    finally:
+        if missing:
+            print(f"[fixtures] нет в корпусе: {len(missing)} запросов (первый: {missing[0]})")
+
+
+def run_script(script: str, args: List[str]):
+    """Запустить парсер как __main__ из его каталога (парсеры используют относительные пути)."""
+    script_path = Path(script).resolve()
+    old_cwd, old_argv, old_path = os.getcwd(), sys.argv, list(sys.path)
+    os.chdir(script_path.parent)
+    sys.argv = [str(script_path), *args]
+    sys.path.insert(0, str(script_path.parent))
+    try:
+        runpy.run_path(str(script_path), run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise
+    finally:
+        os.chdir(old_cwd)
+        sys.argv, sys.path[:] = old_argv, old_path
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Shop HTTP fixture corpus: record / replay / add / list")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    for name in ("record", "replay"):
+        p = sub.add_parser(name)
+        p.add_argument("shop")
+        p.add_argument("--version", default=None, help="v1, v2... (record: по умолчанию новая, replay: последняя)")
+        p.add_argument("script", help="Скрипт парсера (аргументы — после --)")
+        p.add_argument("args", nargs=argparse.REMAINDER)
+
+    p = sub.add_parser("add", help="Добавить сохранённые файлы (XLS, JSON, HTML) в корпус")
+    p.add_argument("shop")
+    p.add_argument("files", nargs="+")
+    p.add_argument("--version", default=None, help="По умолчанию последняя (или v1)")
+    p.add_argument("--url", default=None, help="URL, под которым отдавать файл (по умолчанию file:///<имя>)")
+
+    p = sub.add_parser("list")
+    p.add_argument("shop", nargs="?")
+
+    args = ap.parse_args()
+
+    if args.cmd in ("record", "replay"):
+        script_args = args.args[1:] if args.args[:1] == ["--"] else args.args
+        ctx = recording if args.cmd == "record" else replaying
+        with ctx(args.shop, args.version):
+            run_script(args.script, script_args)
+        return 0
+
+    if args.cmd == "add":
+        existing = versions(args.shop)
+        store = FixtureStore(args.shop, args.version or (existing[-1] if existing else "v1"), create=True)
+        content_types = {".xls": "application/vnd.ms-excel", ".json": "application/json",
+                         ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                         ".html": "text/html; charset=utf-8"}
+        for f in args.files:
+            path = Path(f)
+            url = args.url or f"file:///{path.name}"
+            ctype = content_types.get(path.suffix.lower(), "application/octet-stream")
+            store.put(fixture_key("GET", url), url, 200, {"content-type": ctype}, path.read_bytes())
+            print(f"  + {path.name} → {args.shop}/{store.version}")
+        store.save()
+        return 0
+
+    shops = [args.shop] if args.shop else sorted(p.name for p in FIXTURES_DIR.iterdir() if p.is_dir()) \
+        if FIXTURES_DIR.is_dir() else []
+    for shop in shops:
+        for version in versions(shop):
+            store = FixtureStore(shop, version)
+            size = sum(e["size"] for e in store.index.values())
+            print(f"{shop:<14}{version:<6}{len(store.index):>7} ответов {size / 1e6:>9.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
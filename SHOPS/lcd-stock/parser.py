@@ -32,10 +32,17 @@ PRODUCTS_XLSX = os.path.join(DATA_DIR, "products.xlsx")
 REQUEST_DELAY = 0.3  # Задержка между запросами
 REQUEST_TIMEOUT = 30
 
+# Детальные страницы товаров
+DETAIL_CONCURRENCY = 4  # Одновременных загрузок страниц товаров
+DETAILS_CACHE_JSON = os.path.join(DATA_DIR, "details_cache.json")  # url -> карточка + детали прошлого прогона
+DETAIL_MAX_AGE_HOURS = 24  # Детали старше — кандидаты на повторную загрузку (свежесть наличия)
+DETAIL_REFRESH_PER_RUN = 300  # Сколько устаревших страниц перезагружать за прогон (скользящее обновление)
+
 # === КОНФИГУРАЦИЯ БД (Supabase) ===
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from db_wrapper import get_db  # Автоматически маппит таблицы на новые имена
+from crawl_engine import CrawlTask, crawl
 
 # Таблицы (полные имена)
 TABLE_PRODUCTS = "lcdstock_products"
@@ -160,7 +167,7 @@ class Product:
 class LcdStockParser:
     """Парсер LCD-Stock.ru"""
 
-    def __init__(self, parse_stock: bool = True):
+    def __init__(self, parse_stock: bool = True, detail_concurrency: int = DETAIL_CONCURRENCY):
         self.client = httpx.Client(
             timeout=REQUEST_TIMEOUT,
             headers={
@@ -177,6 +184,13 @@ class LcdStockParser:
         self.parse_stock = parse_stock
         self.known_urls: Dict[str, str] = {}  # url → article, для инкрементального режима
         self.stats_skipped: int = 0
+        self.detail_concurrency = detail_concurrency
+        # Кэш деталей: url → {name, price, sku, color, stock, fetched_at}. use_details_cache=False (--full) — загружать всё
+        self.use_details_cache = True
+        self.details_cache: Dict[str, Dict] = {}
+        self.refresh_budget = DETAIL_REFRESH_PER_RUN
+        self.stats_changed: int = 0
+        self.stats_refreshed: int = 0
 
         os.makedirs(DATA_DIR, exist_ok=True)
 
@@ -247,6 +261,15 @@ class LcdStockParser:
         soup = self._get_page(url)
         if not soup:
             return result
+        return self._parse_details(soup)
+
+    def _parse_details(self, soup: BeautifulSoup) -> Dict:
+        """Наличие, артикул и цвет из страницы товара"""
+        result = {
+            "stock": [],
+            "sku": "",
+            "color": ""
+        }
 
         # Артикул: <div class="tovar-card-info"><span>Артикул: xxx</span></div>
         # Может быть несколько таких блоков, ищем тот где есть артикул
@@ -289,6 +312,95 @@ class LcdStockParser:
 
         return result
 
+    # === Кэш детальных страниц ===
+
+    def load_details_cache(self, filepath: str = None):
+        filepath = filepath or DETAILS_CACHE_JSON
+        try:
+            with open(filepath, encoding='utf-8') as f:
+                self.details_cache = json.load(f)
+        except FileNotFoundError:
+            self.details_cache = {}
+        except Exception as e:
+            print(f"[WARN] load_details_cache: {e}")
+            self.details_cache = {}
+
+    def save_details_cache(self, filepath: str = None):
+        filepath = filepath or DETAILS_CACHE_JSON
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.details_cache, f, ensure_ascii=False)
+
+    def _cached_details(self, p_data: Dict) -> Optional[Dict]:
+        """
+        Детали товара без загрузки страницы, если это допустимо, иначе None.
+
+        Страница товара перезагружается, если:
+        - товара нет в кэше или на карточке изменились цена/название;
+        - деталям больше DETAIL_MAX_AGE_HOURS и не исчерпан бюджет DETAIL_REFRESH_PER_RUN
+          (так наличие обновляется скользящим окном, а не всё разом).
+        Известный по БД URL без записи в кэше — тоже устаревший (старый режим отдавал только артикул).
+        """
+        url = p_data["url"]
+        if not self.use_details_cache:
+            return None
+
+        entry = self.details_cache.get(url)
+        if entry and (entry["name"] != p_data["name"] or entry["price"] != p_data["price"]):
+            self.stats_changed += 1
+            return None
+        if entry is None and url not in self.known_urls:
+            return None
+
+        if entry:
+            age_hours = (datetime.now() - datetime.fromisoformat(entry["fetched_at"])).total_seconds() / 3600
+            fresh = age_hours < DETAIL_MAX_AGE_HOURS
+        else:
+            fresh = False
+        if not fresh and self.refresh_budget > 0:
+            self.refresh_budget -= 1
+            self.stats_refreshed += 1
+            return None
+
+        self.stats_skipped += 1
+        if entry is None:
+            return {"sku": self.known_urls[url]}  # article из БД
+        return {
+            "sku": entry["sku"],
+            "color": entry["color"],
+            "stock": [StockInfo(outlet_name=o, status=st, quantity=q) for o, st, q in entry["stock"]],
+        }
+
+    def _remember_details(self, p_data: Dict, details: Dict):
+        self.details_cache[p_data["url"]] = {
+            "name": p_data["name"],
+            "price": p_data["price"],
+            "sku": details["sku"],
+            "color": details["color"],
+            "stock": [(s.outlet_name, s.status, s.quantity) for s in details["stock"]],
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def _fetch_details_concurrent(self, items: List[Dict]) -> Dict[str, Dict]:
+        """Загрузить страницы товаров пулом из detail_concurrency запросов: url → детали"""
+        results: Dict[str, Dict] = {}
+        total = len(items)
+
+        def handle(task: CrawlTask, soup: BeautifulSoup):
+            details = self._parse_details(soup)
+            results[task.url] = details
+            self._remember_details(task.data, details)
+            if len(results) % 50 == 0:
+                print(f"  Детали: {len(results)}/{total}")
+
+        engine = crawl(
+            [CrawlTask(p["url"], kind="detail", data=p) for p in items],
+            handle,
+            concurrency=self.detail_concurrency, delay=REQUEST_DELAY, timeout=REQUEST_TIMEOUT,
+            headers=dict(self.client.headers),
+        )
+        self.errors.extend(engine.errors)
+        return results
+
     def _load_known_urls(self) -> Dict[str, str]:
         """Загрузить известные URL→article из БД для инкрементального режима"""
         try:
@@ -329,87 +441,186 @@ class LcdStockParser:
                 break
 
             for card in cards:
-                try:
-                    title_el = card.select_one(".card-product_title")
-                    title = title_el.get_text(strip=True) if title_el else ""
+                p_data = self._parse_card(card, name)
+                if p_data:
+                    product_urls.append(p_data)
 
-                    link_el = card.select_one("a")
-                    href = link_el.get("href", "") if link_el else ""
-                    if href and not href.startswith("http"):
-                        href = urljoin(BASE_URL, href)
+            print(f"  Страница {page}: +{len(cards)} товаров")
 
-                    product_id = self._extract_product_id(href)
-                    if product_id in self.seen_ids:
-                        continue
-                    self.seen_ids.add(product_id)
+            next_link = soup.select_one(f'a[href*="page={page + 1}"]')
+            if not next_link:
+                break
 
-                    price_el = card.select_one(".product-price")
-                    price = self._parse_price(price_el.get_text() if price_el else "")
+            page += 1
 
-                    old_price_el = card.select_one(".product-price-old")
-                    old_price = self._parse_price(old_price_el.get_text() if old_price_el else "")
+        # Теперь детали: из кэша, если карточка не менялась, остальное — параллельной загрузкой
+        details_by_url: Dict[str, Dict] = {}
+        to_fetch = []
+        for p_data in product_urls:
+            if self.parse_stock:
+                details = self._cached_details(p_data)
+                if details is None:
+                    to_fetch.append(p_data)
+                    continue
+            elif p_data["url"] in self.known_urls:
+                # Инкрементальный режим без наличия: артикул из БД
+                details = {"sku": self.known_urls[p_data["url"]]}
+                self.stats_skipped += 1
+            else:
+                continue
+            details_by_url[p_data["url"]] = details
 
-                    brand = self._extract_brand(title)
+        if to_fetch:
+            print(f"  Детали: загрузка {len(to_fetch)} из {len(product_urls)}")
+            details_by_url.update(self._fetch_details_concurrent(to_fetch))
 
-                    product_urls.append({
-                        "product_id": product_id,
-                        "name": title,
-                        "price": price,
-                        "old_price": old_price,
-                        "url": href,
-                        "category": name,
-                        "brand": brand,
-                    })
+        for p_data in product_urls:
+            products.append(self._build_product(p_data, details_by_url.get(p_data["url"])))
 
-                except Exception as e:
-                    self.errors.append({"category": name, "error": str(e)})
+        return products
 
-            print(f"  Страница {page}: +{len(cards)} товаров")
+    def _parse_card(self, card, category_name: str) -> Optional[Dict]:
+        """Данные товара из карточки листинга (None — дубль или ошибка разбора)"""
+        try:
+            title_el = card.select_one(".card-product_title")
+            title = title_el.get_text(strip=True) if title_el else ""
+
+            link_el = card.select_one("a")
+            href = link_el.get("href", "") if link_el else ""
+            if href and not href.startswith("http"):
+                href = urljoin(BASE_URL, href)
+
+            product_id = self._extract_product_id(href)
+            if product_id in self.seen_ids:
+                return None
+            self.seen_ids.add(product_id)
+
+            price_el = card.select_one(".product-price")
+            price = self._parse_price(price_el.get_text() if price_el else "")
+
+            old_price_el = card.select_one(".product-price-old")
+            old_price = self._parse_price(old_price_el.get_text() if old_price_el else "")
+
+            return {
+                "product_id": product_id,
+                "name": title,
+                "price": price,
+                "old_price": old_price,
+                "url": href,
+                "category": category_name,
+                "brand": self._extract_brand(title),
+            }
+        except Exception as e:
+            self.errors.append({"category": category_name, "error": str(e)})
+            return None
 
-            next_link = soup.select_one(f'a[href*="page={page + 1}"]')
-            if not next_link:
-                break
+    def _build_product(self, p_data: Dict, details: Optional[Dict] = None) -> Product:
+        details = details or {}
+        return Product(
+            product_id=p_data["product_id"],
+            name=p_data["name"],
+            price=p_data["price"],
+            old_price=p_data["old_price"],
+            url=p_data["url"],
+            category=p_data["category"],
+            brand=p_data["brand"],
+            sku=details.get("sku", ""),
+            color=details.get("color", ""),
+            stock=details.get("stock", []),
+        )
 
-            page += 1
+    # === Конкурентный обход (crawl_engine) ===
 
-        # Теперь парсим детали для каждого товара
-        total = len(product_urls)
-        for i, p_data in enumerate(product_urls):
-            stock = []
-            sku = ""
-            color = ""
+    def _category_url(self, slug: str, page: int = 1) -> str:
+        url = f"{BASE_URL}/catalog/{slug}.html"
+        return url if page == 1 else f"{url}?page={page}"
 
-            # Инкрементальный режим: пропускаем detail fetch для известных URL
-            if self.known_urls and p_data["url"] in self.known_urls:
-                sku = self.known_urls[p_data["url"]]  # article из БД
+    def _handle_page(self, task: CrawlTask, soup: BeautifulSoup) -> List[CrawlTask]:
+        """
+        Обработчик CrawlEngine.
+        listing: карточки → товары / detail-задачи + следующая страница.
+        detail: наличие, артикул, цвет.
+        """
+        if task.kind == "detail":
+            details = self._parse_details(soup)
+            self._remember_details(task.data, details)
+            self.products.append(self._build_product(task.data, details))
+            return []
+
+        slug, name, page = task.data["slug"], task.data["name"], task.data["page"]
+        cards = soup.select(".card-product")
+        if not cards:
+            return []
+
+        new_tasks = []
+        for card in cards:
+            p_data = self._parse_card(card, name)
+            if not p_data:
+                continue
+            if self.parse_stock:
+                details = self._cached_details(p_data)
+                if details is None:
+                    new_tasks.append(CrawlTask(p_data["url"], kind="detail", data=p_data))
+                else:
+                    self.products.append(self._build_product(p_data, details))
+            elif p_data["url"] in self.known_urls:
+                self.products.append(self._build_product(p_data, {"sku": self.known_urls[p_data["url"]]}))
                 self.stats_skipped += 1
-            elif self.parse_stock:
-                details = self._get_product_details(p_data["url"])
-                stock = details["stock"]
-                sku = details["sku"]
-                color = details["color"]
-                if (i + 1) % 50 == 0:
-                    print(f"  Детали: {i + 1}/{total}")
-
-            product = Product(
-                product_id=p_data["product_id"],
-                name=p_data["name"],
-                price=p_data["price"],
-                old_price=p_data["old_price"],
-                url=p_data["url"],
-                category=p_data["category"],
-                brand=p_data["brand"],
-                sku=sku,
-                color=color,
-                stock=stock,
-            )
-            products.append(product)
+            else:
+                self.products.append(self._build_product(p_data))
+        print(f"  {name} стр. {page}: +{len(cards)} товаров")
 
-        return products
+        if soup.select_one(f'a[href*="page={page + 1}"]'):
+            new_tasks.append(CrawlTask(self._category_url(slug, page + 1), kind="listing",
+                                       data={"slug": slug, "name": name, "page": page + 1}))
+        return new_tasks
+
+    def _handle_failed(self, task: CrawlTask):
+        """Страница товара не загрузилась — товар сохраняем без деталей, как в последовательном режиме"""
+        if task.kind == "detail":
+            self.products.append(self._build_product(task.data))
+
+    def parse_all_concurrent(self, categories: Dict[str, str] = None, concurrency: int = 4):
+        """Парсить категории через crawl_engine: листинги и страницы товаров грузятся параллельно"""
+        categories = categories or CATEGORIES
+        if self.parse_stock:
+            self.load_details_cache()
+
+        print(f"\n{'='*60}")
+        print(f"Парсинг каталога LCD-Stock.ru (async, {concurrency} потоков)")
+        print(f"Дата: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Категорий: {len(categories)}")
+        print(f"Парсинг наличия: {'Да' if self.parse_stock else 'Нет'}")
+        print(f"{'='*60}\n")
+
+        engine = crawl(
+            [CrawlTask(self._category_url(slug), kind="listing", data={"slug": slug, "name": name, "page": 1})
+             for slug, name in categories.items()],
+            self._handle_page,
+            on_failed=self._handle_failed,
+            concurrency=concurrency, delay=REQUEST_DELAY, timeout=REQUEST_TIMEOUT,
+            headers=dict(self.client.headers),
+        )
+        self.errors.extend(engine.errors)
+
+        print(f"\n{'='*60}")
+        print(f"ИТОГО: {len(self.products)} товаров")
+        if self.stats_skipped > 0:
+            print(f"Детали из кэша (карточка не менялась): {self.stats_skipped}")
+        if self.stats_changed or self.stats_refreshed:
+            print(f"Перезагружено: изменились {self.stats_changed}, устарели {self.stats_refreshed}")
+        print(f"Ошибок: {len(self.errors)}")
+        print(f"HTTP: {engine.stats}")
+        print(f"{'='*60}")
+
+        if self.parse_stock:
+            self.save_details_cache()
 
     def parse_all(self, categories: Dict[str, str] = None):
         """Парсить все категории"""
         categories = categories or CATEGORIES
+        if self.parse_stock:
+            self.load_details_cache()
 
         print(f"\n{'='*60}")
         print(f"Парсинг каталога LCD-Stock.ru")
@@ -429,10 +640,15 @@ class LcdStockParser:
         print(f"\n{'='*60}")
         print(f"ИТОГО: {len(self.products)} товаров")
         if self.stats_skipped > 0:
-            print(f"Пропущено (уже в БД): {self.stats_skipped}")
+            print(f"Детали из кэша (карточка не менялась): {self.stats_skipped}")
+        if self.stats_changed or self.stats_refreshed:
+            print(f"Перезагружено: изменились {self.stats_changed}, устарели {self.stats_refreshed}")
         print(f"Ошибок: {len(self.errors)}")
         print(f"{'='*60}")
 
+        if self.parse_stock:
+            self.save_details_cache()
+
     def save_to_database(self):
         """Сохранить в PostgreSQL"""
         if not self.products:
@@ -810,6 +1026,8 @@ def main():
     arg_parser.add_argument('--init-db', action='store_true', help='Только инициализация БД')
     arg_parser.add_argument('--category', type=str, help='Только одна категория')
     arg_parser.add_argument('--full', action='store_true', help='Полный парсинг (detail fetch для всех товаров, игнорировать кэш из БД)')
+    arg_parser.add_argument('--concurrency', type=int, default=0, help='Параллельная загрузка страниц через crawl_engine (N запросов)')
+    arg_parser.add_argument('--detail-concurrency', type=int, default=DETAIL_CONCURRENCY, help='Одновременных загрузок страниц товаров')
     args = arg_parser.parse_args()
 
     print("LCD-Stock.ru Parser v3.0")
@@ -834,14 +1052,18 @@ def main():
             print(f"Категория '{args.category}' не найдена")
             return
 
-    with LcdStockParser(parse_stock=not args.no_stock) as parser:
+    with LcdStockParser(parse_stock=not args.no_stock, detail_concurrency=args.detail_concurrency) as parser:
         if not args.full and not args.no_db:
             parser.known_urls = parser._load_known_urls()
             print(f"[DB] Известных URL: {len(parser.known_urls)}, инкрементальный режим")
         elif args.full:
+            parser.use_details_cache = False
             print(f"[FULL] Полный парсинг — detail fetch для всех товаров")
 
-        parser.parse_all(categories)
+        if args.concurrency > 0:
+            parser.parse_all_concurrent(categories, concurrency=args.concurrency)
+        else:
+            parser.parse_all(categories)
 
         if not args.no_db:
             if args.direct:
@@ -19,7 +19,7 @@ import time
 from datetime import datetime
 from typing import List, Dict, Optional, Set
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
 
 from config import (
     BASE_URL, CATALOG_URL, ROOT_CATEGORIES,
@@ -31,6 +31,7 @@ from config import (
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from db_wrapper import get_db  # Автоматически маппит таблицы на новые имена
+from crawl_engine import CrawlTask, crawl
 
 SHOP_CODE = "memstech"
 SHOP_NAME = "MemsTech"
@@ -76,6 +77,9 @@ class MemsTechParser:
         self.current_city_name: Optional[str] = None
         self.base_url: str = BASE_URL
         self.catalog_url: str = CATALOG_URL
+        # Все категории из обхода первого города (включая незагрузившиеся): path -> категория.
+        # Другие города грузят эти листинги без обхода дерева
+        self.listing_plan: Dict[str, str] = {}
 
         os.makedirs(DATA_DIR, exist_ok=True)
 
@@ -92,6 +96,7 @@ class MemsTechParser:
         self.products = []
         self.seen_product_ids = set()
         self.categories_crawled = set()
+        self.listing_plan = {}
         # Пересоздаём сессию — старая накапливает cookies/connections и ломается после ~8 городов
         self.session.close()
         self.session = requests.Session()
@@ -146,6 +151,43 @@ class MemsTechParser:
                     breadcrumbs.append(text)
         return ' > '.join(breadcrumbs) if breadcrumbs else ''
 
+    @staticmethod
+    def _city_fields(data: Dict) -> Dict:
+        """Поля карточки, которые отличаются по городам: цена и наличие"""
+        price = 0
+        prices = data.get('prices', [])
+        if prices and len(prices) > 0:
+            price_info = prices[0]
+            if 'discount' in price_info:
+                price = price_info['discount'].get('value', 0)
+            elif 'base' in price_info:
+                price = price_info['base'].get('value', 0)
+        return {'price': price, 'in_stock': bool(data.get('available', False))}
+
+    @staticmethod
+    def _parse_card_static(item_div, product_id: str, name: str) -> Dict:
+        """Общие для всех городов поля карточки (артикул, путь товара)"""
+        # Артикул из HTML
+        article = ''
+        article_div = item_div.find('div', class_='catalog-section-item-article')
+        if article_div:
+            article_span = article_div.find('span')
+            if article_span:
+                article_text = article_span.get_text(strip=True)
+                # Извлекаем код после "Код: "
+                match = re.search(r'Код:\s*(.+)', article_text)
+                if match:
+                    article = match.group(1).strip()
+
+        # URL товара (путь — домен подставляется по городу)
+        link = item_div.find('a', class_='catalog-section-item-name-wrapper')
+        return {
+            'name': name,
+            'article': article or f"MT-{product_id}",
+            'path': link.get('href', '') if link else '',
+            'has_link': link is not None,
+        }
+
     def parse_product_from_data(self, item_div, category: str) -> Optional[Dict]:
         """Парсит товар из data-data атрибута"""
         try:
@@ -157,52 +199,18 @@ class MemsTechParser:
             data_json = item_div.get('data-data', '{}')
             data = json.loads(data_json)
 
-            name = data.get('name', '')
-            available = data.get('available', False)
-
-            # Цена
-            price = 0
-            prices = data.get('prices', [])
-            if prices and len(prices) > 0:
-                price_info = prices[0]
-                if 'discount' in price_info:
-                    price = price_info['discount'].get('value', 0)
-                elif 'base' in price_info:
-                    price = price_info['base'].get('value', 0)
-
-            # Артикул из HTML
-            article = ''
-            article_div = item_div.find('div', class_='catalog-section-item-article')
-            if article_div:
-                article_span = article_div.find('span')
-                if article_span:
-                    article_text = article_span.get_text(strip=True)
-                    # Извлекаем код после "Код: "
-                    match = re.search(r'Код:\s*(.+)', article_text)
-                    if match:
-                        article = match.group(1).strip()
-
-            # URL товара
-            url = ''
-            link = item_div.find('a', class_='catalog-section-item-name-wrapper')
-            if link:
-                url = urljoin(self.base_url, link.get('href', ''))
-
-            # Наличие из HTML
-            quantity_div = item_div.find('div', class_='catalog-section-item-quantity')
-            stock_text = ''
-            if quantity_div:
-                stock_text = quantity_div.get_text(strip=True).lower()
-
+            city_fields = self._city_fields(data)
+            card = self._parse_card_static(item_div, product_id, data.get('name', ''))
             self.seen_product_ids.add(product_id)
 
             product = {
                 'product_id': product_id,
-                'article': article or f"MT-{product_id}",
-                'name': name,
-                'price': price,
+                'article': card['article'],
+                'name': card['name'],
+                'price': city_fields['price'],
+                'in_stock': city_fields['in_stock'],
                 'category': category,
-                'url': url,
+                'url': urljoin(self.base_url, card['path']) if card['has_link'] else '',
             }
             if self.current_city_id:
                 product['city_id'] = self.current_city_id
@@ -301,6 +309,208 @@ class MemsTechParser:
 
         return total_products
 
+    # === Конкурентный обход (crawl_engine) ===
+
+    def _handle_page(self, task: CrawlTask, soup: BeautifulSoup) -> List[CrawlTask]:
+        """
+        Обработчик CrawlEngine.
+        category: товары 1-й страницы + page-задачи пагинации + category-задачи подкатегорий.
+        page: товары со страницы пагинации.
+        """
+        indent = "  " * task.depth
+        items = soup.find_all('div', class_='catalog-section-item', attrs={'data-entity': 'items-row'})
+
+        if task.kind == "page":
+            category = task.data["category"]
+            count = 0
+            for item in items:
+                product = self.parse_product_from_data(item, category)
+                if product:
+                    self.products.append(product)
+                    count += 1
+            print(f"{indent}  {category} стр. {task.data['page']}: +{count}")
+            return []
+
+        url = task.url
+        self.categories_crawled.add(url)
+        category = self.extract_breadcrumbs(soup) or self._category_from_url(url)
+        # В план попадает каждая категория: в другом городе товары могут быть там,
+        # где в первом их нет
+        self.listing_plan[urlparse(url).path] = category
+
+        new_tasks = []
+        if items:
+            count = 0
+            for item in items:
+                product = self.parse_product_from_data(item, category)
+                if product:
+                    self.products.append(product)
+                    count += 1
+            total_pages = min(self.get_total_pages(soup), MAX_PAGES)
+            print(f"{indent}Категория: {url} — страниц: {total_pages}, стр. 1: +{count}")
+            new_tasks.extend(
+                CrawlTask(f"{url}?PAGEN_3={page}", kind="page", depth=task.depth,
+                          data={"category": category, "page": page})
+                for page in range(2, total_pages + 1)
+            )
+
+        new_tasks.extend(
+            CrawlTask(sub_url, kind="category", depth=task.depth + 1)
+            for sub_url in self.get_subcategories(soup, url)
+        )
+        return new_tasks
+
+    @staticmethod
+    def _category_from_url(url: str) -> str:
+        return url.rstrip('/').split('/')[-1].replace('_', ' ').title()
+
+    def _handle_failed(self, task: CrawlTask):
+        """Категория не загрузилась — оставляем её в плане, другие города попробуют её сами"""
+        if task.kind == "category":
+            self.listing_plan.setdefault(urlparse(task.url).path, self._category_from_url(task.url))
+
+    def parse_all_concurrent(self, concurrency: int = 4) -> List[Dict]:
+        """Парсит все корневые категории текущего города через crawl_engine"""
+        print(f"\nПарсинг каталога {SHOP_NAME} (async, {concurrency} потоков на домен)")
+        print(f"Дата: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print("=" * 60)
+
+        engine = crawl(
+            [CrawlTask(f"{self.catalog_url}/{slug}/", kind="category") for slug in ROOT_CATEGORIES],
+            self._handle_page,
+            on_failed=self._handle_failed,
+            concurrency=concurrency, delay=REQUEST_DELAY, timeout=REQUEST_TIMEOUT,
+            headers=dict(self.session.headers),
+        )
+        for err in engine.errors:
+            print(f"  Ошибка загрузки {err['url']}: {err['error']}")
+
+        print(f"\n{'='*60}")
+        print(f"ИТОГО: {len(self.products)} товаров")
+        print(f"HTTP: {engine.stats}")
+        print("=" * 60)
+
+        return self.products
+
+    def _parse_city_card(self, item_div, category: str, city: Dict) -> Optional[Dict]:
+        """Товар для города при мультигородском обходе (дедупликация — в пределах города)"""
+        product_id = item_div.get('data-id', '')
+        if not product_id or product_id in city['seen']:
+            return None
+        try:
+            data = json.loads(item_div.get('data-data', '{}'))
+        except ValueError:
+            return None
+
+        card = self._parse_card_static(item_div, product_id, data.get('name', ''))
+        city['seen'].add(product_id)
+
+        return {
+            'product_id': product_id,
+            'article': card['article'],
+            'name': card['name'],
+            **self._city_fields(data),
+            'category': category,
+            'url': urljoin(city['base_url'], card['path']) if card['has_link'] else '',
+            'city_id': city['id'],
+            'city_name': city['name'],
+        }
+
+    def _handle_city_page(self, task: CrawlTask, soup: BeautifulSoup) -> List[CrawlTask]:
+        """
+        Обработчик CrawlEngine для городов после первого: только листинги из listing_plan,
+        без обхода дерева подкатегорий. На 1-й странице ставятся задачи пагинации этого города.
+        """
+        city, category, page = task.data["city"], task.data["category"], task.data["page"]
+        items = soup.find_all('div', class_='catalog-section-item', attrs={'data-entity': 'items-row'})
+        for item in items:
+            product = self._parse_city_card(item, category, city)
+            if product:
+                city['products'].append(product)
+
+        if page != 1 or not items:
+            return []
+        total_pages = min(self.get_total_pages(soup), MAX_PAGES)
+        return [
+            CrawlTask(f"{task.url}?PAGEN_3={p}", kind="city_page",
+                      data={"city": city, "category": category, "page": p})
+            for p in range(2, total_pages + 1)
+        ]
+
+    def parse_all_cities_concurrent(self, concurrency: int = 2) -> List[Dict]:
+        """
+        Мультигородской парсинг через crawl_engine.
+
+        Первый город обходится полностью (дерево категорий), все найденные категории
+        запоминаются в listing_plan. Остальные города грузятся параллельно — у каждого
+        поддомена свой бюджет: concurrency запросов и REQUEST_DELAY между стартами.
+        Незагрузившиеся листинги городов повторяются одним дополнительным проходом.
+        """
+        subdomains = list(CITIES.keys())
+        first, rest = subdomains[0], subdomains[1:]
+
+        print("\n" + "=" * 60)
+        print(f"МУЛЬТИГОРОДСКОЙ ПАРСИНГ (async): {len(CITIES)} городов, {concurrency} потоков на поддомен")
+        print("=" * 60)
+
+        # 1. Первый город — полный обход, строим listing_plan
+        print(f"\nГОРОД [1/{len(CITIES)}]: {CITIES[first][0]} — обход дерева категорий")
+        self.reset_for_new_city()
+        self.set_city(first, CITIES[first][0])
+        self.parse_all_concurrent(concurrency)
+        all_products = list(self.products)
+        print(f"Листингов в плане: {len(self.listing_plan)}")
+
+        # 2. Остальные города — только листинги из плана, параллельно по поддоменам
+        cities = {
+            sub: {"id": sub, "name": CITIES[sub][0], "base_url": get_city_url(sub),
+                  "seen": set(), "products": []}
+            for sub in rest
+        }
+        seeds = [
+            CrawlTask(f"{city['base_url']}{path}", kind="city_listing",
+                      data={"city": city, "category": category, "page": 1})
+            for city in cities.values()
+            for path, category in self.listing_plan.items()
+        ]
+        print(f"\nГОРОДА [2-{len(CITIES)}/{len(CITIES)}]: {len(seeds)} листингов")
+        engine_kwargs = dict(
+            concurrency=concurrency, delay=REQUEST_DELAY, timeout=REQUEST_TIMEOUT,
+            headers=dict(self.session.headers),
+            domain_policies={urlparse(c["base_url"]).hostname: (concurrency, REQUEST_DELAY)
+                             for c in cities.values()},
+        )
+        failed: List[CrawlTask] = []
+        engine = crawl(seeds, self._handle_city_page, on_failed=failed.append, **engine_kwargs)
+        stats = dict(engine.stats)
+
+        if failed:
+            # Один повтор незагрузившихся страниц после паузы
+            print(f"Повтор {len(failed)} незагрузившихся страниц")
+            time.sleep(REQUEST_DELAY * 10)
+            retry, failed = failed, []
+            engine = crawl(retry, self._handle_city_page, on_failed=failed.append, **engine_kwargs)
+            for key, value in engine.stats.items():
+                stats[key] += value
+
+        failed_by_host: Dict[str, int] = {}
+        for task in failed:
+            host = urlparse(task.url).hostname or ""
+            failed_by_host[host] = failed_by_host.get(host, 0) + 1
+            print(f"  Не загружено: {task.url}")
+
+        for city in cities.values():
+            all_products.extend(city["products"])
+            failed = failed_by_host.get(urlparse(city["base_url"]).hostname, 0)
+            print(f"  {city['name']}: {len(city['products'])} товаров" + (f", ошибок: {failed}" if failed else ""))
+
+        self.products = all_products
+        print("\n" + "=" * 60)
+        print(f"ВСЕГО ПО ВСЕМ ГОРОДАМ: {len(all_products)} товаров")
+        print(f"HTTP: {stats}")
+        print("=" * 60)
+        return all_products
+
     def parse_all(self) -> List[Dict]:
         """Парсит все корневые категории"""
         print(f"\nПарсинг каталога {SHOP_NAME}")
@@ -672,6 +882,8 @@ def main():
                            help='Не сохранять в БД (только CSV/JSON)')
     arg_parser.add_argument('--limit', type=int, default=0,
                            help='Лимит товаров (0 = без лимита)')
+    arg_parser.add_argument('--concurrency', type=int, default=0,
+                           help='Параллельная загрузка страниц через crawl_engine (N запросов на домен)')
     args = arg_parser.parse_args()
 
     if args.process:
@@ -683,7 +895,7 @@ def main():
     parser = MemsTechParser()
 
     if args.all_cities:
-        products = parser.parse_all_cities()
+        products = parser.parse_all_cities_concurrent(args.concurrency) if args.concurrency > 0 else parser.parse_all_cities()
     elif args.city:
         subdomain, city_name = None, None
         if args.city in CITIES:
@@ -701,11 +913,11 @@ def main():
                 print(f"  {sub}: {cname} ({shops} магазин(ов))")
             return
         parser.set_city(subdomain, city_name)
-        products = parser.parse_all()
+        products = parser.parse_all_concurrent(args.concurrency) if args.concurrency > 0 else parser.parse_all()
     else:
         # По умолчанию - Москва (memstech.ru)
         parser.set_city("memstech.ru", "Москва")
-        products = parser.parse_all()
+        products = parser.parse_all_concurrent(args.concurrency) if args.concurrency > 0 else parser.parse_all()
 
     # Лимит
     if args.limit > 0 and len(products) > args.limit:
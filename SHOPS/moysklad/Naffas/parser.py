@@ -19,6 +19,7 @@ CATALOG_ID = "S1AlNWEsMzM7"
 SHOP_NAME = "Naffas"
 SHOP_CODE = "moysklad-naffas"
 API_URL = f"https://b2b.moysklad.ru/desktop-api/public/{CATALOG_ID}/products.json"
+CONCURRENCY = 4  # Параллельных страниц API (1 = последовательная загрузка)
 DATA_DIR = "data"
 PRODUCTS_CSV = f"{DATA_DIR}/products.csv"
 PRODUCTS_JSON = f"{DATA_DIR}/products.json"
@@ -29,6 +30,8 @@ USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from db_wrapper import get_db  # Автоматически маппит таблицы на новые имена
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from moysklad_client import stream_catalog  # Общая постраничная загрузка для каталогов МойСклад
 
 
 def fetch_products():
@@ -69,6 +72,18 @@ def fetch_products():
     return all_products
 
 
+def fetch_products_streaming(on_page, concurrency: int = CONCURRENCY):
+    """
+    Параллельная загрузка: первая страница даёт size, остальные offset'ы грузятся
+    одновременно. on_page(processed) вызывается для каждой страницы по мере прихода.
+    """
+    print(f"Загрузка товаров из API (параллельно: {concurrency})...")
+    print(f"URL: {API_URL}")
+    total = stream_catalog(API_URL, lambda page: on_page(process_products(page)), concurrency=concurrency)
+    print(f"Всего загружено: {total} товаров")
+    return total
+
+
 def process_products(products):
     """Обрабатывает и нормализует товары"""
     processed = []
@@ -91,6 +106,25 @@ def process_products(products):
     return processed
 
 
+CSV_FIELDS = ["product_id", "sku", "name", "price", "availability", "category", "url"]
+JSON_SOURCE = "b2b.moysklad.ru (NAFFAS)"
+
+
+def _standard_row(p: Dict) -> Dict:
+    """Товар в стандартном формате CSV/JSON"""
+    stock = p.get("stock", 0) or 0
+    available = p.get("available", False)
+    return {
+        "product_id": p.get("code", ""),
+        "sku": p.get("article") or p.get("code", ""),
+        "name": p.get("name", ""),
+        "price": p.get("price", 0),
+        "availability": "В наличии" if stock > 0 or available else "Нет в наличии",
+        "category": p.get("category", ""),
+        "url": "",
+    }
+
+
 def save_to_csv(products, filename=PRODUCTS_CSV):
     """Сохраняет товары в CSV (стандартный формат)"""
     if not products:
@@ -98,27 +132,10 @@ def save_to_csv(products, filename=PRODUCTS_CSV):
         return
 
     # Конвертируем в стандартный формат
-    standard = []
-    for p in products:
-        stock = p.get("stock", 0) or 0
-        available = p.get("available", False)
-        availability = "В наличии" if stock > 0 or available else "Нет в наличии"
-        sku = p.get("article") or p.get("code", "")
-
-        standard.append({
-            "product_id": p.get("code", ""),
-            "sku": sku,
-            "name": p.get("name", ""),
-            "price": p.get("price", 0),
-            "availability": availability,
-            "category": p.get("category", ""),
-            "url": "",
-        })
-
-    fieldnames = ["product_id", "sku", "name", "price", "availability", "category", "url"]
+    standard = [_standard_row(p) for p in products]
 
     with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=';')
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, delimiter=';')
         writer.writeheader()
         writer.writerows(standard)
 
@@ -128,25 +145,10 @@ def save_to_csv(products, filename=PRODUCTS_CSV):
 def save_to_json(products, filename=PRODUCTS_JSON):
     """Сохраняет товары в JSON (стандартный формат)"""
     # Конвертируем в стандартный формат
-    standard = []
-    for p in products:
-        stock = p.get("stock", 0) or 0
-        available = p.get("available", False)
-        availability = "В наличии" if stock > 0 or available else "Нет в наличии"
-        sku = p.get("article") or p.get("code", "")
-
-        standard.append({
-            "product_id": p.get("code", ""),
-            "sku": sku,
-            "name": p.get("name", ""),
-            "price": p.get("price", 0),
-            "availability": availability,
-            "category": p.get("category", ""),
-            "url": "",
-        })
+    standard = [_standard_row(p) for p in products]
 
     data = {
-        "source": "b2b.moysklad.ru (NAFFAS)",
+        "source": JSON_SOURCE,
         "date": datetime.now().isoformat(),
         "total": len(standard),
         "products": standard,
@@ -160,26 +162,91 @@ def save_to_json(products, filename=PRODUCTS_JSON):
 
 def print_stats(products):
     """Выводит статистику по товарам"""
-    print("\n" + "=" * 60)
-    print("СТАТИСТИКА")
-    print("=" * 60)
+    stats = ProductStats()
+    stats.add(products)
+    stats.print()
 
-    # По категориям
-    categories = {}
-    for p in products:
-        cat = p.get("category", "Без категории")
-        categories[cat] = categories.get(cat, 0) + 1
 
-    print(f"\nКатегорий: {len(categories)}")
-    print("\nТоп-10 категорий:")
-    for cat, count in sorted(categories.items(), key=lambda x: -x[1])[:10]:
-        print(f"  {count:4d} | {cat}")
+class ProductStats:
+    """Статистика по категориям и ценам, накапливается постранично"""
 
+    def __init__(self):
+        self.categories: Dict[str, int] = {}
+        self.price_min = None
+        self.price_max = None
 
-    # Ценовой диапазон
-    prices = [p.get("price", 0) for p in products if p.get("price", 0) > 0]
-    if prices:
-        print(f"Цены: от {min(prices):.0f} до {max(prices):.0f} руб")
+    def add(self, products: List[Dict]):
+        for p in products:
+            cat = p.get("category", "Без категории")
+            self.categories[cat] = self.categories.get(cat, 0) + 1
+            price = p.get("price", 0)
+            if price > 0:
+                self.price_min = price if self.price_min is None else min(self.price_min, price)
+                self.price_max = price if self.price_max is None else max(self.price_max, price)
+
+    def print(self):
+        print("\n" + "=" * 60)
+        print("СТАТИСТИКА")
+        print("=" * 60)
+
+        # По категориям
+        print(f"\nКатегорий: {len(self.categories)}")
+        print("\nТоп-10 категорий:")
+        for cat, count in sorted(self.categories.items(), key=lambda x: -x[1])[:10]:
+            print(f"  {count:4d} | {cat}")
+
+        # Ценовой диапазон
+        if self.price_min is not None:
+            print(f"Цены: от {self.price_min:.0f} до {self.price_max:.0f} руб")
+
+
+class StreamingOutputs:
+    """
+    CSV/JSON и статистика по мере прихода страниц — список всех товаров не собирается.
+    Файлы пишутся во временные *.tmp и подменяют прежние только в finish():
+    при сбое загрузки остаются результаты прошлого прогона.
+    """
+
+    def __init__(self, csv_path: str = PRODUCTS_CSV, json_path: str = PRODUCTS_JSON):
+        self.paths = [csv_path, json_path]
+        self.stats = ProductStats()
+        self.total = 0
+        self._csv_file = open(f"{csv_path}.tmp", 'w', newline='', encoding='utf-8-sig')
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=CSV_FIELDS, delimiter=';')
+        self._csv.writeheader()
+        self._json_file = open(f"{json_path}.tmp", 'w', encoding='utf-8')
+        self._json_file.write('{\n  "source": %s,\n  "date": %s,\n  "products": [' % (
+            json.dumps(JSON_SOURCE, ensure_ascii=False), json.dumps(datetime.now().isoformat())))
+        self._finished = False
+
+    def write(self, products: List[Dict]):
+        self.stats.add(products)
+        for p in products:
+            row = _standard_row(p)
+            self._csv.writerow(row)
+            item = json.dumps(row, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+            self._json_file.write(("," if self.total else "") + "\n    " + item)
+            self.total += 1
+
+    def finish(self):
+        # total — после списка: его не знаем, пока не пришла последняя страница
+        self._json_file.write('\n  ],\n  "total": %d\n}' % self.total)
+        self._csv_file.close()
+        self._json_file.close()
+        for path in self.paths:
+            os.replace(f"{path}.tmp", path)
+            print(f"Сохранено в {path}: {self.total} товаров")
+        self._finished = True
+
+    def close(self):
+        """Без finish() (сбой) — временные файлы удаляются"""
+        if self._finished:
+            return
+        self._csv_file.close()
+        self._json_file.close()
+        for path in self.paths:
+            if os.path.exists(f"{path}.tmp"):
+                os.remove(f"{path}.tmp")
 
 
 def ensure_outlet():
@@ -198,43 +265,78 @@ def ensure_outlet():
         conn.close()
 
 
+_STAGING_INSERT_SQL = """
+    INSERT INTO moysklad_naffas_staging (
+        outlet_code, name, article, category,
+        price, url
+    ) VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+def _staging_row(p: Dict) -> tuple:
+    sku = p.get("article") or p.get("code", "")
+    return (
+        SHOP_CODE,
+        p.get("name", ""),
+        sku,
+        p.get("category", ""),
+        p.get("price", 0),
+        "",  # URL not available in MoySklad API
+    )
+
+
 def save_staging(products: List[Dict]):
     """Сохранение товаров в staging таблицу"""
     if not products:
         print("Нет товаров для сохранения в staging")
         return
 
-    conn = get_db()
-    cur = conn.cursor()
+    writer = StagingWriter()
     try:
-        # Очищаем staging только для текущего магазина (append mode для других)
-        cur.execute("DELETE FROM moysklad_naffas_staging WHERE outlet_code = %s", (SHOP_CODE,))
-
-        # Вставляем товары
-        insert_sql = """
-            INSERT INTO moysklad_naffas_staging (
-                outlet_code, name, article, category,
-                price, url
-            ) VALUES (%s, %s, %s, %s, %s, %s)
-        """
-
-        for p in products:
-            sku = p.get("article") or p.get("code", "")
-
-            cur.execute(insert_sql, (
-                SHOP_CODE,
-                p.get("name", ""),
-                sku,
-                p.get("category", ""),
-                p.get("price", 0),
-                "",  # URL not available in MoySklad API
-            ))
-
-        conn.commit()
-        print(f"Сохранено в staging: {len(products)} товаров ({SHOP_NAME})")
+        writer.write(products)
+        writer.commit()
     finally:
-        cur.close()
-        conn.close()
+        writer.close()
+    print(f"Сохранено в staging: {len(products)} товаров ({SHOP_NAME})")
+
+
+class StagingWriter:
+    """
+    Постраничная запись в staging одной транзакцией: при первой записи удаляет строки
+    этого магазина, дальше каждая страница вставляется, как только пришла из API.
+    Строки видны другим (process_staging) только после commit() — если загрузка упала
+    на середине, close() откатывает транзакцию и в staging остаётся прошлый полный набор.
+    Запись идёт последовательно (stream_catalog вызывает on_page по одной странице).
+    """
+
+    def __init__(self):
+        self.conn = get_db()
+        self.written = 0
+        self._cleared = False
+        self._committed = False
+
+    def write(self, products: List[Dict]):
+        if not products:
+            return
+        cur = self.conn.cursor()
+        try:
+            if not self._cleared:
+                # Очищаем staging только для текущего магазина (append mode для других)
+                cur.execute("DELETE FROM moysklad_naffas_staging WHERE outlet_code = %s", (SHOP_CODE,))
+                self._cleared = True
+            cur.executemany(_STAGING_INSERT_SQL, [_staging_row(p) for p in products])
+            self.written += len(products)
+        finally:
+            cur.close()
+
+    def commit(self):
+        self.conn.commit()
+        self._committed = True
+
+    def close(self):
+        if not self._committed:
+            self.conn.rollback()
+        self.conn.close()
 
 
 def process_staging(full_mode: bool = False):
@@ -306,6 +408,9 @@ def main():
                            help='Не сохранять в БД (только CSV/JSON)')
     arg_parser.add_argument('--full', action='store_true',
                            help='Полный парсинг (UPSERT и так полный для этого парсера)')
+    arg_parser.add_argument('--concurrency', type=int, default=CONCURRENCY,
+                           help=f'Параллельных страниц API, страницы пишутся в staging по мере загрузки '
+                                f'(по умолчанию {CONCURRENCY}; 1 = последовательно)')
     args = arg_parser.parse_args()
 
     # Только обработка staging
@@ -322,28 +427,55 @@ def main():
     print(f"Дата: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 60)
 
-    # Загружаем товары
-    products = fetch_products()
+    if args.concurrency > 1:
+        # Страницы обрабатываются и пишутся в CSV/JSON и staging по мере прихода
+        outputs = StreamingOutputs()
+        writer = None if args.no_db else StagingWriter()
+
+        def on_page(page):
+            outputs.write(page)
+            if writer:
+                writer.write(page)
+
+        try:
+            fetch_products_streaming(on_page, concurrency=args.concurrency)
+            print("\n" + "=" * 60)
+            print("СОХРАНЕНИЕ")
+            print("=" * 60)
+            outputs.finish()
+            if writer:
+                writer.commit()
+                print(f"Сохранено в staging: {writer.written} товаров ({SHOP_NAME})")
+        finally:
+            outputs.close()
+            if writer:
+                writer.close()
 
-    # Обрабатываем
-    products = process_products(products)
+        # Статистика
+        outputs.stats.print()
+    else:
+        # Загружаем товары
+        products = fetch_products()
 
-    # Статистика
-    print_stats(products)
+        # Обрабатываем
+        products = process_products(products)
 
-    # Сохраняем в файлы
-    print("\n" + "=" * 60)
-    print("СОХРАНЕНИЕ")
-    print("=" * 60)
-    save_to_csv(products)
-    save_to_json(products)
+        # Статистика
+        print_stats(products)
 
-    # Сохраняем в БД
-    if not args.no_db:
-        save_staging(products)
+        # Сохраняем в файлы
+        print("\n" + "=" * 60)
+        print("СОХРАНЕНИЕ")
+        print("=" * 60)
+        save_to_csv(products)
+        save_to_json(products)
 
-        if args.all:
-            process_staging(full_mode=args.full)
+        # Сохраняем в БД
+        if not args.no_db:
+            save_staging(products)
+
+    if not args.no_db and args.all:
+        process_staging(full_mode=args.full)
 
     print("\nПарсинг завершён!")
 
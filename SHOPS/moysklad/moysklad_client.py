@@ -0,0 +1,128 @@
+"""
+Постраничная загрузка публичных каталогов b2b.moysklad.ru (desktop-api) для поставщиков на МойСклад.
+
+API отдаёт по 100 товаров на `?offset=` и общий размер каталога в `size`.
+Первая страница загружается одна, по её `size` планируются все остальные offset'ы —
+они грузятся параллельно через один httpx.AsyncClient (пул keep-alive соединений,
+HTTP/2 если установлен h2). Страницы отдаются по мере прихода, не дожидаясь всего каталога.
+
+Не больше `concurrency` страниц одновременно загружаются или ждут обработки:
+слот освобождается только после того, как потребитель обработал страницу,
+поэтому медленная запись в БД притормаживает загрузку, а не копит каталог в памяти.
+
+Использование (новый поставщик — только свой CATALOG_ID):
+    from moysklad_client import catalog_url, stream_catalog
+
+    def on_page(products):           # вызывается в отдельном потоке, страницы по очереди
+        save_page(process_products(products))
+
+    stream_catalog(catalog_url("S1AlNWEsMzM7"), on_page, concurrency=4)
+"""
+import asyncio
+import importlib.util
+import random
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+HAS_H2 = importlib.util.find_spec("h2") is not None
+
+PAGE_SIZE = 100  # Фиксированный размер страницы desktop-api
+CONCURRENCY = 4
+TIMEOUT = 60
+RETRIES = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+def catalog_url(catalog_id: str) -> str:
+    return f"https://b2b.moysklad.ru/desktop-api/public/{catalog_id}/products.json"
+
+
+def _client(concurrency: int, timeout: float, headers: Optional[Dict[str, str]],
+            transport: Optional[httpx.AsyncBaseTransport]) -> httpx.AsyncClient:
+    kwargs = dict(
+        timeout=timeout,
+        headers={"User-Agent": USER_AGENT, "Accept": "application/json", **(headers or {})},
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        http2=HAS_H2 and transport is None,
+        follow_redirects=True,
+    )
+    if transport is not None:
+        kwargs["transport"] = transport
+    return httpx.AsyncClient(**kwargs)
+
+
+async def _get_page(client: httpx.AsyncClient, api_url: str, offset: int, retries: int = RETRIES) -> Dict:
+    """Одна страница с повторами на 429/5xx и сетевых ошибках (экспоненциальная задержка + джиттер)."""
+    for attempt in range(retries):
+        try:
+            response = await client.get(api_url, params={"offset": offset})
+            if response.status_code not in RETRY_STATUSES or attempt == retries - 1:
+                response.raise_for_status()
+                return response.json()
+        except httpx.TransportError:
+            if attempt == retries - 1:
+                raise
+        await asyncio.sleep(2 ** attempt * random.uniform(0.5, 1.5))
+    raise RuntimeError("unreachable")
+
+
+async def iter_pages(api_url: str, *, concurrency: int = CONCURRENCY, timeout: float = TIMEOUT,
+                     headers: Optional[Dict[str, str]] = None,
+                     transport: Optional[httpx.AsyncBaseTransport] = None
+                     ) -> AsyncIterator[Tuple[int, List[Dict], int]]:
+    """
+    Страницы каталога в порядке готовности: (offset, products, size).
+    Ошибка загрузки страницы (после повторов) прерывает обход исключением, как и раньше.
+    """
+    async with _client(concurrency, timeout, headers, transport) as client:
+        first = await _get_page(client, api_url, 0)
+        items = first.get("products", [])
+        size = first.get("size", 0)
+        yield 0, items, size
+        if len(items) < PAGE_SIZE:
+            return
+
+        slots = asyncio.Semaphore(concurrency)
+
+        async def load(offset: int):
+            await slots.acquire()
+            try:
+                return offset, await _get_page(client, api_url, offset)
+            except BaseException:
+                slots.release()
+                raise
+
+        tasks = [asyncio.create_task(load(offset)) for offset in range(PAGE_SIZE, size, PAGE_SIZE)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                offset, data = await next_done
+                try:
+                    yield offset, data.get("products", []), size
+                finally:
+                    slots.release()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def stream_catalog(api_url: str, on_page: Callable[[List[Dict]], None], *,
+                   concurrency: int = CONCURRENCY, **kwargs) -> int:
+    """
+    Синхронная обёртка над iter_pages: on_page(products) вызывается для каждой страницы
+    в рабочем потоке (можно писать в БД), пока следующие страницы продолжают загружаться.
+    Возвращает число загруженных товаров.
+    """
+    async def run() -> int:
+        loaded = 0
+        async for _, products, size in iter_pages(api_url, concurrency=concurrency, **kwargs):
+            if not products:
+                continue
+            await asyncio.to_thread(on_page, products)
+            loaded += len(products)
+            print(f"  Загружено: {loaded} / {size}")
+        return loaded
+
+    return asyncio.run(run())
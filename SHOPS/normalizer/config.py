@@ -31,6 +31,10 @@ class Settings(BaseSettings):
     # HTTP client
     http_timeout: int = 60
 
+    # Пакетная нормализация (normalize_batch / normalize_shop)
+    normalize_concurrency: int = 8           # Макс. товаров параллельно
+    normalize_latency_tolerance: float = 2.0  # Рост времени товара (x базового) → снижение параллельности
+
     @property
     def dsn(self) -> str:
         return f"postgresql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
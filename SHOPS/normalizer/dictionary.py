@@ -0,0 +1,159 @@
+"""
+Снимок справочников брендов и моделей в памяти процесса
+
+Stage 2 ищет бренд/модель по нормализованному имени в словарях снимка и не ходит в БД.
+Снимок перечитывается целиком (два запроса) при старте и по NOTIFY из триггеров
+на zip_dict_brands / zip_dict_models (миграция 025_dict_notify.sql) — то есть сразу
+после того, как модерация создала сущность.
+"""
+import asyncio
+
+import asyncpg
+
+from .config import settings
+
+NOTIFY_CHANNEL = "zip_dict_changed"
+RELOAD_DEBOUNCE = 0.5        # Пачка NOTIFY (массовое создание) — одна перезагрузка, сек
+LISTEN_RECONNECT_DELAY = 10  # Пауза перед переподключением LISTEN, сек
+
+
+def normalize_name(name: str) -> str:
+    """Ключ поиска — как LOWER(TRIM(name)) в SQL"""
+    return name.strip().lower()
+
+
+class DictSnapshot:
+    """Неизменяемый снимок: бренды и модели бренда по нормализованному имени"""
+
+    def __init__(self, brands: list, models: list):
+        self.brands: dict[str, dict] = {}
+        self.brands_list: list[dict] = []
+        self.models: dict[int, dict[str, dict]] = {}
+        self.models_list: dict[int, list[dict]] = {}
+
+        for r in brands:
+            brand = {"id": r["id"], "name": r["name"]}
+            self.brands_list.append(brand)
+            self.brands.setdefault(normalize_name(r["name"]), brand)
+
+        for r in models:
+            model = {"id": r["id"], "name": r["name"]}
+            self.models_list.setdefault(r["brand_id"], []).append(model)
+            self.models.setdefault(r["brand_id"], {}).setdefault(normalize_name(r["name"]), model)
+
+    def find_brand(self, name: str) -> dict | None:
+        return self.brands.get(normalize_name(name))
+
+    def find_model(self, brand_id: int, name: str) -> dict | None:
+        return self.models.get(brand_id, {}).get(normalize_name(name))
+
+    def brand_models(self, brand_id: int) -> list[dict]:
+        return self.models_list.get(brand_id, [])
+
+    def stats(self) -> dict:
+        return {
+            "brands": len(self.brands_list),
+            "models": sum(len(m) for m in self.models_list.values()),
+        }
+
+
+class DictionaryCache:
+    def __init__(self):
+        self.snapshot: DictSnapshot | None = None
+        self._pool: asyncpg.Pool | None = None
+        self._listener: asyncio.Task | None = None
+        self._reload: asyncio.Task | None = None
+        self._dirty = False
+        self._load_lock = asyncio.Lock()
+        self.reloads = 0
+        self.notifies = 0
+
+    async def load(self, pool: asyncpg.Pool) -> DictSnapshot:
+        """Перечитать справочники и атомарно подменить снимок"""
+        brands = await pool.fetch("SELECT id, name FROM zip_dict_brands ORDER BY name")
+        models = await pool.fetch(
+            "SELECT id, name, brand_id FROM zip_dict_models WHERE brand_id IS NOT NULL ORDER BY name"
+        )
+        self.snapshot = DictSnapshot(brands, models)
+        self.reloads += 1
+        return self.snapshot
+
+    async def get(self, pool: asyncpg.Pool) -> DictSnapshot:
+        """Текущий снимок (первый вызов без start() загружает его)"""
+        if self.snapshot is None:
+            async with self._load_lock:
+                if self.snapshot is None:
+                    await self.load(pool)
+        return self.snapshot
+
+    async def start(self, pool: asyncpg.Pool):
+        """Загрузить снимок и запустить LISTEN в фоне"""
+        self._pool = pool
+        await self.get(pool)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        for task in (self._listener, self._reload):
+            if task and not task.done():
+                task.cancel()
+        self._listener = self._reload = None
+
+    async def _listen(self):
+        """
+        Отдельное соединение вне пула (LISTEN держит его постоянно).
+        При обрыве — переподключение и полная перезагрузка: NOTIFY за время простоя потеряны.
+        """
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(
+                    host=settings.db_host,
+                    port=settings.db_port,
+                    user=settings.db_user,
+                    password=settings.db_password,
+                    database=settings.db_name,
+                    ssl=settings.db_ssl,
+                )
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _: closed.set())
+                await conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                # Изменения между прошлой загрузкой и LISTEN не должны потеряться
+                await self.load(self._pool)
+                await closed.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Dictionary listener error: {e}")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(LISTEN_RECONNECT_DELAY)
+
+    def _on_notify(self, conn, pid, channel, payload):
+        self.notifies += 1
+        self._dirty = True
+        if self._reload is None or self._reload.done():
+            self._reload = asyncio.create_task(self._reload_dirty())
+
+    async def _reload_dirty(self):
+        while self._dirty:
+            await asyncio.sleep(RELOAD_DEBOUNCE)
+            self._dirty = False
+            try:
+                await self.load(self._pool)
+            except Exception as e:
+                print(f"Dictionary reload error: {e}")
+                self._dirty = True
+                await asyncio.sleep(LISTEN_RECONNECT_DELAY)
+
+    def stats(self) -> dict:
+        return {
+            **(self.snapshot.stats() if self.snapshot else {}),
+            "reloads": self.reloads,
+            "notifies": self.notifies,
+            "listening": self._listener is not None and not self._listener.done(),
+        }
+
+
+dictionary = DictionaryCache()
@@ -10,6 +10,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
 from .db import init_pool, close_pool, get_pool
+from .dictionary import dictionary
 from .models import (
     NormalizeRequest,
     NormalizeResult,
@@ -29,12 +30,15 @@ from .moderation import (
 from .stages.stage0_classify import classify
 from .stages.stage1_brand_models import extract_brand_models
 from .stages.stage2_merge import merge_and_validate
+from .workers import run_pool
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_pool()
+    pool = await init_pool()
+    await dictionary.start(pool)
     yield
+    await dictionary.stop()
     await n8n_client.close()
     await close_pool()
 
@@ -90,6 +94,32 @@ async def _normalize_one(req: NormalizeRequest) -> NormalizeResult:
     )
 
 
+def _error_result(req: NormalizeRequest, exc: Exception) -> NormalizeResult:
+    return NormalizeResult(
+        article=req.article,
+        status="error",
+        error=f"{type(exc).__name__}: {exc}",
+    )
+
+
+async def _normalize_many(
+    items: list[NormalizeRequest],
+    concurrency: int | None,
+    on_progress,
+    progress_every: int = 1,
+) -> list[NormalizeResult]:
+    """Пул воркеров: результаты в порядке items, ошибка товара → status "error"."""
+    return await run_pool(
+        items,
+        _normalize_one,
+        _error_result,
+        concurrency=concurrency or settings.normalize_concurrency,
+        latency_tolerance=settings.normalize_latency_tolerance,
+        on_progress=on_progress,
+        progress_every=progress_every,
+    )
+
+
 @app.post("/normalize", response_model=NormalizeResult)
 async def normalize(req: NormalizeRequest):
     return await _normalize_one(req)
@@ -101,19 +131,18 @@ async def normalize_batch(req: NormalizeBatchRequest):
     items = req.items
 
     async def _run(tid: UUID):
-        results = []
-        for i, item in enumerate(items):
-            result = await _normalize_one(item)
-            results.append(result.model_dump())
-            await update_task(tid, progress={"done": i + 1, "total": len(items)})
-        await update_task(tid, result={"results": results})
+        async def progress(done: int, limit: dict):
+            await update_task(tid, progress={"done": done, "total": len(items), "concurrency": limit["limit"]})
+
+        results = await _normalize_many(items, req.concurrency, progress)
+        await update_task(tid, result={"results": [r.model_dump() for r in results]})
 
     launch_background_task(_run, task_id)
     return {"task_id": str(task_id)}
 
 
 @app.post("/normalize/shop/{shop_code}")
-async def normalize_shop(shop_code: str):
+async def normalize_shop(shop_code: str, concurrency: int | None = Query(None, ge=1, le=64)):
     """Нормализовать все ненормализованные товары магазина."""
     pool = get_pool()
 
@@ -130,24 +159,27 @@ async def normalize_shop(shop_code: str):
         rows = await pool.fetch(
             f"SELECT article, name, url FROM {table} WHERE zip_nomenclature_id IS NULL AND is_active = true"
         )
-        results = []
-        for i, row in enumerate(rows):
-            req = NormalizeRequest(
+        items = [
+            NormalizeRequest(
                 article=row["article"],
                 name=row["name"],
                 shop_code=shop_code,
                 url=row.get("url"),
             )
-            result = await _normalize_one(req)
-            results.append(result.model_dump())
-            if (i + 1) % 10 == 0:
-                await update_task(tid, progress={"done": i + 1, "total": len(rows)})
+            for row in rows
+        ]
+
+        async def progress(done: int, limit: dict):
+            await update_task(tid, progress={"done": done, "total": len(rows), "concurrency": limit["limit"]})
+
+        results = await _normalize_many(items, concurrency, progress, progress_every=10)
 
         await update_task(
             tid,
             progress={"done": len(rows), "total": len(rows)},
-            result={"normalized": sum(1 for r in results if r["status"] == "normalized"),
-                    "needs_moderation": sum(1 for r in results if r["status"] == "needs_moderation"),
+            result={"normalized": sum(1 for r in results if r.status == "normalized"),
+                    "needs_moderation": sum(1 for r in results if r.status == "needs_moderation"),
+                    "errors": sum(1 for r in results if r.status == "error"),
                     "total": len(results)},
         )
 
@@ -295,6 +327,7 @@ async def stats():
     mod_stats = await get_moderation_stats()
     return {
         "moderation": mod_stats,
+        "dictionary": dictionary.stats(),
     }
 
 
@@ -3,7 +3,7 @@ Pydantic модели для Normalizer API
 """
 from datetime import datetime
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 # --- Нормализация ---
@@ -18,17 +18,19 @@ class NormalizeRequest(BaseModel):
 
 class NormalizeResult(BaseModel):
     article: str
-    status: str  # "normalized", "needs_moderation", "not_spare_part"
+    status: str  # "normalized", "needs_moderation", "not_spare_part", "error"
     brand_id: int | None = None
     brand_name: str | None = None
     model_ids: list[int] = []
     model_names: list[str] = []
     moderation_ids: list[int] = []
     confidence: float = 0.0
+    error: str | None = None
 
 
 class NormalizeBatchRequest(BaseModel):
     items: list[NormalizeRequest]
+    concurrency: int | None = Field(None, ge=1, le=64)  # None → settings.normalize_concurrency
 
 
 # --- Модерация ---
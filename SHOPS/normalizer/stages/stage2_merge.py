@@ -1,8 +1,9 @@
 """
-Stage 2: SQL exact match + AI валидация + модерация
+Stage 2: exact match по снимку справочников + AI валидация + модерация
 """
 import asyncpg
 
+from ..dictionary import dictionary
 from ..models import ExtractResult, MergeResult
 from ..n8n_client import N8nClient
 from ..moderation import create_moderation
@@ -24,25 +25,20 @@ async def merge_and_validate(
     model_names = []
     confidence = extract.confidence
 
+    # Снимок справочников в памяти (обновляется по NOTIFY) — запросов к БД нет
+    snapshot = await dictionary.get(pool)
+
     # --- Бренд ---
     if extract.brand:
-        brand_row = await pool.fetchrow(
-            "SELECT id, name FROM zip_dict_brands WHERE LOWER(TRIM(name)) = LOWER(TRIM($1))",
-            extract.brand,
-        )
+        brand_row = snapshot.find_brand(extract.brand)
 
         if brand_row:
             brand_id = brand_row["id"]
             brand_name = brand_row["name"]
         else:
             # AI валидация: ищем похожий бренд
-            all_brands = await pool.fetch(
-                "SELECT id, name FROM zip_dict_brands ORDER BY name"
-            )
-            brands_list = [{"id": r["id"], "name": r["name"]} for r in all_brands]
-
             try:
-                ai_result = await n8n.validate_brand(extract.brand, brands_list)
+                ai_result = await n8n.validate_brand(extract.brand, snapshot.brands_list)
                 if ai_result.get("is_new", True):
                     mod_id = await create_moderation(
                         entity_type="brand",
@@ -72,19 +68,10 @@ async def merge_and_validate(
 
     # --- Модели ---
     if extract.models and brand_id:
-        all_models = await pool.fetch(
-            "SELECT id, name FROM zip_dict_models WHERE brand_id = $1 ORDER BY name",
-            brand_id,
-        )
-        models_list = [{"id": r["id"], "name": r["name"]} for r in all_models]
+        models_list = snapshot.brand_models(brand_id)
 
         for model_raw in extract.models:
-            model_row = await pool.fetchrow(
-                """SELECT id, name FROM zip_dict_models
-                   WHERE brand_id = $1 AND LOWER(TRIM(name)) = LOWER(TRIM($2))""",
-                brand_id,
-                model_raw,
-            )
+            model_row = snapshot.find_model(brand_id, model_raw)
 
             if model_row:
                 model_ids.append(model_row["id"])
@@ -0,0 +1,147 @@
+"""
+Пул воркеров для пакетной нормализации
+
+Каждый товар — несколько последовательных вызовов n8n, поэтому пачка обрабатывается
+параллельно N воркерами из общей ограниченной очереди:
+
+- concurrency — верхний предел одновременных товаров
+- backpressure: фактический предел (AdaptiveLimit) уменьшается вдвое, когда время
+  обработки товара растёт относительно базового (n8n не успевает) или идут ошибки,
+  и растёт на 1 после серии нормальных ответов — пропускная способность растёт
+  с concurrency, пока n8n не насытится
+- результаты возвращаются в порядке входных элементов
+- ошибка товара не останавливает воркер и пачку: вместо результата — on_error(item, exc)
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Iterable
+
+LATENCY_ALPHA = 0.2          # Сглаживание времени обработки (EWMA)
+BASELINE_DRIFT = 0.01        # Скорость, с которой базовое время подтягивается вверх
+
+
+class AdaptiveLimit:
+    """AIMD-предел одновременных задач по времени обработки и ошибкам"""
+
+    def __init__(self, max_limit: int, latency_tolerance: float = 2.0):
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.latency_tolerance = latency_tolerance
+        self.active = 0
+        self.latency: float | None = None   # EWMA, сек
+        self.baseline: float | None = None  # время без перегрузки, сек
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def release(self, latency: float, ok: bool):
+        async with self._cond:
+            self.active -= 1
+            self._observe(latency)
+            overloaded = (
+                self.baseline is not None
+                and self.latency > self.baseline * self.latency_tolerance
+            )
+            if not ok or overloaded:
+                # Не чаще раза за текущее время обработки: задачи, начатые до снижения,
+                # ещё досчитываются со старой задержкой
+                now = time.monotonic()
+                if now - self._last_decrease > (self.latency or 0):
+                    self.limit = max(1, self.limit // 2)
+                    self._last_decrease = now
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+    def _observe(self, latency: float):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_ALPHA * (latency - self.latency)
+        if self.baseline is None or self.latency < self.baseline:
+            self.baseline = self.latency
+        else:
+            self.baseline += BASELINE_DRIFT * (self.latency - self.baseline)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "max_limit": self.max_limit,
+            "latency_s": round(self.latency, 3) if self.latency is not None else None,
+            "baseline_s": round(self.baseline, 3) if self.baseline is not None else None,
+        }
+
+
+async def run_pool(
+    items: Iterable,
+    handler: Callable[[Any], Awaitable[Any]],
+    on_error: Callable[[Any, Exception], Any],
+    concurrency: int,
+    latency_tolerance: float = 2.0,
+    on_progress: Callable[[int, dict], Awaitable[None]] | None = None,
+    progress_every: int = 1,
+) -> list:
+    """
+    Обработать items воркерами, результаты — в порядке items.
+
+    on_progress(done, limit_stats) вызывается последовательно (значения done не убывают)
+    каждые progress_every обработанных элементов.
+    """
+    concurrency = max(1, concurrency)
+    limit = AdaptiveLimit(concurrency, latency_tolerance)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    results: dict[int, Any] = {}
+    progress_lock = asyncio.Lock()
+    done = 0
+
+    async def produce():
+        for i, item in enumerate(items):
+            await queue.put((i, item))
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def worker():
+        nonlocal done
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            i, item = job
+            await limit.acquire()
+            start = time.monotonic()
+            ok = True
+            try:
+                results[i] = await handler(item)
+            except Exception as e:
+                ok = False
+                results[i] = on_error(item, e)
+            finally:
+                await limit.release(time.monotonic() - start, ok)
+
+            done += 1
+            if on_progress and done % progress_every == 0:
+                async with progress_lock:
+                    try:
+                        await on_progress(done, limit.stats())
+                    except Exception as e:
+                        print(f"Progress update error: {e}")
+
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return [results[i] for i in range(len(results))]
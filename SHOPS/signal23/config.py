@@ -19,6 +19,16 @@ REQUEST_TIMEOUT = 30         # Таймаут запроса (сек)
 MAX_RETRIES = 3              # Количество повторов
 ITEMS_PER_PAGE = 100         # Товаров на странице (макс)
 
+# Параллельный режим (--parallel): адаптивный пул потоков
+PARALLEL_MIN_WORKERS = 1     # Минимум одновременных запросов
+PARALLEL_MAX_WORKERS = 12    # Максимум (столько потоков создаётся)
+PARALLEL_START_WORKERS = 3   # Стартовое значение
+PARALLEL_TARGET_LATENCY = 1.5  # Средняя задержка ответа (сек), ниже которой пул растёт
+PARALLEL_THROTTLE_RATE = 0.05  # Доля 429/5xx в окне, выше которой пул уменьшается вдвое
+PARALLEL_WINDOW = 20         # Размер окна наблюдений (запросов)
+PARALLEL_QUEUE_SIZE = 24     # Очередь результатов (backpressure для потоков)
+STAGING_BATCH_SIZE = 500     # Строк в одном коммите staging
+
 # User-Agent
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
 
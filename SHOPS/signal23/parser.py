@@ -5,6 +5,7 @@
 Формат: HTML парсинг (OpenCart 3.0)
 """
 
+import asyncio
 import requests
 from bs4 import BeautifulSoup
 import json
@@ -13,15 +14,21 @@ import re
 import time
 import psycopg2
 import argparse
+import queue
+import threading
+from collections import deque
 from datetime import datetime
-from typing import Optional, List, Dict, Set
+from typing import Callable, Optional, List, Dict, Set
 from urllib.parse import urljoin, urlparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 
 from config import (
     BASE_URL, START_CATEGORIES, REQUEST_DELAY, REQUEST_TIMEOUT,
     MAX_RETRIES, ITEMS_PER_PAGE, USER_AGENT,
-    DATA_DIR, PRODUCTS_JSON, PRODUCTS_CSV, CATEGORIES_JSON, ERRORS_LOG
+    DATA_DIR, PRODUCTS_JSON, PRODUCTS_CSV, CATEGORIES_JSON, ERRORS_LOG,
+    PARALLEL_MIN_WORKERS, PARALLEL_MAX_WORKERS, PARALLEL_START_WORKERS,
+    PARALLEL_TARGET_LATENCY, PARALLEL_THROTTLE_RATE, PARALLEL_WINDOW,
+    PARALLEL_QUEUE_SIZE, STAGING_BATCH_SIZE,
 )
 
 # ============================================================
@@ -32,6 +39,7 @@ from config import (
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from db_wrapper import get_db  # Автоматически маппит таблицы на новые имена
+from crawl_engine import CrawlEngine, CrawlTask
 
 # Код магазина для outlets
 SHOP_CODE = "signal23-online"
@@ -39,6 +47,151 @@ SHOP_NAME = "Signal23"
 SHOP_CITY = "Москва"
 
 
+# ============================================================
+# АДАПТИВНЫЙ ПУЛ (параллельный режим)
+# ============================================================
+
+class AdaptiveFetcher:
+    """
+    Потокобезопасный загрузчик для параллельного режима.
+
+    - у каждого потока своя requests.Session с HTTPAdapter (пул keep-alive соединений)
+    - число одновременных запросов (limit) меняется по AIMD: растёт на 1, пока средняя
+      задержка ниже target_latency, и уменьшается вдвое при доле 429/5xx выше throttle_rate
+    - 429 с Retry-After приостанавливает новые запросы всех потоков
+    """
+
+    def __init__(self, headers: Dict[str, str],
+                 min_workers: int = PARALLEL_MIN_WORKERS,
+                 max_workers: int = PARALLEL_MAX_WORKERS,
+                 start_workers: int = PARALLEL_START_WORKERS,
+                 target_latency: float = PARALLEL_TARGET_LATENCY,
+                 throttle_rate: float = PARALLEL_THROTTLE_RATE,
+                 window: int = PARALLEL_WINDOW):
+        self.headers = dict(headers)
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.limit = max(min_workers, min(start_workers, max_workers))
+        self.target_latency = target_latency
+        self.throttle_rate = throttle_rate
+        self.window = window
+
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._samples: deque = deque(maxlen=window)
+        self.stats = {"requests": 0, "throttled": 0, "grow": 0, "shrink": 0, "peak": self.limit}
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._local.session = session
+            with self._cond:
+                self._sessions.append(session)
+        return session
+
+    def _acquire(self):
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+            pause = self._paused_until - time.time()
+        if pause > 0:
+            time.sleep(pause)
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def _record(self, latency: float, throttled: bool, retry_after: Optional[str] = None):
+        with self._cond:
+            self.stats["requests"] += 1
+            self._samples.append((latency, throttled))
+            if throttled:
+                self.stats["throttled"] += 1
+                if retry_after and retry_after.isdigit():
+                    self._paused_until = max(self._paused_until, time.time() + min(int(retry_after), 60))
+            if len(self._samples) < self.window:
+                return
+
+            rate = sum(1 for _, t in self._samples if t) / len(self._samples)
+            avg_latency = sum(l for l, _ in self._samples) / len(self._samples)
+            if rate > self.throttle_rate:
+                new_limit = max(self.min_workers, self.limit // 2)
+                if new_limit < self.limit:
+                    self.stats["shrink"] += 1
+                    print(f"  [POOL] {self.limit} -> {new_limit} (429/5xx: {rate:.0%})")
+            elif avg_latency < self.target_latency and self.limit < self.max_workers:
+                new_limit = self.limit + 1
+                self.stats["grow"] += 1
+                self.stats["peak"] = max(self.stats["peak"], new_limit)
+            else:
+                new_limit = self.limit
+            if new_limit != self.limit:
+                self.limit = new_limit
+                self._samples.clear()
+                self._cond.notify_all()
+
+    def get(self, url: str) -> requests.Response:
+        """GET в слоте пула. Ошибки HTTP/сети пробрасываются (повторы — у вызывающего)."""
+        session = self._session()
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            response = session.get(url, timeout=REQUEST_TIMEOUT)
+        except requests.RequestException:
+            self._record(time.perf_counter() - started, True)
+            raise
+        finally:
+            self._release()
+        status = response.status_code
+        throttled = status == 429 or status >= 500
+        self._record(time.perf_counter() - started, throttled, response.headers.get("Retry-After"))
+        response.raise_for_status()
+        return response
+
+    def close(self):
+        for session in self._sessions:
+            session.close()
+
+
+class StagingWriter:
+    """Потоковая запись товаров в staging: TRUNCATE при открытии, коммит каждые batch_size строк."""
+
+    def __init__(self, batch_size: int = STAGING_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.written = 0
+        self._pending = 0
+        self.conn = get_db()
+        self.cur = self.conn.cursor()
+        self.cur.execute("TRUNCATE TABLE staging")
+
+    def write(self, products: List[Dict]):
+        for p in products:
+            self.cur.execute(_STAGING_INSERT_SQL, _staging_row(p))
+        self.written += len(products)
+        self._pending += len(products)
+        if self._pending >= self.batch_size:
+            self.conn.commit()
+            self._pending = 0
+
+    def close(self):
+        try:
+            self.conn.commit()
+        finally:
+            self.cur.close()
+            self.conn.close()
+        print(f"Сохранено в staging: {self.written} товаров")
+
+
 # ============================================================
 # КЛАСС ПАРСЕРА
 # ============================================================
@@ -60,6 +213,10 @@ class Signal23Parser:
         self.last_request_time = 0
         self.known_urls: Dict[str, str] = {}  # url → article, для инкрементального режима
         self.stats_skipped: int = 0
+        self._leaf_categories: List[Dict] = []  # конечные категории (конкурентный режим)
+        self._fetcher: Optional[AdaptiveFetcher] = None  # пул потоков (параллельный режим)
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
 
         os.makedirs(DATA_DIR, exist_ok=True)
 
@@ -72,10 +229,13 @@ class Signal23Parser:
 
     def _make_request(self, url: str, retries: int = MAX_RETRIES) -> Optional[requests.Response]:
         """HTTP запрос с повторами"""
-        self._delay()
+        if self._fetcher is None:
+            self._delay()
 
         for attempt in range(retries):
             try:
+                if self._fetcher is not None:
+                    return self._fetcher.get(url)
                 response = self.session.get(url, timeout=REQUEST_TIMEOUT)
                 response.raise_for_status()
                 return response
@@ -115,16 +275,20 @@ class Signal23Parser:
             print(f"[WARN] _load_known_urls: {e}")
             return {}
 
-    def parse_all(self, limit: int = None, parallel: bool = False) -> List[Dict]:
+    def parse_all(self, limit: int = None, parallel: bool = False,
+                  sink: Optional[Callable[[List[Dict]], None]] = None) -> List[Dict]:
         """
         Основной метод парсинга.
         1. Обходит стартовые категории
         2. Рекурсивно собирает подкатегории
         3. Собирает товары из конечных категорий
+
+        sink (только parallel) — получает товары порциями по мере готовности категорий.
         """
         print(f"{'='*60}")
         print(f"Парсинг {SHOP_NAME}")
         print(f"{'='*60}\n")
+        self._stop.clear()
 
         # Собираем все категории
         all_categories = []
@@ -142,9 +306,11 @@ class Signal23Parser:
 
         # Парсим товары из категорий
         if parallel and len(all_categories) > 1:
-            self._parse_categories_parallel(all_categories, limit)
+            self._parse_categories_parallel(all_categories, limit, sink=sink)
         else:
             self._parse_categories_sequential(all_categories, limit)
+            if sink and self.products:
+                sink(self.products)
 
         print(f"\n{'='*60}")
         print(f"Итого собрано товаров: {len(self.products)}")
@@ -244,34 +410,87 @@ class Signal23Parser:
                 print(f"\nДостигнут лимит {limit} товаров")
                 break
 
-    def _parse_categories_parallel(self, categories: List[Dict], limit: int = None, workers: int = 3):
-        """Параллельный парсинг категорий"""
-        print(f"\nПараллельный парсинг ({workers} потоков)...")
-
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            futures = {
-                executor.submit(self._parse_category_products, cat['url'], limit): cat
-                for cat in categories
-            }
+    def _parse_categories_parallel(self, categories: List[Dict], limit: int = None,
+                                   sink: Optional[Callable[[List[Dict]], None]] = None):
+        """
+        Параллельный парсинг категорий через AdaptiveFetcher.
 
-            for future in as_completed(futures):
-                cat = futures[future]
-                try:
-                    products = future.result()
-                    self.products.extend(products)
-                    print(f"[OK] {cat['name'][:40]}: {len(products)} товаров")
-                except Exception as e:
-                    print(f"[ERR] {cat['name'][:40]}: {e}")
+        Потоки берут категории из общей очереди и кладут товары в ограниченную очередь
+        результатов (если основной поток не успевает, например, писать в staging, потоки ждут).
+        Основной поток забирает результаты по мере готовности и передаёт их в sink.
+        """
+        self._fetcher = AdaptiveFetcher(self.session.headers)
+        self._stop.clear()
+        workers = self._fetcher.max_workers
+        print(f"\nПараллельный парсинг (адаптивный пул: {self._fetcher.limit} из "
+              f"{self._fetcher.min_workers}..{workers} потоков)...")
+
+        tasks: queue.Queue = queue.Queue()
+        for cat in categories:
+            tasks.put(cat)
+        results: queue.Queue = queue.Queue(maxsize=PARALLEL_QUEUE_SIZE)
+        done = object()
+
+        def worker():
+            try:
+                while not self._stop.is_set():
+                    try:
+                        cat = tasks.get_nowait()
+                    except queue.Empty:
+                        break
+                    try:
+                        results.put((cat, self._parse_category_products(cat['url'], limit), None))
+                    except Exception as e:
+                        results.put((cat, [], e))
+            finally:
+                results.put(done)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+        for t in threads:
+            t.start()
+
+        finished = 0
+        try:
+            while finished < workers:
+                item = results.get()
+                if item is done:
+                    finished += 1
+                    continue
+                cat, products, error = item
+                if error:
+                    print(f"[ERR] {cat['name'][:40]}: {error}")
+                    continue
+                if self._stop.is_set():
+                    continue
+                if limit:
+                    products = products[:max(0, limit - len(self.products))]
+                self.products.extend(products)
+                if sink and products:
+                    sink(products)
+                print(f"[OK] {cat['name'][:40]}: {len(products)} товаров (пул: {self._fetcher.limit})")
 
                 if limit and len(self.products) >= limit:
-                    break
+                    print(f"\nДостигнут лимит {limit} товаров")
+                    self._stop.set()
+        finally:
+            self._stop.set()
+            # Потоки могут ждать места в results (sink упал при полной очереди) —
+            # разбираем очередь, пока все не отметятся done, иначе join() зависнет
+            while finished < workers:
+                if results.get() is done:
+                    finished += 1
+            for t in threads:
+                t.join()
+            self._fetcher.close()
+            print(f"Пул: {self._fetcher.stats}")
+            self._fetcher = None
 
     def _parse_category_products(self, category_url: str, limit: int = None) -> List[Dict]:
         """Парсинг товаров из категории с пагинацией"""
         products = []
         page = 1
 
-        while True:
+        while not self._stop.is_set():
             # URL с пагинацией
             url = f"{category_url}?limit={ITEMS_PER_PAGE}&page={page}"
 
@@ -295,24 +514,9 @@ class Signal23Parser:
 
                     # Инкрементальный режим: пропускаем detail fetch для известных URL
                     if self.known_urls and product_url in self.known_urls:
-                        known_article = self.known_urls[product_url]
-                        name_el = card.select_one('.caption .name a, .name a, .product-thumb__title a')
-                        price_el = card.select_one('.price .price-new, .price-new, .price')
-                        name = name_el.get_text(strip=True) if name_el else link.get_text(strip=True)
-                        price_text = price_el.get_text(strip=True) if price_el else "0"
-                        price_match = re.search(r'[\d\s]+[.,]?\d*', price_text.replace(' ', ''))
-                        price = float(price_match.group().replace(',', '.').replace(' ', '')) if price_match else 0
-                        products.append({
-                            "url": product_url,
-                            "name": name,
-                            "article": known_article,
-                            "price": price,
-                            "barcode": None,
-                            "category": "",
-                            "external_id": None,
-                            "parsed_at": datetime.now().isoformat(),
-                        })
-                        self.stats_skipped += 1
+                        products.append(self._product_from_card(card, link, product_url))
+                        with self._stats_lock:
+                            self.stats_skipped += 1
                         if limit and len(products) >= limit:
                             return products
                         continue
@@ -336,6 +540,25 @@ class Signal23Parser:
 
         return products
 
+    def _product_from_card(self, card, link, product_url: str) -> Dict:
+        """Товар из карточки листинга (известный URL — без загрузки страницы товара)"""
+        name_el = card.select_one('.caption .name a, .name a, .product-thumb__title a')
+        price_el = card.select_one('.price .price-new, .price-new, .price')
+        name = name_el.get_text(strip=True) if name_el else link.get_text(strip=True)
+        price_text = price_el.get_text(strip=True) if price_el else "0"
+        price_match = re.search(r'[\d\s]+[.,]?\d*', price_text.replace(' ', ''))
+        price = float(price_match.group().replace(',', '.').replace(' ', '')) if price_match else 0
+        return {
+            "url": product_url,
+            "name": name,
+            "article": self.known_urls[product_url],
+            "price": price,
+            "barcode": None,
+            "category": "",
+            "external_id": None,
+            "parsed_at": datetime.now().isoformat(),
+        }
+
     def _parse_product_page(self, url: str) -> Optional[Dict]:
         """Парсинг страницы товара"""
         if url in self.visited_urls:
@@ -345,7 +568,10 @@ class Signal23Parser:
         soup = self._get_soup(url)
         if not soup:
             return None
+        return self._extract_product(url, soup)
 
+    def _extract_product(self, url: str, soup: BeautifulSoup) -> Optional[Dict]:
+        """Извлечение полей товара из загруженной страницы"""
         try:
             product = {
                 "url": url,
@@ -443,6 +669,126 @@ class Signal23Parser:
             })
             return None
 
+    # === Конкурентный обход (crawl_engine) ===
+
+    def _handle_category(self, engine: CrawlEngine, task: CrawlTask, soup: BeautifulSoup,
+                         max_depth: int = 5) -> List[CrawlTask]:
+        """Категория → новые подкатегории или (если конечная) первая страница листинга"""
+        def sub_task(sub_url):
+            if task.depth + 1 > max_depth or engine.seen(sub_url, "category"):
+                return None
+            return CrawlTask(sub_url, kind="category", depth=task.depth + 1)
+
+        subcats = soup.select('.category-parent a, .category-list a, .list-group-item')
+        new_tasks = []
+        for link in subcats:
+            href = link.get('href', '')
+            if href and href.startswith(('http', '/')):
+                sub_url = urljoin(BASE_URL, href)
+                if '/category/' in sub_url or any(cat in sub_url for cat in ['zapchasti-', 'akkumulyatory', 'displei', 'tachskr']):
+                    t = sub_task(sub_url)
+                    if t:
+                        new_tasks.append(t)
+        if new_tasks:
+            return new_tasks
+
+        name = self._extract_category_name(soup)
+        if not subcats and name:
+            return [self._leaf_category(task, name)]
+
+        for card in soup.select('.category-card, .category-item, .sub-category'):
+            link = card.find('a')
+            if link and link.get('href'):
+                t = sub_task(urljoin(BASE_URL, link['href']))
+                if t:
+                    new_tasks.append(t)
+        if not new_tasks and name:
+            new_tasks.append(self._leaf_category(task, name))
+        return new_tasks
+
+    def _leaf_category(self, task: CrawlTask, name: str) -> CrawlTask:
+        self._leaf_categories.append({"url": task.url, "name": name, "depth": task.depth})
+        return CrawlTask(f"{task.url}?limit={ITEMS_PER_PAGE}&page=1", kind="listing", depth=task.depth,
+                         data={"category_url": task.url, "page": 1})
+
+    def _handle_listing(self, task: CrawlTask, soup: BeautifulSoup) -> List[CrawlTask]:
+        """Страница листинга → известные товары сразу, новые — задачи на страницу товара"""
+        product_cards = soup.select('.product-layout, .product-thumb, .product-card')
+        if not product_cards:
+            return []
+
+        new_tasks = []
+        for card in product_cards:
+            link = card.select_one('a[href*=".html"]')
+            if not link:
+                link = card.select_one('.product-thumb__title a, .name a, a.product-title')
+            if not (link and link.get('href')):
+                continue
+            product_url = urljoin(BASE_URL, link['href'])
+            if self.known_urls and product_url in self.known_urls:
+                self.products.append(self._product_from_card(card, link, product_url))
+                self.stats_skipped += 1
+            else:
+                new_tasks.append(CrawlTask(product_url, kind="product", depth=task.depth))
+
+        page = task.data["page"] + 1
+        if soup.select_one('.pagination .active + li a, a[aria-label="Next"]') and page <= 100:
+            category_url = task.data["category_url"]
+            new_tasks.append(CrawlTask(f"{category_url}?limit={ITEMS_PER_PAGE}&page={page}", kind="listing",
+                                       depth=task.depth, data={"category_url": category_url, "page": page}))
+        return new_tasks
+
+    async def _crawl_concurrent(self, concurrency: int, limit: int = None):
+        async with CrawlEngine(concurrency=concurrency, delay=REQUEST_DELAY, timeout=REQUEST_TIMEOUT,
+                               retries=MAX_RETRIES, headers=dict(self.session.headers)) as engine:
+            def handle(task: CrawlTask, soup: BeautifulSoup):
+                if task.kind == "category":
+                    return self._handle_category(engine, task, soup)
+                if task.kind == "listing":
+                    new_tasks = self._handle_listing(task, soup)
+                else:
+                    product = self._extract_product(task.url, soup)
+                    if product:
+                        self.products.append(product)
+                        if len(self.products) % 100 == 0:
+                            print(f"  Товаров: {len(self.products)}")
+                    new_tasks = []
+                if limit and len(self.products) >= limit:
+                    print(f"\nДостигнут лимит {limit} товаров")
+                    engine.stop()
+                return new_tasks
+
+            seeds = [CrawlTask(urljoin(BASE_URL, cat), kind="category") for cat in START_CATEGORIES]
+            await engine.run(seeds, handle)
+        self.errors.extend(engine.errors)
+        return engine.stats
+
+    def parse_all_concurrent(self, concurrency: int = 4, limit: int = None) -> List[Dict]:
+        """
+        Обход через crawl_engine: категории, листинги и страницы товаров
+        загружаются параллельно (concurrency запросов на домен).
+        """
+        print(f"{'='*60}")
+        print(f"Парсинг {SHOP_NAME} (async, {concurrency} потоков на домен)")
+        print(f"{'='*60}\n")
+
+        self._leaf_categories = []
+        stats = asyncio.run(self._crawl_concurrent(concurrency, limit))
+        if limit:
+            self.products = self.products[:limit]
+        self._save_categories(self._leaf_categories)
+
+        print(f"\n{'='*60}")
+        print(f"Категорий: {len(self._leaf_categories)}")
+        print(f"Итого собрано товаров: {len(self.products)}")
+        if self.stats_skipped > 0:
+            print(f"Пропущено (уже в БД): {self.stats_skipped}")
+        print(f"Ошибок: {len(self.errors)}")
+        print(f"HTTP: {stats}")
+        print(f"{'='*60}")
+
+        return self.products
+
     def _generate_article_from_url(self, url: str) -> str:
         """Генерация артикула из URL если не найден"""
         # Берём slug из URL
@@ -511,6 +857,26 @@ def ensure_outlet():
         conn.close()
 
 
+_STAGING_INSERT_SQL = """
+    INSERT INTO staging (
+        outlet_code, name, article, barcode, category,
+        price, url
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def _staging_row(p: Dict) -> tuple:
+    return (
+        SHOP_CODE,
+        p.get("name", ""),
+        p.get("article", ""),
+        p.get("barcode", ""),
+        p.get("category", ""),
+        p.get("price", 0),
+        p.get("url", ""),
+    )
+
+
 def save_staging(products: List[Dict]):
     """Сохранение товаров в staging таблицу"""
     if not products:
@@ -524,23 +890,8 @@ def save_staging(products: List[Dict]):
         cur.execute("TRUNCATE TABLE staging")
 
         # Вставляем товары
-        insert_sql = """
-            INSERT INTO staging (
-                outlet_code, name, article, barcode, category,
-                price, url
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """
-
         for p in products:
-            cur.execute(insert_sql, (
-                SHOP_CODE,
-                p.get("name", ""),
-                p.get("article", ""),
-                p.get("barcode", ""),
-                p.get("category", ""),
-                p.get("price", 0),
-                p.get("url", ""),
-            ))
+            cur.execute(_STAGING_INSERT_SQL, _staging_row(p))
 
         conn.commit()
         print(f"Сохранено в staging: {len(products)} товаров")
@@ -700,11 +1051,13 @@ def main():
     arg_parser.add_argument('--limit', '-l', type=int, default=None,
                            help='Лимит товаров')
     arg_parser.add_argument('--parallel', '-p', action='store_true',
-                           help='Параллельный парсинг категорий')
+                           help='Параллельный парсинг категорий (адаптивный пул потоков)')
     arg_parser.add_argument('--old-schema', action='store_true',
                            help='Использовать старую схему БД (staging)')
     arg_parser.add_argument('--full', action='store_true',
                            help='Полный парсинг всех товаров (игнорировать кэш из БД)')
+    arg_parser.add_argument('--concurrency', type=int, default=0,
+                           help='Параллельная загрузка страниц через crawl_engine (N запросов на домен)')
     args = arg_parser.parse_args()
 
     # Только обработка staging (старая схема)
@@ -720,7 +1073,19 @@ def main():
         print(f"[DB] Известных URL: {len(parser.known_urls)}, инкрементальный режим")
     elif args.full:
         print(f"[FULL] Полный парсинг всех товаров")
-    parser.parse_all(limit=args.limit, parallel=args.parallel)
+    # Параллельный режим + старая схема: товары пишутся в staging по мере готовности категорий
+    staging_writer = None
+    if args.parallel and args.old_schema and not args.no_db and args.concurrency <= 0:
+        staging_writer = StagingWriter()
+    try:
+        if args.concurrency > 0:
+            parser.parse_all_concurrent(concurrency=args.concurrency, limit=args.limit)
+        else:
+            parser.parse_all(limit=args.limit, parallel=args.parallel,
+                             sink=staging_writer.write if staging_writer else None)
+    finally:
+        if staging_writer:
+            staging_writer.close()
     parser.save_to_json()
     parser.save_to_csv()
 
@@ -728,7 +1093,8 @@ def main():
     if not args.no_db:
         if args.old_schema:
             # Старая схема через staging
-            save_staging(parser.products)
+            if not staging_writer:
+                save_staging(parser.products)
             if args.all:
                 process_staging(full_mode=args.full)
         else:
@@ -0,0 +1,38 @@
+"""Тест параллельного режима: ошибка sink при полной очереди результатов не вешает парсер"""
+import threading
+import time
+
+import pytest
+
+from config import PARALLEL_QUEUE_SIZE
+from parser import Signal23Parser
+
+
+def test_sink_error_with_full_results_queue():
+    p = Signal23Parser()
+    p._parse_category_products = lambda url, limit=None: [{"url": url}]
+    categories = [{"name": f"cat{i}", "url": f"https://signal23.ru/cat{i}"}
+                  for i in range(PARALLEL_QUEUE_SIZE * 4)]
+
+    def sink(products):
+        time.sleep(0.2)  # потоки успевают заполнить очередь результатов
+        raise RuntimeError("staging write failed")
+
+    errors = []
+
+    def run():
+        try:
+            p._parse_categories_parallel(categories, sink=sink)
+        except Exception as e:
+            errors.append(e)
+
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    t.join(timeout=10)
+
+    assert not t.is_alive(), "parser hung in join()"
+    assert len(errors) == 1 and isinstance(errors[0], RuntimeError)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
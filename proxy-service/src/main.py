@@ -5,7 +5,7 @@ FastAPI app with lifespan, API routes, and scheduled refresh.
 import asyncio
 import logging
 from contextlib import asynccontextmanager
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from pydantic import BaseModel
@@ -47,6 +47,10 @@ class ReportRequest(BaseModel):
     banned_site: Optional[str] = None
 
 
+class ReportBatchRequest(BaseModel):
+    reports: List[ReportRequest]
+
+
 # ── Routes ───────────────────────────────────────────────────
 
 @app.get("/health")
@@ -84,6 +88,20 @@ async def proxy_report(req: ReportRequest):
     return {"status": "ok"}
 
 
+@app.post("/proxy/report/batch")
+async def proxy_report_batch(req: ReportBatchRequest):
+    """Report a batch of proxy usage results (consumers that buffer outcomes)."""
+    for r in req.reports:
+        await pool.report(
+            host=r.host,
+            port=r.port,
+            success=r.success,
+            response_time=r.response_time,
+            banned_site=r.banned_site,
+        )
+    return {"status": "ok", "count": len(req.reports)}
+
+
 @app.post("/proxy/refresh")
 async def proxy_refresh(background_tasks: BackgroundTasks):
     """Trigger scrape + check cycle (runs in background)."""
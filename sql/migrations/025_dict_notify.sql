@@ -0,0 +1,21 @@
+-- Normalizer: NOTIFY при изменении справочников брендов и моделей
+-- Процессы нормализатора держат снимок zip_dict_brands / zip_dict_models в памяти
+-- (SHOPS/normalizer/dictionary.py) и перечитывают его по этому каналу
+
+CREATE OR REPLACE FUNCTION notify_zip_dict_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('zip_dict_changed', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_zip_dict_brands_notify ON zip_dict_brands;
+CREATE TRIGGER trg_zip_dict_brands_notify
+    AFTER INSERT OR UPDATE OR DELETE ON zip_dict_brands
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_zip_dict_changed();
+
+DROP TRIGGER IF EXISTS trg_zip_dict_models_notify ON zip_dict_models;
+CREATE TRIGGER trg_zip_dict_models_notify
+    AFTER INSERT OR UPDATE OR DELETE ON zip_dict_models
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_zip_dict_changed();
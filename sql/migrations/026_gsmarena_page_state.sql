@@ -0,0 +1,16 @@
+-- GSMArena: состояние страниц моделей для incremental-режима
+-- parser.py / parallel_parse.py --incremental хранят здесь хэш таблиц характеристик
+-- и время последней проверки (SHOPS/GSMArena/parser.py, is_check_due)
+
+CREATE TABLE IF NOT EXISTS zip_gsmarena_page_state (
+    model_url TEXT PRIMARY KEY,
+    brand TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    page_hash TEXT NOT NULL,
+    release_status TEXT,
+    release_year INTEGER,
+    checked_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    changed_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_gsmarena_page_state_brand ON zip_gsmarena_page_state(brand);